@@ -1,6 +1,5 @@
 import os
 import yaml
-from waitress import serve
 from t08_flask_mysql.app.my_project import create_app
 
 DEVELOPMENT = "development"
@@ -31,3 +30,9 @@ app = create_app(config_data, additional_config)
 # --- Вмикаємо debug глобально ---
 if FLASK_ENV == DEVELOPMENT:
     app.debug = True
+
+if __name__ == "__main__":
+    # waitress потрібен лише для запуску сервера, а не для `flask` CLI чи тестів
+    from waitress import serve
+
+    serve(app, host=HOST, port=DEVELOPMENT_PORT if FLASK_ENV == DEVELOPMENT else PRODUCTION_PORT)
@@ -3,16 +3,25 @@ import secrets
 from typing import Dict, Any
 
 from flask import Flask
-from flasgger import Swagger
-from sqlalchemy_utils import database_exists, create_database
 from t08_flask_mysql.app.my_project.route import register_routes
-from .db import db
+from .admission import init_admission
+from .analytics_refresh import init_analytics_refresh
+from .bloom import init_bloom_filters
+from .cli import register_commands
+from .compression import init_compression
+from .leaderboards import init_leaderboards
+from .metrics import init_metrics
+from .profiler import init_profiler
+from .response_cache import init_response_cache
+from .single_flight import init_single_flight
 
 # Константи для конфігурації
 SECRET_KEY = "SECRET_KEY"
 SQLALCHEMY_DATABASE_URI = "SQLALCHEMY_DATABASE_URI"
 MYSQL_ROOT_USER = "MYSQL_ROOT_USER"
 MYSQL_ROOT_PASSWORD = "MYSQL_ROOT_PASSWORD"
+SWAGGER_ENABLED = "SWAGGER_ENABLED"
+CREATE_DATABASE_IF_MISSING = "CREATE_DATABASE_IF_MISSING"
 
 
 def create_app(app_config: Dict[str, Any], additional_config: Dict[str, Any]) -> Flask:
@@ -29,23 +38,96 @@ def create_app(app_config: Dict[str, Any], additional_config: Dict[str, Any]) ->
     _init_db(app)
     register_routes(app)
 
+    # Метрики Prometheus (/metrics)
+    init_metrics(app)
+
+    # Журнал повільних запитів, статистика кешу скомпільованих запитів та дедлайни (gauge-і потребують метрик)
+    _init_query_instrumentation(app)
+
+    # Фільтри Блума для перевірок Email / Username / GameName (gauge-і потребують метрик)
+    init_bloom_filters(app)
+
+    # Рейтинги ігор і видавців у пам'яті (gauge-і потребують метрик)
+    init_leaderboards(app)
+
+    # Фонове оновлення rollup-ів аналітики: GET /analytics лише читає їх
+    init_analytics_refresh(app)
+
+    # Профілювання окремих запитів (flame graph у /_internal/profiles)
+    init_profiler(app)
+
+    # Контроль навантаження: ліміти конкурентності та частоти запитів
+    init_admission(app)
+
+    # Об'єднання однакових одночасних читань
+    init_single_flight(app)
+
+    # Стиснення відповідей (gzip / brotli)
+    init_compression(app)
+
+    # Спільний для воркерів кеш GET-відповідей (зберігає тіло ще до стиснення)
+    init_response_cache(app)
+
     # Swagger UI (/apidocs)
-    Swagger(app)
+    _init_swagger(app)
+
+    # Команди CLI (flask ...)
+    register_commands(app)
 
     return app
 
 
 def _init_db(app: Flask) -> None:
+    # Важкі модулі (SQLAlchemy, sqlalchemy_utils) імпортуються лише тут, а не під час імпорту пакета
+    from .db import db
+    # Моделі мають бути зареєстровані в metadata до create_all()
+    from .domain import change_log, games, id_sequence, publisher, purchase_rollup, user_game_ownership, users  # noqa: F401
+
     db.init_app(app)
 
     # Створення бази даних, якщо не існує
     db_uri = app.config.get(SQLALCHEMY_DATABASE_URI)
-    if db_uri and not database_exists(db_uri):
-        create_database(db_uri)
+    if db_uri and app.config.get(CREATE_DATABASE_IF_MISSING, True):
+        from sqlalchemy_utils import database_exists, create_database
+
+        if not database_exists(db_uri):
+            create_database(db_uri)
 
     with app.app_context():
         db.create_all()
 
+    # Архів старих покупок (view "гарячі + архівні") та шарди UserGameOwnership (якщо задано OWNERSHIP_SHARDS)
+    from .archive import init_archive
+    from .sharding import init_sharding
+
+    init_archive(app)
+    init_sharding(app)
+
+    # Одна транзакція на запит
+    from .unit_of_work import init_unit_of_work
+
+    init_unit_of_work(app)
+
+
+def _init_query_instrumentation(app: Flask) -> None:
+    from .deadlines import init_deadlines
+    from .slow_queries import init_slow_query_log
+    from .statements import init_statement_stats
+
+    init_slow_query_log(app)
+    init_statement_stats(app)
+    # Бюджет часу запиту, що обмежує кожен запит до БД
+    init_deadlines(app)
+
+
+def _init_swagger(app: Flask) -> None:
+    if not app.config.get(SWAGGER_ENABLED, True):
+        return
+
+    from flasgger import Swagger
+
+    Swagger(app)
+
 
 def _process_input_config(app_config: Dict[str, Any], additional_config: Dict[str, Any]) -> None:
     """
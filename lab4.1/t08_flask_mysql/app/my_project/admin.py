@@ -0,0 +1,19 @@
+import secrets
+
+from flask import current_app, request
+
+# Ключі конфігурації
+ADMIN_TOKEN = "ADMIN_TOKEN"
+
+ADMIN_HEADER = "X-Admin-Token"
+
+
+def is_admin_request() -> bool:
+    """
+    Запит несе адмінський токен. Якщо ADMIN_TOKEN не задано, службові можливості вимкнені
+    """
+    token = current_app.config.get(ADMIN_TOKEN)
+    supplied = request.headers.get(ADMIN_HEADER)
+    if not token or not supplied:
+        return False
+    return secrets.compare_digest(supplied.encode("utf-8"), str(token).encode("utf-8"))
@@ -0,0 +1,220 @@
+import math
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from flask import Flask, current_app, g, jsonify, request
+
+from . import batch_state
+
+# Ключі конфігурації
+ADMISSION_ENABLED = "ADMISSION_ENABLED"
+ADMISSION_GLOBAL_CONCURRENCY = "ADMISSION_GLOBAL_CONCURRENCY"
+ADMISSION_LOW_PRIORITY_SHARE = "ADMISSION_LOW_PRIORITY_SHARE"
+ADMISSION_DEFAULT_CONCURRENCY = "ADMISSION_DEFAULT_CONCURRENCY"
+ADMISSION_ROUTE_LIMITS = "ADMISSION_ROUTE_LIMITS"
+ADMISSION_LOW_PRIORITY_ENDPOINTS = "ADMISSION_LOW_PRIORITY_ENDPOINTS"
+ADMISSION_QUEUE_TIMEOUT = "ADMISSION_QUEUE_TIMEOUT"
+ADMISSION_LOW_PRIORITY_QUEUE_TIMEOUT = "ADMISSION_LOW_PRIORITY_QUEUE_TIMEOUT"
+ADMISSION_RATE_LIMIT = "ADMISSION_RATE_LIMIT"
+ADMISSION_RATE_BURST = "ADMISSION_RATE_BURST"
+ADMISSION_RETRY_AFTER = "ADMISSION_RETRY_AFTER"
+
+DEFAULT_GLOBAL_CONCURRENCY = 32
+DEFAULT_LOW_PRIORITY_SHARE = 0.25
+DEFAULT_ROUTE_CONCURRENCY = 16
+DEFAULT_QUEUE_TIMEOUT = 2.0
+DEFAULT_LOW_PRIORITY_QUEUE_TIMEOUT = 0.1
+DEFAULT_RATE_LIMIT = 50.0
+DEFAULT_RATE_BURST = 100
+DEFAULT_RETRY_AFTER = 1
+# Ендпоінти зі збереженими процедурами та повними скануваннями таблиць
+DEFAULT_LOW_PRIORITY_ENDPOINTS = [
+    "games.create_random_tables",
+    "games.get_game_name_statistics",
+    "publishers.create_noname_publishers",
+    "user_game_ownership.link_user_to_game",
+]
+EXEMPT_ENDPOINTS = {"metrics", "static"}
+MAX_TRACKED_CLIENTS = 10000
+
+
+class _GlobalLimiter:
+    """
+    Спільний ліміт одночасних запитів. Запити з низьким пріоритетом можуть зайняти лише
+    частку слотів, тож дешеві маршрути завжди мають вільне місце
+    """
+
+    def __init__(self, capacity: int, low_priority_share: float):
+        self.capacity = capacity
+        self.low_priority_capacity = max(1, int(capacity * low_priority_share))
+        self.in_use = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, low_priority: bool, timeout: float) -> bool:
+        limit = self.low_priority_capacity if low_priority else self.capacity
+        with self._cond:
+            return self._cond.wait_for(lambda: self._try_take(limit), timeout)
+
+    def _try_take(self, limit: int) -> bool:
+        if self.in_use >= limit:
+            return False
+        self.in_use += 1
+        return True
+
+    def release(self) -> None:
+        with self._cond:
+            self.in_use -= 1
+            self._cond.notify_all()
+
+
+class _TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, updated: float):
+        self.tokens = tokens
+        self.updated = updated
+
+
+class _RateLimiter:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, _TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def take(self, client: str) -> Tuple[bool, float]:
+        """
+        Повертає (дозволено, через скільки секунд з'явиться наступний токен)
+        """
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                if len(self._buckets) >= MAX_TRACKED_CLIENTS:
+                    self._prune(now)
+                bucket = self._buckets[client] = _TokenBucket(self.burst, now)
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+            if bucket.tokens >= 1:
+                bucket.tokens -= 1
+                return True, 0.0
+            return False, (1 - bucket.tokens) / self.rate
+
+    def _prune(self, now: float) -> None:
+        # Клієнти, чиї відра вже повністю відновились, нічим не відрізняються від нових
+        idle = [client for client, bucket in self._buckets.items()
+                if bucket.tokens + (now - bucket.updated) * self.rate >= self.burst]
+        for client in idle:
+            del self._buckets[client]
+
+
+class AdmissionController:
+    def __init__(self, app: Flask):
+        config = app.config
+        self.global_limiter = _GlobalLimiter(
+            config.get(ADMISSION_GLOBAL_CONCURRENCY, DEFAULT_GLOBAL_CONCURRENCY),
+            config.get(ADMISSION_LOW_PRIORITY_SHARE, DEFAULT_LOW_PRIORITY_SHARE),
+        )
+        self.rate_limiter = _RateLimiter(
+            config.get(ADMISSION_RATE_LIMIT, DEFAULT_RATE_LIMIT),
+            config.get(ADMISSION_RATE_BURST, DEFAULT_RATE_BURST),
+        )
+        self.route_limits = config.get(ADMISSION_ROUTE_LIMITS) or {}
+        self.default_limit = config.get(ADMISSION_DEFAULT_CONCURRENCY, DEFAULT_ROUTE_CONCURRENCY)
+        self.low_priority = set(config.get(ADMISSION_LOW_PRIORITY_ENDPOINTS, DEFAULT_LOW_PRIORITY_ENDPOINTS))
+        self.queue_timeout = config.get(ADMISSION_QUEUE_TIMEOUT, DEFAULT_QUEUE_TIMEOUT)
+        self.low_priority_timeout = config.get(ADMISSION_LOW_PRIORITY_QUEUE_TIMEOUT, DEFAULT_LOW_PRIORITY_QUEUE_TIMEOUT)
+        self.retry_after = config.get(ADMISSION_RETRY_AFTER, DEFAULT_RETRY_AFTER)
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self.shed_total = 0
+        self.rate_limited_total = 0
+
+    def route_semaphore(self, endpoint: str) -> threading.BoundedSemaphore:
+        semaphore = self._semaphores.get(endpoint)
+        if semaphore is None:
+            with self._lock:
+                semaphore = self._semaphores.setdefault(
+                    endpoint, threading.BoundedSemaphore(self.route_limits.get(endpoint, self.default_limit))
+                )
+        return semaphore
+
+
+def init_admission(app: Flask) -> None:
+    """
+    Обмежує конкурентність маршрутів та частоту запитів клієнтів, відхиляючи зайве одразу (503/429)
+    """
+    if not app.config.get(ADMISSION_ENABLED, True):
+        return
+
+    controller = AdmissionController(app)
+    app.extensions["admission"] = controller
+
+    from .metrics import register_counter, register_gauge
+
+    register_gauge(app, "admission_in_use", "Requests holding an admission slot",
+                   lambda: controller.global_limiter.in_use)
+    register_counter(app, "admission_shed_total", "Requests rejected with 503 by admission control",
+                     lambda: controller.shed_total)
+    register_counter(app, "admission_rate_limited_total", "Requests rejected with 429 by the rate limiter",
+                     lambda: controller.rate_limited_total)
+
+    app.before_request(_admit)
+    app.teardown_request(_release)
+
+
+def _pool_saturated() -> bool:
+    from .db import db
+
+    pool = db.engine.pool
+    size = getattr(pool, "size", None)
+    if not callable(size):
+        return False
+    return pool.checkedout() >= size()
+
+
+def _reject(status: int, message: str, retry_after: float):
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return response
+
+
+def _admit():
+    controller: AdmissionController = current_app.extensions["admission"]
+    endpoint = request.endpoint
+    # Операції batch-запиту вже виконуються в слоті самого batch
+    if endpoint is None or endpoint in EXEMPT_ENDPOINTS or batch_state.active():
+        return None
+
+    allowed, wait = controller.rate_limiter.take(request.remote_addr or "unknown")
+    if not allowed:
+        controller.rate_limited_total += 1
+        return _reject(429, "Too many requests", wait)
+
+    low_priority = endpoint in controller.low_priority
+    if low_priority and _pool_saturated():
+        controller.shed_total += 1
+        return _reject(503, "Database is saturated, try again later", controller.retry_after)
+
+    timeout = controller.low_priority_timeout if low_priority else controller.queue_timeout
+    deadline = time.monotonic() + timeout
+    semaphore = controller.route_semaphore(endpoint)
+    if not semaphore.acquire(timeout=timeout):
+        controller.shed_total += 1
+        return _reject(503, "Service is overloaded, try again later", controller.retry_after)
+    if not controller.global_limiter.acquire(low_priority, max(0.0, deadline - time.monotonic())):
+        semaphore.release()
+        controller.shed_total += 1
+        return _reject(503, "Service is overloaded, try again later", controller.retry_after)
+
+    g.admission_semaphore = semaphore
+    return None
+
+
+def _release(exc) -> None:
+    semaphore: Optional[threading.BoundedSemaphore] = g.pop("admission_semaphore", None)
+    if semaphore is not None:
+        current_app.extensions["admission"].global_limiter.release()
+        semaphore.release()
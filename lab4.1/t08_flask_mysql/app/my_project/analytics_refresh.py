@@ -0,0 +1,54 @@
+import threading
+
+from flask import Flask
+
+# Ключі конфігурації
+ANALYTICS_REFRESH_INTERVAL = "ANALYTICS_REFRESH_INTERVAL"
+
+DEFAULT_REFRESH_INTERVAL = 60
+
+
+class RollupRefresher:
+    """
+    Окремий потік раз на interval секунд доводить rollup-и аналітики до актуального стану у власному
+    app context: без дедлайну запиту, а GET /analytics лише читає готові rollup-и
+    """
+
+    def __init__(self, app: Flask, interval: float):
+        self.app = app
+        self.interval = interval
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="analytics-refresh", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.refresh()
+
+    def refresh(self) -> None:
+        from .service.analytics_service import AnalyticsService
+
+        try:
+            # Незакомічена частина (помилка посеред пачки) відкочується разом із сесією app context
+            with self.app.app_context():
+                AnalyticsService.refresh_purchase_rollups()
+        except Exception:
+            self.app.logger.exception("Analytics rollup refresh failed")
+
+
+def init_analytics_refresh(app: Flask) -> None:
+    """
+    Фонове оновлення rollup-ів покупок. ANALYTICS_REFRESH_INTERVAL = 0 вимикає потік —
+    тоді rollup-и оновлює лише `flask refresh-rollups` (наприклад, з cron)
+    """
+    interval = app.config.get(ANALYTICS_REFRESH_INTERVAL, DEFAULT_REFRESH_INTERVAL)
+    if not interval:
+        return
+    refresher = RollupRefresher(app, interval)
+    app.extensions["analytics_refresh"] = refresher
+    refresher.start()
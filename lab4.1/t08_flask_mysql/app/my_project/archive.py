@@ -0,0 +1,67 @@
+from datetime import datetime
+from typing import Optional
+
+from flask import Flask
+from sqlalchemy import Column, MetaData, Table, delete, insert, select, text, union_all
+
+# Ключі конфігурації
+OWNERSHIP_ARCHIVE_AFTER_DAYS = "OWNERSHIP_ARCHIVE_AFTER_DAYS"
+OWNERSHIP_ARCHIVE_BATCH_SIZE = "OWNERSHIP_ARCHIVE_BATCH_SIZE"
+
+DEFAULT_ARCHIVE_AFTER_DAYS = 365
+DEFAULT_BATCH_SIZE = 1000
+
+
+def union_view(name: str, hot: Table, metadata: Optional[MetaData] = None) -> Table:
+    """
+    Опис view "гаряча таблиця UNION ALL архів" для побудови запитів. Окрема MetaData,
+    щоб create_all() не створював його як таблицю
+    """
+    columns = [Column(column.name, column.type, primary_key=column.primary_key) for column in hot.columns]
+    return Table(name, metadata if metadata is not None else MetaData(), *columns)
+
+
+def create_view(conn, view: Table, hot: Table, cold: Table) -> None:
+    """
+    Створює (або оновлює) view над гарячою та архівною таблицями
+    """
+    names = [column.name for column in view.columns]
+    query = union_all(select(*(hot.c[name] for name in names)), select(*(cold.c[name] for name in names)))
+    sql = str(query.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True}))
+    name = conn.dialect.identifier_preparer.quote(view.name)
+    if conn.dialect.name == "sqlite":
+        conn.execute(text(f"CREATE VIEW IF NOT EXISTS {name} AS {sql}"))
+    else:
+        conn.execute(text(f"CREATE OR REPLACE VIEW {name} AS {sql}"))
+
+
+def move_batch(conn, hot: Table, cold: Table, cutoff: datetime, date_column: str, batch_size: int) -> int:
+    """
+    Переносить до batch_size найстаріших рядків, старших за cutoff, з гарячої таблиці в архів
+    (INSERT ... SELECT і DELETE в одній транзакції — коміт робить викликач). Повертає кількість рядків
+    """
+    pk = hot.primary_key.columns[0]
+    ids = conn.execute(
+        select(pk).where(hot.c[date_column] < cutoff).order_by(pk).limit(batch_size)
+    ).scalars().all()
+    if not ids:
+        return 0
+    names = [column.name for column in cold.columns]
+    conn.execute(insert(cold).from_select(names, select(*(hot.c[name] for name in names)).where(pk.in_(ids))))
+    conn.execute(delete(hot).where(pk.in_(ids)))
+    return len(ids)
+
+
+def init_archive(app: Flask) -> None:
+    """
+    Розділення UserGameOwnership на гарячу частину та архів. Нативні партиції MySQL несумісні
+    із зовнішніми ключами цієї таблиці, тож для всіх діалектів це архівна таблиця та view над обома
+    """
+    from .db import db
+    from .dao.user_game_ownership_dao import UserGameOwnershipDAO
+    from .domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+
+    with app.app_context():
+        with db.engine.begin() as conn:
+            create_view(conn, UserGameOwnershipDAO.ALL, UserGameOwnership.__table__,
+                        UserGameOwnershipArchive.__table__)
@@ -0,0 +1,206 @@
+import time
+from typing import Any, Dict, List, Optional
+
+from flask import Response, current_app, g, request
+from werkzeug.exceptions import HTTPException
+from werkzeug.test import EnvironBuilder
+
+from .batch_state import BATCH_ACTIVE
+
+# Ключі конфігурації
+BATCH_MAX_REQUESTS = "BATCH_MAX_REQUESTS"
+BATCH_MAX_BODY_BYTES = "BATCH_MAX_BODY_BYTES"
+BATCH_MAX_SECONDS = "BATCH_MAX_SECONDS"
+BATCH_BLUEPRINTS = "BATCH_BLUEPRINTS"
+
+DEFAULT_MAX_REQUESTS = 50
+DEFAULT_MAX_BODY_BYTES = 1024 * 1024
+DEFAULT_MAX_SECONDS = 30.0
+# Лише CRUD-маршрути: експорт і журнал змін потокові, службові ендпоінти — для адміністратора
+DEFAULT_BLUEPRINTS = ["users", "publishers", "games", "user_game_ownership"]
+METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+# Заголовки, які вкладений запит успадковує від самого batch-запиту
+INHERITED_HEADERS = ("Authorization", "X-Admin-Token", "Accept-Language")
+# Стан g, що переходить між вкладеними запитами: спільна транзакція та дедлайн
+SHARED_STATE_PREFIXES = ("uow_", "shard_connections")
+SKIPPED_RESPONSE_HEADERS = {"Content-Length", "Content-Type", "Vary"}
+
+
+class BatchError(ValueError):
+    """
+    Batch-запит сформовано неправильно — не виконується жодна операція
+    """
+
+
+def parse_operations(payload: Any) -> List[Dict]:
+    if not isinstance(payload, dict) or not isinstance(payload.get("requests"), list):
+        raise BatchError("Body must be an object with a 'requests' list")
+    operations = payload["requests"]
+    if not operations:
+        raise BatchError("'requests' must not be empty")
+    max_requests = current_app.config.get(BATCH_MAX_REQUESTS, DEFAULT_MAX_REQUESTS)
+    if len(operations) > max_requests:
+        raise BatchError(f"At most {max_requests} operations per batch")
+
+    allowed = set(current_app.config.get(BATCH_BLUEPRINTS) or DEFAULT_BLUEPRINTS)
+    adapter = current_app.url_map.bind(request.host)
+    for position, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(f"Operation {position} must be an object")
+        method = str(operation.get("method", "")).upper()
+        path = operation.get("path")
+        if method not in METHODS:
+            raise BatchError(f"Operation {position}: unsupported method '{operation.get('method')}'")
+        if not isinstance(path, str) or not path.startswith("/"):
+            raise BatchError(f"Operation {position}: 'path' must be an absolute path like /users/1")
+        if operation.get("headers") is not None and not isinstance(operation["headers"], dict):
+            raise BatchError(f"Operation {position}: 'headers' must be an object")
+        blueprint = _blueprint(adapter, path, method)
+        # Невідомий шлях не помилка batch — операція просто отримає свою 404/405
+        if blueprint is not None and blueprint not in allowed:
+            raise BatchError(f"Operation {position}: {path} cannot be used in a batch")
+        operation["method"] = method
+    return operations
+
+
+def _blueprint(adapter, path: str, method: str) -> Optional[str]:
+    try:
+        endpoint, _ = adapter.match(path.split("?", 1)[0], method)
+    except HTTPException:
+        return None
+    return endpoint.rsplit(".", 1)[0] if "." in endpoint else endpoint
+
+
+def run(operations: List[Dict], atomic: bool) -> Dict:
+    """
+    Виконує операції по черзі через звичайні маршрути в межах однієї транзакції запиту.
+    atomic — перша невдала операція зупиняє batch і все відкочується; інакше кожна операція
+    має власний SAVEPOINT і відкочується лише вона
+    """
+    started = time.monotonic()
+    deadline = started + current_app.config.get(BATCH_MAX_SECONDS, DEFAULT_MAX_SECONDS)
+    if g.get("deadline") is not None:
+        deadline = min(deadline, g.deadline)
+    g.deadline = deadline
+
+    results = []
+    failed = False
+    timed_out = False
+    setattr(g, BATCH_ACTIVE, True)
+    try:
+        for operation in operations:
+            if failed or timed_out:
+                results.append(_skipped(operation, 504 if timed_out else 424))
+                continue
+            if time.monotonic() >= deadline:
+                timed_out = True
+                results.append(_skipped(operation, 504))
+                continue
+            result = _run_atomic(operation) if atomic else _run_isolated(operation)
+            results.append(result)
+            failed = atomic and result["status"] >= 400
+    finally:
+        g.pop(BATCH_ACTIVE, None)
+
+    committed = not (atomic and (failed or timed_out))
+    return {"atomic": atomic, "committed": committed, "responses": results}
+
+
+def _run_atomic(operation: Dict) -> Dict:
+    try:
+        return _result(operation, _dispatch(operation))
+    except Exception:
+        current_app.logger.exception("Batch operation %s %s failed", operation["method"], operation["path"])
+        return _error(operation, 500, "Internal server error")
+
+
+def _run_isolated(operation: Dict) -> Dict:
+    from .db import db
+
+    callbacks = len(g.get("uow_callbacks") or ())
+    savepoints = [connection.begin_nested() for connection in g.get("uow_participants") or ()]
+    enlisted = len(savepoints)
+    nested = db.session.begin_nested()
+    try:
+        result = _result(operation, _dispatch(operation))
+    except Exception:
+        current_app.logger.exception("Batch operation %s %s failed", operation["method"], operation["path"])
+        result = _error(operation, 500, "Internal server error")
+
+    participants = g.get("uow_participants") or []
+    if result["status"] >= 400:
+        # Зміни невдалої операції (і відкладені інвалідації кешу) зникають, решта batch лишається
+        nested.rollback()
+        for savepoint in savepoints:
+            savepoint.rollback()
+        for connection in participants[enlisted:]:
+            connection.rollback()
+        if g.get("uow_callbacks") is not None:
+            del g.uow_callbacks[callbacks:]
+    else:
+        nested.commit()
+        for savepoint in savepoints:
+            savepoint.commit()
+    return result
+
+
+def _dispatch(operation: Dict) -> Response:
+    app = current_app._get_current_object()
+    headers = {name: request.headers[name] for name in INHERITED_HEADERS if name in request.headers}
+    headers.update({str(name): str(value) for name, value in (operation.get("headers") or {}).items()})
+    path, _, query = operation["path"].partition("?")
+    builder = EnvironBuilder(
+        path=path, query_string=query, method=operation["method"], headers=headers,
+        json=operation.get("body"), base_url=request.host_url,
+        environ_base={"REMOTE_ADDR": request.remote_addr},
+    )
+
+    # Вкладений запит використовує той самий app context (а отже ту саму сесію та g), тож g
+    # очищується від стану batch-запиту (метрики, профілювання, admission) і відновлюється після
+    state = vars(g._get_current_object())
+    saved = dict(state)
+    state.clear()
+    state.update({key: value for key, value in saved.items() if _shared(key)})
+    state[BATCH_ACTIVE] = True
+    state["deadline"] = saved.get("deadline")
+    try:
+        with app.request_context(builder.get_environ()):
+            response = app.full_dispatch_request()
+            response.direct_passthrough = False
+            response.get_data()
+    finally:
+        shared = {key: value for key, value in state.items() if _shared(key)}
+        state.clear()
+        state.update({key: value for key, value in saved.items() if not _shared(key)})
+        state.update(shared)
+        builder.close()
+    return response
+
+
+def _shared(key: str) -> bool:
+    return key.startswith(SHARED_STATE_PREFIXES)
+
+
+def _result(operation: Dict, response: Response) -> Dict:
+    result = {"status": response.status_code}
+    if "id" in operation:
+        result["id"] = operation["id"]
+    headers = {name: value for name, value in response.headers.items() if name not in SKIPPED_RESPONSE_HEADERS}
+    if headers:
+        result["headers"] = headers
+    if response.status_code != 204:
+        result["body"] = response.get_json(silent=True) if response.is_json else response.get_data(as_text=True)
+    return result
+
+
+def _error(operation: Dict, status: int, message: str) -> Dict:
+    result = {"status": status, "body": {"error": message}}
+    if "id" in operation:
+        result["id"] = operation["id"]
+    return result
+
+
+def _skipped(operation: Dict, status: int) -> Dict:
+    if status == 504:
+        return _error(operation, status, "Not executed: batch time limit exceeded")
+    return _error(operation, status, "Not executed: an earlier operation in the atomic batch failed")
@@ -0,0 +1,12 @@
+from flask import g, has_request_context
+
+# Ключ у g, поки виконуються операції batch-запиту
+BATCH_ACTIVE = "batch_active"
+
+
+def active() -> bool:
+    """
+    Чи виконується поточний запит як частина batch (хуки запиту тоді не чіпають спільну транзакцію).
+    Окремий модуль без залежностей: його імпортують хуки, що завантажуються разом з пакетом
+    """
+    return has_request_context() and g.get(BATCH_ACTIVE, False)
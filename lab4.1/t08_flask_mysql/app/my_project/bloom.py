@@ -0,0 +1,342 @@
+import hashlib
+import math
+import threading
+import time
+import unicodedata
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Optional
+
+from flask import Flask, current_app
+
+# Ключі конфігурації
+BLOOM_ENABLED = "BLOOM_ENABLED"
+BLOOM_FP_RATE = "BLOOM_FP_RATE"
+BLOOM_MIN_CAPACITY = "BLOOM_MIN_CAPACITY"
+BLOOM_REBUILD_INTERVAL = "BLOOM_REBUILD_INTERVAL"
+BLOOM_SYNC_INTERVAL = "BLOOM_SYNC_INTERVAL"
+
+DEFAULT_FP_RATE = 0.01
+DEFAULT_MIN_CAPACITY = 10000
+DEFAULT_REBUILD_INTERVAL = 3600
+DEFAULT_SYNC_INTERVAL = 1.0
+# Запас місткості над поточною кількістю рядків, щоб фільтр не переповнився до наступної перебудови
+CAPACITY_HEADROOM = 2
+BUILD_CHUNK_SIZE = 5000
+
+# Назва фільтра -> (таблиця, ключ, колонка)
+FILTERS = {
+    "users.email": ("Users", "UserID", "Email"),
+    "users.username": ("Users", "UserID", "Username"),
+    "games.name": ("Games", "GameID", "GameName"),
+}
+
+
+def normalize(value) -> str:
+    """
+    Ключ фільтра. Колації MySQL (*_ai_ci) не розрізняють регістр, наголоси та пробіли в кінці —
+    однакові для БД значення мусять давати однаковий ключ, інакше фільтр помилково скаже "немає"
+    """
+    text = unicodedata.normalize("NFKD", str(value))
+    text = "".join(char for char in text if not unicodedata.combining(char))
+    return text.casefold().rstrip()
+
+
+class BloomFilter:
+    """
+    Фільтр Блума: "ні" — точно немає, "так" — можливо є (з імовірністю хибного спрацювання fp_rate)
+    """
+
+    def __init__(self, capacity: int, fp_rate: float):
+        self.capacity = max(1, capacity)
+        self.size = max(8, math.ceil(-self.capacity * math.log(fp_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.items = 0
+        self._lock = threading.Lock()
+
+    def _positions(self, value) -> Iterable[int]:
+        # Подвійне хешування: k позицій з двох 64-бітних половин одного дайджесту
+        digest = hashlib.blake2b(normalize(value).encode("utf-8"), digest_size=16).digest()
+        h1, h2 = int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, value) -> None:
+        positions = list(self._positions(value))
+        with self._lock:
+            for position in positions:
+                self.bits[position >> 3] |= 1 << (position & 7)
+            self.items += 1
+
+    def __contains__(self, value) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self.bits)
+
+    def estimated_fp_rate(self) -> float:
+        return (1 - math.exp(-self.hashes * self.items / self.size)) ** self.hashes
+
+
+class BloomFilters:
+    """
+    Фільтри за Users.Email, Users.Username та Games.GameName. Будуються під час старту,
+    поповнюються записами DAO цього процесу та (для записів інших воркерів) з журналу змін,
+    повністю перебудовуються у фоні раз на rebuild_interval — видалені та змінені значення фільтр
+    забути не може
+    """
+
+    def __init__(self, app: Flask, fp_rate: float, min_capacity: int, rebuild_interval: float, sync_interval: float):
+        self.app = app
+        self.fp_rate = fp_rate
+        self.min_capacity = min_capacity
+        self.rebuild_interval = rebuild_interval
+        self.sync_interval = sync_interval
+        self.filters: Dict[str, BloomFilter] = {}
+        self.stats = {name: {"negatives": 0, "positives": 0, "false_positives": 0} for name in FILTERS}
+        self.built_at = 0.0
+        self.rebuilds = 0
+        self._building: Optional[Dict[str, BloomFilter]] = None
+        self._cursor = 0
+        self._synced_at = 0.0
+        self._synced_since: Optional[datetime] = None
+        # Уже застосовані події вікна перечитування: ChangeID -> ChangedAt
+        self._seen: Dict[int, datetime] = {}
+        self._sync_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _models(self):
+        from .domain.games import Game
+        from .domain.users import User
+
+        return {"Users": User, "Games": Game}
+
+    def build(self) -> None:
+        """
+        Повна побудова (потрібен контекст застосунку). Записи, що з'являються під час побудови,
+        потрапляють і в старі, і в нові фільтри; після заміни — синхронізація з журналу змін
+        """
+        from sqlalchemy import func, select
+
+        from .db import db
+        from .domain.change_log import ChangeLog
+
+        models = self._models()
+        from .dao.change_log_dao import ChangeLogDAO
+
+        # Курсор не може бути старішим за компактизацію, інакше sync вимагатиме перебудови знову
+        cursor = max(db.session.execute(select(func.max(ChangeLog.ChangeID))).scalar() or 0,
+                     ChangeLogDAO.get_compacted_up_to())
+        started = datetime.now()
+        building = {}
+        for name, (table, _, column) in FILTERS.items():
+            model = models[table]
+            count = db.session.execute(select(func.count()).select_from(model)).scalar() or 0
+            building[name] = BloomFilter(max(self.min_capacity, count * CAPACITY_HEADROOM), self.fp_rate)
+        self._building = building
+        try:
+            for name, (table, _, column) in FILTERS.items():
+                result = db.session.execute(
+                    select(getattr(models[table], column)).execution_options(yield_per=BUILD_CHUNK_SIZE)
+                )
+                for value in result.scalars():
+                    building[name].add(value)
+        finally:
+            self._building = None
+        db.session.rollback()
+
+        self.filters = building
+        self.built_at = time.monotonic()
+        self.rebuilds += 1
+        with self._sync_lock:
+            self._cursor = cursor
+            self._synced_since = started
+        self.sync(force=True)
+
+    def add(self, table: str, values: Dict[str, object]) -> None:
+        """
+        Викликається DAO після INSERT/UPDATE. Значення з відкоченої транзакції лише додадуть хибне "так"
+        """
+        for name, (filter_table, _, column) in FILTERS.items():
+            if filter_table != table or values.get(column) is None:
+                continue
+            for filters in (self.filters, self._building):
+                if filters and name in filters:
+                    filters[name].add(values[column])
+
+    def might_contain(self, name: str, value) -> bool:
+        self._refresh()
+        bloom = self.filters.get(name)
+        if bloom is None or value is None:
+            return True
+        found = value in bloom
+        self.stats[name]["positives" if found else "negatives"] += 1
+        return found
+
+    def record_false_positive(self, name: str) -> None:
+        """
+        Фільтр сказав "можливо", а БД значення не знайшла
+        """
+        self.stats[name]["false_positives"] += 1
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._synced_at >= self.sync_interval:
+            self.sync()
+        stale = now - self.built_at >= self.rebuild_interval
+        overfull = any(bloom.items > bloom.capacity for bloom in self.filters.values())
+        if (stale or overfull) and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, name="bloom-rebuild", daemon=True).start()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            with self.app.app_context():
+                self.build()
+        except Exception:
+            self.app.logger.exception("Bloom filter rebuild failed")
+            # Наступна спроба — не раніше ніж через rebuild_interval
+            self.built_at = time.monotonic()
+        finally:
+            self._rebuild_lock.release()
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Додає значення, записані іншими воркерами: події insert/update з журналу змін після курсора
+        (і ще раз — події вікна перечитування, див. _settle_seconds)
+        """
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            from sqlalchemy import or_, select
+
+            from .dao.change_log_dao import ChangeLogDAO, DELETE
+            from .db import db
+            from .domain.change_log import ChangeLog
+
+            self._synced_at = time.monotonic()
+            started = datetime.now()
+            if self._cursor < ChangeLogDAO.get_compacted_up_to():
+                # Пропущені події вже видалені компактизацією — лише повна перебудова
+                self.built_at = 0.0
+                return
+
+            tables = {table for table, _, _ in FILTERS.values()}
+            since = (self._synced_since or started) - timedelta(seconds=_settle_seconds())
+            events = db.session.execute(
+                select(ChangeLog.ChangeID, ChangeLog.Entity, ChangeLog.EntityID, ChangeLog.ChangedAt)
+                .where(ChangeLog.Entity.in_(tables), ChangeLog.Operation != DELETE,
+                       or_(ChangeLog.ChangeID > self._cursor, ChangeLog.ChangedAt >= since))
+            ).all()
+            ids: Dict[str, set] = {table: set() for table in tables}
+            for event in events:
+                if event.ChangeID in self._seen:
+                    continue
+                self._seen[event.ChangeID] = event.ChangedAt
+                ids[event.Entity].add(event.EntityID)
+                self._cursor = max(self._cursor, event.ChangeID)
+            self._seen = {change_id: at for change_id, at in self._seen.items() if at >= since}
+            self._synced_since = started
+
+            models = self._models()
+            for table, entity_ids in ids.items():
+                if not entity_ids:
+                    continue
+                model = models[table]
+                key = getattr(model, next(key for t, key, _ in FILTERS.values() if t == table))
+                columns = sorted({column for t, _, column in FILTERS.values() if t == table})
+                for row in db.session.execute(
+                    select(*(getattr(model, column) for column in columns)).where(key.in_(entity_ids))
+                ):
+                    self.add(table, row._asdict())
+        finally:
+            self._sync_lock.release()
+
+    def report(self) -> Dict[str, Dict]:
+        report = {}
+        for name, bloom in self.filters.items():
+            stats = self.stats[name]
+            checked_misses = stats["negatives"] + stats["false_positives"]
+            report[name] = {
+                "items": bloom.items,
+                "capacity": bloom.capacity,
+                "bits": bloom.size,
+                "hashes": bloom.hashes,
+                "memory_bytes": bloom.memory_bytes,
+                "estimated_fp_rate": round(bloom.estimated_fp_rate(), 6),
+                # Частка хибних "можливо" серед значень, яких насправді немає
+                "observed_fp_rate": round(stats["false_positives"] / checked_misses, 6) if checked_misses else 0.0,
+                **stats,
+            }
+        return report
+
+
+def init_bloom_filters(app: Flask) -> None:
+    """
+    Фільтри Блума для швидкої відповіді "точно немає" на перевірках Email, Username та GameName
+    """
+    if not app.config.get(BLOOM_ENABLED, True):
+        return
+
+    filters = BloomFilters(
+        app,
+        app.config.get(BLOOM_FP_RATE, DEFAULT_FP_RATE),
+        app.config.get(BLOOM_MIN_CAPACITY, DEFAULT_MIN_CAPACITY),
+        app.config.get(BLOOM_REBUILD_INTERVAL, DEFAULT_REBUILD_INTERVAL),
+        app.config.get(BLOOM_SYNC_INTERVAL, DEFAULT_SYNC_INTERVAL),
+    )
+    with app.app_context():
+        filters.build()
+    app.extensions["bloom_filters"] = filters
+
+    from .metrics import register_counter, register_gauge
+
+    def by_filter(key):
+        return lambda: {(("filter", name),): values[key] for name, values in filters.report().items()}
+
+    register_gauge(app, "bloom_filter_memory_bytes", "Bit array size of each Bloom filter", by_filter("memory_bytes"))
+    register_gauge(app, "bloom_filter_items", "Values added to each Bloom filter since its last build",
+                   by_filter("items"))
+    register_gauge(app, "bloom_filter_estimated_fp_rate", "False-positive rate expected from the filter fill",
+                   by_filter("estimated_fp_rate"))
+    register_gauge(app, "bloom_filter_observed_fp_rate", "Share of absent values the filter reported as present",
+                   by_filter("observed_fp_rate"))
+    register_counter(app, "bloom_filter_negatives_total", "Lookups answered as definite misses without the database",
+                     by_filter("negatives"))
+    register_counter(app, "bloom_filter_positives_total", "Lookups the filter reported as possibly present",
+                     by_filter("positives"))
+    register_counter(app, "bloom_filter_false_positives_total", "Possible matches the database showed to be absent",
+                     by_filter("false_positives"))
+
+
+def get_bloom_filters() -> Optional[BloomFilters]:
+    return current_app.extensions.get("bloom_filters")
+
+
+def _settle_seconds() -> float:
+    """
+    Вікно перечитування журналу змін: Email, закомічений пізніше за подію з більшим ChangeID, інакше
+    ніколи не потрапив би у фільтр. Те саме вікно, що й у стрічки змін, — найдовша дозволена транзакція
+    """
+    from .service.change_log_service import ChangeLogService
+
+    return ChangeLogService.settle_seconds()
+
+
+def might_contain(name: str, value) -> bool:
+    """
+    False — значення точно немає в БД; True — можливо є (або фільтри вимкнено), треба перевірити запитом
+    """
+    filters = get_bloom_filters()
+    return True if filters is None else filters.might_contain(name, value)
+
+
+def record_false_positive(name: str) -> None:
+    filters = get_bloom_filters()
+    if filters is not None:
+        filters.record_false_positive(name)
+
+
+def add(table: str, values: Dict[str, object]) -> None:
+    filters = get_bloom_filters()
+    if filters is not None:
+        filters.add(table, values)
@@ -0,0 +1,148 @@
+import time
+
+import click
+from flask import Flask
+from flask.cli import with_appcontext
+
+
+def register_commands(app: Flask) -> None:
+    # Модуль-перевірка імпортується тут, а не нагорі: інакше `python -m ...import_time` побачив би
+    # його вже завантаженим разом з пакетом
+    from .import_time import import_time_command
+
+    app.cli.add_command(import_time_command)
+    app.cli.add_command(refresh_rollups_command)
+    app.cli.add_command(export_command)
+    app.cli.add_command(compact_changes_command)
+    app.cli.add_command(bench_statements_command)
+    app.cli.add_command(reshard_ownerships_command)
+    app.cli.add_command(archive_ownerships_command)
+
+
+@click.command("refresh-rollups")
+@click.option("--rebuild", is_flag=True, help="Drop all rollups and recompute them from scratch")
+@with_appcontext
+def refresh_rollups_command(rebuild):
+    """Bring purchase analytics rollups up to date (run periodically, e.g. from cron)."""
+    from .service.analytics_service import AnalyticsService
+
+    if rebuild:
+        processed = AnalyticsService.rebuild_purchase_rollups()
+    else:
+        processed = AnalyticsService.refresh_purchase_rollups()
+    click.echo(f"Processed {processed} purchases")
+
+
+@click.command("export")
+@click.argument("table")
+@click.option("--format", "export_format", type=click.Choice(["csv", "ndjson"]), default="csv")
+@click.option("--output", type=click.Path(dir_okay=False), default=None, help="Output file (stdout by default)")
+@click.option("--since-id", type=int, default=None, help="Only rows with a primary key greater than this value")
+@click.option("--since-date", type=click.DateTime(), default=None, help="Only rows dated on or after this date")
+@with_appcontext
+def export_command(table, export_format, output, since_id, since_date):
+    """Stream a table to a CSV/NDJSON file in constant memory."""
+    from .service.export_service import ExportService
+
+    try:
+        chunks = ExportService.export(table, export_format, since_id, since_date)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+
+    with click.open_file(output or "-", "w", encoding="utf-8") as f:
+        for chunk in chunks:
+            f.write(chunk)
+
+
+@click.command("compact-changes")
+@click.option("--retention-days", type=int, default=None, help="Keep events newer than this (CHANGE_LOG_RETENTION_DAYS by default)")
+@click.option("--collapse", is_flag=True, help="Also keep only the latest event of every entity")
+@with_appcontext
+def compact_changes_command(retention_days, collapse):
+    """Apply the change log retention policy (run periodically, e.g. from cron)."""
+    from .service.change_log_service import ChangeLogService
+
+    removed = ChangeLogService.compact(retention_days, collapse)
+    click.echo(f"Removed {removed} change log event(s)")
+
+
+@click.command("reshard-ownerships")
+@click.option("--from-main", is_flag=True, help="Also move ownerships still stored in the main database")
+@click.option("--retired", multiple=True, help="URI of a shard being removed (repeatable); its rows are moved out")
+@click.option("--batch-size", type=int, default=1000, show_default=True)
+@with_appcontext
+def reshard_ownerships_command(from_main, retired, batch_size):
+    """Move ownerships to the shard their UserID hashes to (after changing OWNERSHIP_SHARDS)."""
+    from .service.user_game_ownership_service import UserGameOwnershipService
+
+    try:
+        moved = UserGameOwnershipService.reshard_ownerships(from_main, retired, batch_size)
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    click.echo(f"Moved {moved} ownership(s)")
+
+
+@click.command("archive-ownerships")
+@click.option("--older-than-days", type=int, default=None,
+              help="Archive purchases older than this (OWNERSHIP_ARCHIVE_AFTER_DAYS by default)")
+@click.option("--batch-size", type=int, default=None, help="Rows per transaction (OWNERSHIP_ARCHIVE_BATCH_SIZE by default)")
+@with_appcontext
+def archive_ownerships_command(older_than_days, batch_size):
+    """Move old ownerships to the cold archive table (run periodically, e.g. from cron)."""
+    from .service.user_game_ownership_service import UserGameOwnershipService
+
+    moved = UserGameOwnershipService.archive_ownerships(older_than_days, batch_size)
+    click.echo(f"Archived {moved} ownership(s)")
+
+
+def _per_call_us(fn, iterations: int) -> float:
+    fn()  # прогрів: перша компіляція не входить у вимір
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+@click.command("bench-statements")
+@click.option("--iterations", type=int, default=2000, show_default=True)
+@click.option("--game-id", type=int, default=1, show_default=True, help="Game to look up (need not exist)")
+@with_appcontext
+def bench_statements_command(iterations, game_id):
+    """Microbenchmark: per-call overhead of ad-hoc queries vs prepared DAO statements."""
+    from sqlalchemy import select
+
+    from .dao.games_dao import GamesDAO
+    from .db import db
+    from .domain.games import Game
+    from .list_query import build_select
+
+    session = db.session
+
+    def legacy_get():
+        session.expunge_all()
+        Game.query.get(game_id)
+
+    def adhoc_select():
+        session.expunge_all()
+        session.execute(select(Game).where(Game.GameID == game_id)).scalar_one_or_none()
+
+    def prepared_select():
+        session.expunge_all()
+        session.execute(GamesDAO.BY_ID, {"id": game_id}).scalar_one_or_none()
+
+    def adhoc_list_build():
+        build_select(Game, GamesDAO.LIST_COLUMNS, GamesDAO.DEFAULT_LIST_FIELDS)._generate_cache_key()
+
+    def prepared_list_build():
+        GamesDAO.DEFAULT_LIST._generate_cache_key()
+
+    rows = [
+        ("Game.query.get (before)", legacy_get),
+        ("ad-hoc select by id", adhoc_select),
+        ("prepared games.by_id (after)", prepared_select),
+        ("list statement build + cache key (before)", adhoc_list_build),
+        ("prepared games.list cache key (after)", prepared_list_build),
+    ]
+    for name, fn in rows:
+        click.echo(f"{name:<45} {_per_call_us(fn, iterations):10.1f} us/call")
+    session.rollback()
@@ -0,0 +1,118 @@
+import zlib
+from typing import Iterable, Iterator, Optional
+
+from flask import Flask, Response, current_app, request
+
+try:
+    import brotli
+except ImportError:  # brotli не обов'язковий — без нього працює лише gzip
+    brotli = None
+
+# Ключі конфігурації
+COMPRESS_ENABLED = "COMPRESS_ENABLED"
+COMPRESS_MIN_SIZE = "COMPRESS_MIN_SIZE"
+COMPRESS_LEVEL = "COMPRESS_LEVEL"
+COMPRESS_BROTLI_QUALITY = "COMPRESS_BROTLI_QUALITY"
+COMPRESS_MIMETYPES = "COMPRESS_MIMETYPES"
+
+DEFAULT_MIN_SIZE = 1024
+DEFAULT_LEVEL = 6
+DEFAULT_BROTLI_QUALITY = 5
+DEFAULT_MIMETYPES = ["application/json", "text/plain", "text/csv", "application/x-ndjson", "text/html"]
+
+
+class _GzipCompressor:
+    def __init__(self, level: int):
+        # wbits=31 — формат gzip (заголовок + CRC), а не "сирий" deflate
+        self._obj = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.compress(data)
+
+    def finish(self) -> bytes:
+        return self._obj.flush(zlib.Z_FINISH)
+
+
+class _BrotliCompressor:
+    def __init__(self, quality: int):
+        self._obj = brotli.Compressor(quality=quality)
+
+    def compress(self, data: bytes) -> bytes:
+        return self._obj.process(data)
+
+    def finish(self) -> bytes:
+        return self._obj.finish()
+
+
+def init_compression(app: Flask) -> None:
+    """
+    Стискає відповіді gzip/brotli згідно з Accept-Encoding клієнта
+    """
+    if not app.config.get(COMPRESS_ENABLED, True):
+        return
+    app.after_request(_compress_response)
+
+
+def _choose_encoding() -> Optional[str]:
+    """
+    Кодування з найбільшим q в Accept-Encoding; за однакового q — br, потім gzip.
+    Явно переважний identity (наприклад, "identity;q=1, gzip;q=0.5") — без стиснення
+    """
+    accept = request.accept_encodings
+    supported = ["br", "gzip"] if brotli is not None else ["gzip"]
+    # max повертає перше з найбільшим q — порядок supported і є пріоритетом
+    best = max(supported, key=accept.quality)
+    quality = accept.quality(best)
+    if quality <= 0 or accept.quality("identity") > quality:
+        return None
+    return best
+
+
+def _make_compressor(app: Flask, encoding: str):
+    if encoding == "br":
+        return _BrotliCompressor(app.config.get(COMPRESS_BROTLI_QUALITY, DEFAULT_BROTLI_QUALITY))
+    return _GzipCompressor(app.config.get(COMPRESS_LEVEL, DEFAULT_LEVEL))
+
+
+def _stream(iterable: Iterable, compressor) -> Iterator[bytes]:
+    # Стискаємо потік частинами, не збираючи все тіло в пам'яті
+    try:
+        for chunk in iterable:
+            if isinstance(chunk, str):
+                chunk = chunk.encode("utf-8")
+            data = compressor.compress(chunk)
+            if data:
+                yield data
+        yield compressor.finish()
+    finally:
+        if hasattr(iterable, "close"):
+            iterable.close()
+
+
+def _compress_response(response: Response) -> Response:
+    if (
+        response.status_code < 200
+        or response.status_code in (204, 304)
+        or response.direct_passthrough
+        or "Content-Encoding" in response.headers
+        or response.mimetype not in current_app.config.get(COMPRESS_MIMETYPES, DEFAULT_MIMETYPES)
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    encoding = _choose_encoding()
+    if encoding is None:
+        return response
+
+    compressor = _make_compressor(current_app, encoding)
+    if response.is_streamed:
+        response.response = _stream(response.response, compressor)
+        response.headers.pop("Content-Length", None)
+    else:
+        body = response.get_data()
+        if len(body) < current_app.config.get(COMPRESS_MIN_SIZE, DEFAULT_MIN_SIZE):
+            return response
+        response.set_data(compressor.compress(body) + compressor.finish())
+
+    response.headers["Content-Encoding"] = encoding
+    return response
@@ -0,0 +1,87 @@
+from datetime import date
+
+from flask import Blueprint, request, jsonify
+from t08_flask_mysql.app.my_project.service.analytics_service import AnalyticsService, GRANULARITIES, GROUP_BY
+
+analytics_bp = Blueprint('analytics', __name__)
+
+
+@analytics_bp.route('/purchases', methods=['GET'])
+def get_purchases():
+    """
+    Purchases per day or week, read only from pre-aggregated daily rollups (refreshed in the background every ANALYTICS_REFRESH_INTERVAL seconds and by `flask refresh-rollups`)
+    ---
+    tags:
+      - Analytics
+    parameters:
+      - name: granularity
+        in: query
+        type: string
+        required: false
+        description: "day (default) or week"
+      - name: from
+        in: query
+        type: string
+        required: false
+        description: "First day to include, ISO date (e.g. 2024-01-01)"
+      - name: to
+        in: query
+        type: string
+        required: false
+        description: "Last day to include, ISO date"
+      - name: game_id
+        in: query
+        type: integer
+        required: false
+        description: "Only purchases of this game"
+      - name: publisher_id
+        in: query
+        type: integer
+        required: false
+        description: "Only purchases of this publisher's games"
+      - name: group_by
+        in: query
+        type: string
+        required: false
+        description: "Split each period by game or publisher"
+    responses:
+      200:
+        description: "Purchases per period"
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              Period:
+                type: string
+              Purchases:
+                type: integer
+              GameID:
+                type: integer
+              PublisherID:
+                type: integer
+      400:
+        description: "Invalid parameters"
+    """
+    granularity = request.args.get('granularity', 'day').lower()
+    if granularity not in GRANULARITIES:
+        return jsonify({"error": f"Invalid granularity. Use one of {', '.join(GRANULARITIES)}."}), 400
+    group_by = request.args.get('group_by')
+    if group_by is not None and group_by not in GROUP_BY:
+        return jsonify({"error": f"Invalid group_by. Use one of {', '.join(GROUP_BY)}."}), 400
+
+    try:
+        date_from = date.fromisoformat(request.args['from']) if request.args.get('from') else None
+        date_to = date.fromisoformat(request.args['to']) if request.args.get('to') else None
+    except ValueError:
+        return jsonify({"error": "from and to must be ISO dates (YYYY-MM-DD)"}), 400
+
+    purchases = AnalyticsService.get_purchases(
+        granularity,
+        date_from,
+        date_to,
+        request.args.get('game_id', type=int),
+        request.args.get('publisher_id', type=int),
+        group_by,
+    )
+    return jsonify(purchases)
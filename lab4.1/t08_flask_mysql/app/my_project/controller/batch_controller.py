@@ -0,0 +1,91 @@
+from flask import Blueprint, current_app, request, jsonify
+from t08_flask_mysql.app.my_project import batch
+
+batch_bp = Blueprint('batch', __name__)
+
+
+@batch_bp.route('', methods=['POST'])
+def run_batch():
+    """
+    Run several operations in one round trip and one database transaction
+    ---
+    tags:
+      - Batch
+    parameters:
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            atomic:
+              type: boolean
+              description: "Stop at the first failed operation and roll back all of them (default false: only the failed operation is rolled back)"
+            requests:
+              type: array
+              description: "Operations, executed in order"
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                    description: "Optional client reference, echoed in the response"
+                  method:
+                    type: string
+                    example: POST
+                  path:
+                    type: string
+                    example: /users/
+                  headers:
+                    type: object
+                  body:
+                    type: object
+    responses:
+      200:
+        description: "Responses of all operations, in the same order"
+        schema:
+          type: object
+          properties:
+            atomic:
+              type: boolean
+            committed:
+              type: boolean
+            responses:
+              type: array
+              items:
+                type: object
+                properties:
+                  id:
+                    type: string
+                  status:
+                    type: integer
+                  headers:
+                    type: object
+                  body:
+                    type: object
+      400:
+        description: "Malformed batch, too many operations or a route that cannot be batched"
+      409:
+        description: "Atomic batch: an operation failed, nothing was committed"
+      413:
+        description: "Batch body is too large"
+      504:
+        description: "Atomic batch did not finish within the time limit, nothing was committed"
+    """
+    max_bytes = current_app.config.get(batch.BATCH_MAX_BODY_BYTES, batch.DEFAULT_MAX_BODY_BYTES)
+    if request.content_length is not None and request.content_length > max_bytes:
+        return jsonify({"error": f"Batch body must not exceed {max_bytes} bytes"}), 413
+
+    payload = request.get_json(silent=True)
+    try:
+        operations = batch.parse_operations(payload)
+    except batch.BatchError as e:
+        return jsonify({"error": str(e)}), 400
+
+    atomic = bool(payload.get('atomic', False))
+    result = batch.run(operations, atomic)
+    if result["committed"]:
+        return jsonify(result)
+    # Статус помилки змушує unit of work відкотити всю транзакцію batch
+    timed_out = any(response["status"] == 504 for response in result["responses"])
+    return jsonify(result), 504 if timed_out else 409
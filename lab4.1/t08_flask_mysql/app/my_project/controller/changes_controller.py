@@ -0,0 +1,75 @@
+from flask import Blueprint, request, jsonify
+from t08_flask_mysql.app.my_project.service.change_log_service import ChangeLogService
+from t08_flask_mysql.app.my_project.dao.change_log_dao import CursorExpiredError
+
+changes_bp = Blueprint('changes', __name__)
+
+
+@changes_bp.route('/', methods=['GET'])
+def get_changes():
+    """
+    Ordered insert/update/delete events after a cursor, for incremental sync
+    ---
+    tags:
+      - Changes
+    parameters:
+      - name: since
+        in: query
+        type: integer
+        required: false
+        description: "Cursor returned as next_cursor by the previous call (0 to start from the oldest retained event)"
+      - name: limit
+        in: query
+        type: integer
+        required: false
+        description: "Maximum number of events to return"
+      - name: entity
+        in: query
+        type: string
+        required: false
+        description: "Only events of this entity: Users, Games, Publishers or UserGameOwnership"
+    responses:
+      200:
+        description: "Events in commit order. Fetch current rows of inserted/updated entities with ?ids=. Events appear only after the settle window (CHANGE_FEED_SETTLE_SECONDS, by default the longest allowed transaction), so that no earlier, still uncommitted event is skipped"
+        schema:
+          type: object
+          properties:
+            changes:
+              type: array
+              items:
+                type: object
+                properties:
+                  ChangeID:
+                    type: integer
+                  Entity:
+                    type: string
+                  EntityID:
+                    type: integer
+                  Operation:
+                    type: string
+                  ChangedAt:
+                    type: string
+            next_cursor:
+              type: integer
+            has_more:
+              type: boolean
+      400:
+        description: "Invalid cursor, limit or entity"
+      410:
+        description: "Cursor is older than the retained change log; a full resync is required"
+    """
+    try:
+        since = int(request.args.get('since', 0))
+        limit = int(request.args['limit']) if request.args.get('limit') else None
+        changes, next_cursor, has_more = ChangeLogService.get_changes(since, limit, request.args.get('entity'))
+    except CursorExpiredError as e:
+        return jsonify({"error": str(e), "compacted_up_to": e.compacted_up_to}), 410
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return jsonify({
+        "changes": [{"ChangeID": c.ChangeID, "Entity": c.Entity, "EntityID": c.EntityID,
+                     "Operation": c.Operation, "ChangedAt": c.ChangedAt} for c in changes],
+        "next_cursor": next_cursor,
+        "has_more": has_more,
+    })
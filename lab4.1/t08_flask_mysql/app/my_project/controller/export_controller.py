@@ -0,0 +1,55 @@
+from datetime import datetime
+
+from flask import Blueprint, Response, request, jsonify, stream_with_context
+from t08_flask_mysql.app.my_project.service.export_service import ExportService, FORMATS
+
+export_bp = Blueprint('export', __name__)
+
+
+@export_bp.route('/<table>', methods=['GET'])
+def export_table(table):
+    """
+    Stream a full or incremental export of a table
+    ---
+    tags:
+      - Export
+    parameters:
+      - name: table
+        in: path
+        type: string
+        required: true
+        description: "users, games, publishers, user_game_ownership or user_game_ownership_archive"
+      - name: format
+        in: query
+        type: string
+        required: false
+        description: "csv (default) or ndjson"
+      - name: since_id
+        in: query
+        type: integer
+        required: false
+        description: "Only rows with a primary key greater than this value"
+      - name: since_date
+        in: query
+        type: string
+        required: false
+        description: "Only rows with a date (registration, release or purchase) on or after this ISO date"
+    responses:
+      200:
+        description: "Streamed export"
+      400:
+        description: "Unknown table, format or invalid watermark"
+    """
+    export_format = request.args.get('format', 'csv').lower()
+    try:
+        since_id = int(request.args['since_id']) if request.args.get('since_id') else None
+        since_date = datetime.fromisoformat(request.args['since_date']) if request.args.get('since_date') else None
+        chunks = ExportService.export(table, export_format, since_id, since_date)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    return Response(
+        stream_with_context(chunks),
+        mimetype=FORMATS[export_format],
+        headers={"Content-Disposition": f"attachment; filename={table}.{export_format}"},
+    )
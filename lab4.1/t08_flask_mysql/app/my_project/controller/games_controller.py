@@ -1,5 +1,10 @@
+from datetime import date
+
 from flask import Blueprint, request, jsonify
 from t08_flask_mysql.app.my_project.service.games_service import GamesService
+from t08_flask_mysql.app.my_project.list_query import parse_ids, parse_list_query
+from t08_flask_mysql.app.my_project.dao.optimistic import StaleVersionError, split_patch_body
+from t08_flask_mysql.app.my_project.deadlines import DeadlineExceeded
 
 games_bp = Blueprint('games', __name__)
 
@@ -11,6 +16,27 @@ def get_all_games():
     ---
     tags:
       - Games
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated IDs to fetch in one request, e.g. 1,2,3. Missing IDs are returned as null and listed in 'missing'"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated list of fields to return, e.g. GameID,GameName"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated sort fields, prefix '-' for descending, e.g. -ReleaseDate"
+      - name: filter
+        in: query
+        type: string
+        required: false
+        description: "Filters as filter[Field]=value or filter[Field][op]=value (op: eq, ne, gt, gte, lt, lte, in)"
     responses:
       200:
         description: "List of all games"
@@ -27,11 +53,31 @@ def get_all_games():
                 type: integer
               ReleaseDate:
                 type: string
+      400:
+        description: "Invalid fields, filter or sort"
     """
-    games = GamesService.get_all_games()
-    return jsonify(
-        [{"GameID": g.GameID, "GameName": g.GameName, "PublisherID": g.PublisherID, "ReleaseDate": g.ReleaseDate} for g
-         in games])
+    if 'ids' in request.args:
+        return _get_games_by_ids()
+
+    try:
+        list_query = parse_list_query(request.args, GamesService.list_fields())
+        games = GamesService.get_all_games(list_query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([g._asdict() for g in games])
+
+
+def _get_games_by_ids():
+    try:
+        ids = parse_ids(request.args['ids'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    games = GamesService.get_games_by_ids(ids)
+    return jsonify({
+        "items": [{"GameID": g.GameID, "GameName": g.GameName, "PublisherID": g.PublisherID, "ReleaseDate": g.ReleaseDate} if g else None for g in games],
+        "missing": [entity_id for entity_id, g in zip(ids, games) if g is None],
+    })
 
 
 @games_bp.route('/<int:game_id>', methods=['GET'])
@@ -61,13 +107,15 @@ def get_game_by_id(game_id):
               type: integer
             ReleaseDate:
               type: string
+            Version:
+              type: integer
       404:
         description: "Game not found"
     """
     game = GamesService.get_game_by_id(game_id)
     if game:
         return jsonify({"GameID": game.GameID, "GameName": game.GameName, "PublisherID": game.PublisherID,
-                        "ReleaseDate": game.ReleaseDate})
+                        "ReleaseDate": game.ReleaseDate, "Version": game.Version})
     return jsonify({"error": "Game not found"}), 404
 
 
@@ -111,7 +159,94 @@ def create_game():
     return jsonify({"GameID": game.GameID, "GameName": game.GameName, "PublisherID": game.PublisherID,
                     "ReleaseDate": game.ReleaseDate}), 201
 
+@games_bp.route('/<int:game_id>', methods=['PATCH'])
+def patch_game(game_id):
+    """
+    Partially update a game with optimistic concurrency control
+    ---
+    tags:
+      - Games
+    parameters:
+      - name: game_id
+        in: path
+        type: integer
+        required: true
+        description: "ID of the game"
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: "Current version of the game (alternative to Version in the body)"
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            Version:
+              type: integer
+            GameName:
+              type: string
+            PublisherID:
+              type: integer
+            ReleaseDate:
+              type: string
+    responses:
+      200:
+        description: "Game updated, returns the changed fields and the new version"
+      400:
+        description: "Missing version or invalid fields"
+      404:
+        description: "Game not found"
+      409:
+        description: "Version is stale, the game was changed concurrently"
+    """
+    try:
+        version, changes = split_patch_body(request.get_json(), request.headers.get('If-Match'), {"GameName", "PublisherID", "ReleaseDate"})
+        if isinstance(changes.get('ReleaseDate'), str):
+            changes['ReleaseDate'] = date.fromisoformat(changes['ReleaseDate'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        new_version = GamesService.patch_game(game_id, version, changes)
+    except StaleVersionError:
+        return jsonify({"error": "Game was modified concurrently", "Version": version}), 409
+    if new_version is None:
+        return jsonify({"error": "Game not found"}), 404
+    return jsonify({"GameID": game_id, **changes, "Version": new_version})
+
+
+@games_bp.route('/', methods=['DELETE'])
+def delete_games():
+    """
+    Delete several games by ID in one statement
+    ---
+    tags:
+      - Games
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: true
+        description: "Comma-separated IDs, e.g. 1,2,3"
+    responses:
+      200:
+        description: "Number of deleted games"
+      400:
+        description: "Invalid ids"
+      404:
+        description: "None of the games were found"
+    """
+    try:
+        ids = parse_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
 
+    deleted = GamesService.delete_games(ids)
+    if deleted:
+        return jsonify({"deleted": deleted})
+    return jsonify({"error": "No games found"}), 404
 
 
 @games_bp.route('/statistics', methods=['GET'])
@@ -167,5 +302,8 @@ def create_random_tables():
     try:
         GamesService.create_random_game_tables()
         return jsonify({"message": "Random tables created successfully."}), 201
+    except DeadlineExceeded:
+        # Обробник дедлайнів відповідає 504 — не ховати його під загальною помилкою
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
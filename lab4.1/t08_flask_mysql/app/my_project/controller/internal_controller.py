@@ -0,0 +1,187 @@
+from flask import Blueprint, Response, request, jsonify
+from t08_flask_mysql.app.my_project import profiler
+from t08_flask_mysql.app.my_project.bloom import get_bloom_filters
+from t08_flask_mysql.app.my_project.slow_queries import get_slow_query_log
+from t08_flask_mysql.app.my_project.statements import get_statement_stats, registered
+from t08_flask_mysql.app.my_project.admin import is_admin_request
+
+internal_bp = Blueprint('internal', __name__)
+
+
+@internal_bp.before_request
+def require_admin():
+    # Службові ендпоінти не видно без адмінського токена (X-Admin-Token)
+    if not is_admin_request():
+        return jsonify({"error": "Not found"}), 404
+    return None
+
+
+@internal_bp.route('/profiles', methods=['GET'])
+def get_profiles():
+    """
+    List saved request profiles, newest first
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: endpoint
+        in: query
+        type: string
+        required: false
+        description: "Only profiles of this endpoint, e.g. games.get_all_games"
+    responses:
+      200:
+        description: "Profiles grouped by route"
+      404:
+        description: "Missing or invalid admin token"
+    """
+    profiles = profiler.list_profiles(request.args.get('endpoint'))
+    by_route = {}
+    for profile in profiles:
+        by_route.setdefault(profile["endpoint"], []).append(profile)
+    return jsonify(by_route)
+
+
+@internal_bp.route('/profiles/<profile_id>', methods=['GET'])
+def get_profile(profile_id):
+    """
+    Top-N summary of a profile
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: profile_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: "Profile metadata with the functions that took the most samples"
+      404:
+        description: "Profile not found"
+    """
+    profile = profiler.load_profile(profile_id)
+    if profile:
+        return jsonify(profile)
+    return jsonify({"error": "Profile not found"}), 404
+
+
+@internal_bp.route('/profiles/<profile_id>/flamegraph', methods=['GET'])
+def get_profile_flamegraph(profile_id):
+    """
+    Collapsed stacks of a profile (input for flamegraph.pl or speedscope)
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: profile_id
+        in: path
+        type: string
+        required: true
+    responses:
+      200:
+        description: "One 'frame;frame;frame count' line per distinct stack"
+      404:
+        description: "Profile not found"
+    """
+    collapsed = profiler.load_collapsed(profile_id)
+    if collapsed is not None:
+        return Response(collapsed, mimetype="text/plain",
+                        headers={"Content-Disposition": f"attachment; filename={profile_id}.collapsed"})
+    return jsonify({"error": "Profile not found"}), 404
+
+
+@internal_bp.route('/slow-queries', methods=['GET'])
+def get_slow_queries():
+    """
+    Slow statements grouped by normalized SQL, with EXPLAIN plans and full-scan flags
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+      - name: flagged
+        in: query
+        type: boolean
+        required: false
+        description: "Only statement shapes whose plan has a full scan or no index use"
+    responses:
+      200:
+        description: "Statement shapes ordered by total time, plus the most recent slow statements"
+      404:
+        description: "Slow query log is disabled or admin token is missing"
+    """
+    log = get_slow_query_log()
+    if log is None:
+        return jsonify({"error": "Slow query log is disabled"}), 404
+    report = log.report()
+    if request.args.get('flagged', '').lower() in ('1', 'true', 'yes'):
+        report["shapes"] = [shape for shape in report["shapes"] if shape["flags"]]
+    return jsonify(report)
+
+
+@internal_bp.route('/statements', methods=['GET'])
+def get_statements():
+    """
+    Compiled-cache hit ratios of the prepared DAO statements
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      200:
+        description: "Hits, misses and hit ratio per prepared statement ('adhoc' aggregates all other SQL)"
+      404:
+        description: "Statement statistics are disabled or admin token is missing"
+    """
+    stats = get_statement_stats()
+    if stats is None:
+        return jsonify({"error": "Statement statistics are disabled"}), 404
+    return jsonify({
+        "hit_ratio": round(stats.hit_ratio(), 4),
+        "statements": stats.report(),
+        "registered": sorted(registered()),
+    })
+
+
+@internal_bp.route('/bloom', methods=['GET'])
+def get_bloom():
+    """
+    Size, fill and false-positive rates of the Bloom filters over emails, usernames and game names
+    ---
+    tags:
+      - Internal
+    parameters:
+      - name: X-Admin-Token
+        in: header
+        type: string
+        required: true
+    responses:
+      200:
+        description: "Per-filter memory, estimated and observed false-positive rate and lookup counters"
+      404:
+        description: "Bloom filters are disabled or admin token is missing"
+    """
+    filters = get_bloom_filters()
+    if filters is None:
+        return jsonify({"error": "Bloom filters are disabled"}), 404
+    return jsonify({"rebuilds": filters.rebuilds, "filters": filters.report()})
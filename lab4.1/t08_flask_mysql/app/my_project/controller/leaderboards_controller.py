@@ -0,0 +1,104 @@
+from flask import Blueprint, request, jsonify
+from t08_flask_mysql.app.my_project.service.leaderboard_service import (
+    DEFAULT_K, LeaderboardService, LeaderboardsDisabledError,
+)
+
+leaderboards_bp = Blueprint('leaderboards', __name__)
+
+
+def _top(board):
+    try:
+        top = LeaderboardService.get_top(
+            board, request.args.get('window', 'all'), request.args.get('k', DEFAULT_K, type=int)
+        )
+    except LeaderboardsDisabledError:
+        return jsonify({"error": "Leaderboards are disabled"}), 503
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify(top)
+
+
+@leaderboards_bp.route('/games', methods=['GET'])
+def get_top_games():
+    """
+    Most owned games, served from in-memory counters
+    ---
+    tags:
+      - Leaderboards
+    parameters:
+      - name: window
+        in: query
+        type: string
+        required: false
+        description: "all (default) or a sliding window from LEADERBOARD_WINDOWS, e.g. 24h (by purchase date)"
+      - name: k
+        in: query
+        type: integer
+        required: false
+        description: "Number of places to return (default 10, at most LEADERBOARD_MAX_K)"
+    responses:
+      200:
+        description: "Games ordered by number of owners"
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              Rank:
+                type: integer
+              GameID:
+                type: integer
+              GameName:
+                type: string
+              PublisherID:
+                type: integer
+              Owners:
+                type: integer
+      400:
+        description: "Invalid window or k"
+      503:
+        description: "Leaderboards are disabled"
+    """
+    return _top("games")
+
+
+@leaderboards_bp.route('/publishers', methods=['GET'])
+def get_top_publishers():
+    """
+    Top publishers by number of sold games, served from in-memory counters
+    ---
+    tags:
+      - Leaderboards
+    parameters:
+      - name: window
+        in: query
+        type: string
+        required: false
+        description: "all (default) or a sliding window from LEADERBOARD_WINDOWS, e.g. 24h (by purchase date)"
+      - name: k
+        in: query
+        type: integer
+        required: false
+        description: "Number of places to return (default 10, at most LEADERBOARD_MAX_K)"
+    responses:
+      200:
+        description: "Publishers ordered by sales"
+        schema:
+          type: array
+          items:
+            type: object
+            properties:
+              Rank:
+                type: integer
+              PublisherID:
+                type: integer
+              PublisherName:
+                type: string
+              Sales:
+                type: integer
+      400:
+        description: "Invalid window or k"
+      503:
+        description: "Leaderboards are disabled"
+    """
+    return _top("publishers")
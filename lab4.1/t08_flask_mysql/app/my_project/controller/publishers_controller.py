@@ -1,5 +1,8 @@
 from flask import Blueprint, request, jsonify
 from t08_flask_mysql.app.my_project.service.publishers_service import PublishersService
+from t08_flask_mysql.app.my_project.list_query import parse_ids, parse_list_query
+from t08_flask_mysql.app.my_project.dao.optimistic import StaleVersionError, split_patch_body
+from t08_flask_mysql.app.my_project.deadlines import DeadlineExceeded
 
 publishers_bp = Blueprint('publishers', __name__)
 
@@ -10,6 +13,27 @@ def get_all_publishers():
     ---
     tags:
       - Publishers
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated IDs to fetch in one request, e.g. 1,2,3. Missing IDs are returned as null and listed in 'missing'"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated list of fields to return, e.g. PublisherName"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated sort fields, prefix '-' for descending, e.g. PublisherName"
+      - name: filter
+        in: query
+        type: string
+        required: false
+        description: "Filters as filter[Field]=value or filter[Field][op]=value (op: eq, ne, gt, gte, lt, lte, in)"
     responses:
       200:
         description: "List of all publishers"
@@ -22,9 +46,31 @@ def get_all_publishers():
                 type: integer
               PublisherName:
                 type: string
+      400:
+        description: "Invalid fields, filter or sort"
     """
-    publishers = PublishersService.get_all_publishers()
-    return jsonify([{"PublisherID": p.PublisherID, "PublisherName": p.PublisherName} for p in publishers])
+    if 'ids' in request.args:
+        return _get_publishers_by_ids()
+
+    try:
+        list_query = parse_list_query(request.args, PublishersService.list_fields())
+        publishers = PublishersService.get_all_publishers(list_query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([p._asdict() for p in publishers])
+
+
+def _get_publishers_by_ids():
+    try:
+        ids = parse_ids(request.args['ids'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    publishers = PublishersService.get_publishers_by_ids(ids)
+    return jsonify({
+        "items": [{"PublisherID": p.PublisherID, "PublisherName": p.PublisherName} if p else None for p in publishers],
+        "missing": [entity_id for entity_id, p in zip(ids, publishers) if p is None],
+    })
 
 
 @publishers_bp.route('/<int:publisher_id>', methods=['GET'])
@@ -50,12 +96,15 @@ def get_publisher_by_id(publisher_id):
               type: integer
             PublisherName:
               type: string
+            Version:
+              type: integer
       404:
         description: "Publisher not found"
     """
     publisher = PublishersService.get_publisher_by_id(publisher_id)
     if publisher:
-        return jsonify({"PublisherID": publisher.PublisherID, "PublisherName": publisher.PublisherName})
+        return jsonify({"PublisherID": publisher.PublisherID, "PublisherName": publisher.PublisherName,
+                        "Version": publisher.Version})
     return jsonify({"error": "Publisher not found"}), 404
 
 
@@ -126,9 +175,8 @@ def update_publisher(publisher_id):
         description: "Publisher not found"
     """
     data = request.get_json()
-    publisher = PublishersService.update_publisher(publisher_id, data['PublisherName'])
-    if publisher:
-        return jsonify({"PublisherID": publisher.PublisherID, "PublisherName": publisher.PublisherName})
+    if PublishersService.update_publisher(publisher_id, data['PublisherName']):
+        return jsonify({"PublisherID": publisher_id, "PublisherName": data['PublisherName']})
     return jsonify({"error": "Publisher not found"}), 404
 
 
@@ -156,6 +204,90 @@ def delete_publisher(publisher_id):
         return jsonify({"message": "Publisher deleted"}), 204
     return jsonify({"error": "Publisher not found"}), 404
 
+@publishers_bp.route('/<int:publisher_id>', methods=['PATCH'])
+def patch_publisher(publisher_id):
+    """
+    Partially update a publisher with optimistic concurrency control
+    ---
+    tags:
+      - Publishers
+    parameters:
+      - name: publisher_id
+        in: path
+        type: integer
+        required: true
+        description: "ID of the publisher"
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: "Current version of the publisher (alternative to Version in the body)"
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            Version:
+              type: integer
+            PublisherName:
+              type: string
+    responses:
+      200:
+        description: "Publisher updated, returns the changed fields and the new version"
+      400:
+        description: "Missing version or invalid fields"
+      404:
+        description: "Publisher not found"
+      409:
+        description: "Version is stale, the publisher was changed concurrently"
+    """
+    try:
+        version, changes = split_patch_body(request.get_json(), request.headers.get('If-Match'), {"PublisherName"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        new_version = PublishersService.patch_publisher(publisher_id, version, changes)
+    except StaleVersionError:
+        return jsonify({"error": "Publisher was modified concurrently", "Version": version}), 409
+    if new_version is None:
+        return jsonify({"error": "Publisher not found"}), 404
+    return jsonify({"PublisherID": publisher_id, **changes, "Version": new_version})
+
+
+@publishers_bp.route('/', methods=['DELETE'])
+def delete_publishers():
+    """
+    Delete several publishers by ID in one statement
+    ---
+    tags:
+      - Publishers
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: true
+        description: "Comma-separated IDs, e.g. 1,2,3"
+    responses:
+      200:
+        description: "Number of deleted publishers"
+      400:
+        description: "Invalid ids"
+      404:
+        description: "None of the publishers were found"
+    """
+    try:
+        ids = parse_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    deleted = PublishersService.delete_publishers(ids)
+    if deleted:
+        return jsonify({"deleted": deleted})
+    return jsonify({"error": "No publishers found"}), 404
+
+
 
 @publishers_bp.route('/<int:publisher_id>/games', methods=['GET'])
 def get_games_by_publisher(publisher_id):
@@ -226,5 +358,8 @@ def create_noname_publishers():
     try:
         PublishersService.create_noname_publishers(start_num)
         return jsonify({"message": "Noname publishers created successfully"}), 201
+    except DeadlineExceeded:
+        # Обробник дедлайнів відповідає 504 — не ховати його під загальною помилкою
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 500
@@ -1,8 +1,16 @@
 from flask import Blueprint, request, jsonify
 from t08_flask_mysql.app.my_project.service.user_game_ownership_service import UserGameOwnershipService
+from t08_flask_mysql.app.my_project.list_query import parse_list_query
+from t08_flask_mysql.app.my_project.deadlines import DeadlineExceeded
 
 user_game_bp = Blueprint('user_game_ownership', __name__)
 
+
+def _include_archived():
+    # Архів старих покупок читається лише на явний запит
+    return request.args.get('include_archived', '').lower() in ('1', 'true', 'yes')
+
+
 @user_game_bp.route('/', methods=['GET'])
 def get_all_ownerships():
     """
@@ -10,6 +18,27 @@ def get_all_ownerships():
     ---
     tags:
       - UserGameOwnership
+    parameters:
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated list of fields to return, e.g. OwnershipID,GameName"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated sort fields, prefix '-' for descending, e.g. -PurchaseDate"
+      - name: filter
+        in: query
+        type: string
+        required: false
+        description: "Filters as filter[Field]=value or filter[Field][op]=value (op: eq, ne, gt, gte, lt, lte, in)"
+      - name: include_archived
+        in: query
+        type: boolean
+        required: false
+        description: "Also look in the archive of old purchases (slower)"
     responses:
       200:
         description: "List of all ownerships"
@@ -30,18 +59,15 @@ def get_all_ownerships():
                 type: string
               PurchaseDate:
                 type: string
+      400:
+        description: "Invalid fields, filter or sort"
     """
-    ownerships = UserGameOwnershipService.get_all_ownerships()
-    return jsonify([
-        {
-            "OwnershipID": o.OwnershipID,
-            "UserID": o.UserID,
-            "Username": o.user.Username,
-            "GameID": o.GameID,
-            "GameName": o.game.GameName,
-            "PurchaseDate": o.PurchaseDate
-        } for o in ownerships
-    ])
+    try:
+        list_query = parse_list_query(request.args, UserGameOwnershipService.list_fields())
+        ownerships = UserGameOwnershipService.get_all_ownerships(list_query, _include_archived())
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([o._asdict() for o in ownerships])
 
 
 @user_game_bp.route('/<int:ownership_id>', methods=['GET'])
@@ -57,6 +83,11 @@ def get_ownership_by_id(ownership_id):
         type: integer
         required: true
         description: "ID of the ownership"
+      - name: include_archived
+        in: query
+        type: boolean
+        required: false
+        description: "Also look in the archive of old purchases (slower)"
     responses:
       200:
         description: "Ownership found"
@@ -78,7 +109,7 @@ def get_ownership_by_id(ownership_id):
       404:
         description: "Ownership not found"
     """
-    ownership = UserGameOwnershipService.get_ownership_by_id(ownership_id)
+    ownership = UserGameOwnershipService.get_ownership_by_id(ownership_id, _include_archived())
     if ownership:
         return jsonify({
             "OwnershipID": ownership.OwnershipID,
@@ -129,11 +160,16 @@ def create_ownership():
               type: string
             PurchaseDate:
               type: string
+      400:
+        description: "User or game does not exist"
     """
     data = request.get_json()
-    ownership = UserGameOwnershipService.create_ownership(
-        data['UserID'], data['GameID'], data.get('PurchaseDate')
-    )
+    try:
+        ownership = UserGameOwnershipService.create_ownership(
+            data['UserID'], data['GameID'], data.get('PurchaseDate')
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     return jsonify({
         "OwnershipID": ownership.OwnershipID,
         "UserID": ownership.UserID,
@@ -157,13 +193,18 @@ def delete_ownership(ownership_id):
         type: integer
         required: true
         description: "ID of the ownership"
+      - name: include_archived
+        in: query
+        type: boolean
+        required: false
+        description: "Also look in the archive of old purchases (slower)"
     responses:
       204:
         description: "Ownership deleted"
       404:
         description: "Ownership not found"
     """
-    success = UserGameOwnershipService.delete_ownership(ownership_id)
+    success = UserGameOwnershipService.delete_ownership(ownership_id, _include_archived())
     if success:
         return jsonify({"message": "Ownership deleted"}), 204
     return jsonify({"error": "Ownership not found"}), 404
@@ -203,5 +244,8 @@ def link_user_to_game():
     try:
         UserGameOwnershipService.link_user_to_game(username, game_name)
         return jsonify({"message": f"User '{username}' linked to game '{game_name}'"}), 201
+    except DeadlineExceeded:
+        # Обробник дедлайнів відповідає 504 — не ховати його під загальною помилкою
+        raise
     except Exception as e:
         return jsonify({"error": str(e)}), 400
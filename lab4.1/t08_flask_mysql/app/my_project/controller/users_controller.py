@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from t08_flask_mysql.app.my_project.service.users_service import UsersService
+from t08_flask_mysql.app.my_project.list_query import parse_ids, parse_list_query
+from t08_flask_mysql.app.my_project.dao.optimistic import DuplicateValueError, StaleVersionError, split_patch_body
 
 users_bp = Blueprint('users', __name__)
 
@@ -10,6 +12,27 @@ def get_all_users():
     ---
     tags:
       - Users
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated IDs to fetch in one request, e.g. 1,2,3. Missing IDs are returned as null and listed in 'missing'"
+      - name: fields
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated list of fields to return, e.g. UserID,Username"
+      - name: sort
+        in: query
+        type: string
+        required: false
+        description: "Comma-separated sort fields, prefix '-' for descending, e.g. -RegistrationDate"
+      - name: filter
+        in: query
+        type: string
+        required: false
+        description: "Filters as filter[Field]=value or filter[Field][op]=value (op: eq, ne, gt, gte, lt, lte, in)"
     responses:
       200:
         description: "List of all users"
@@ -26,9 +49,32 @@ def get_all_users():
                 type: string
               PasswordHash:
                 type: string
+      400:
+        description: "Invalid fields, filter or sort"
     """
-    users = UsersService.get_all_users()
-    return jsonify([{"UserID": u.UserID, "Username": u.Username, "Email": u.Email, "PasswordHash": u.PasswordHash} for u in users])
+    if 'ids' in request.args:
+        return _get_users_by_ids()
+
+    try:
+        list_query = parse_list_query(request.args, UsersService.list_fields())
+        users = UsersService.get_all_users(list_query)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify([u._asdict() for u in users])
+
+
+def _get_users_by_ids():
+    try:
+        ids = parse_ids(request.args['ids'])
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    users = UsersService.get_users_by_ids(ids)
+    return jsonify({
+        "items": [{"UserID": u.UserID, "Username": u.Username, "Email": u.Email} if u else None for u in users],
+        "missing": [entity_id for entity_id, u in zip(ids, users) if u is None],
+    })
+
 
 @users_bp.route('/<int:user_id>', methods=['GET'])
 def get_user_by_id(user_id):
@@ -55,12 +101,14 @@ def get_user_by_id(user_id):
               type: string
             Email:
               type: string
+            Version:
+              type: integer
       404:
         description: "User not found"
     """
     user = UsersService.get_user_by_id(user_id)
     if user:
-        return jsonify({"UserID": user.UserID, "Username": user.Username, "Email": user.Email})
+        return jsonify({"UserID": user.UserID, "Username": user.Username, "Email": user.Email, "Version": user.Version})
     return jsonify({"error": "User not found"}), 404
 
 @users_bp.route('/', methods=['POST'])
@@ -95,7 +143,104 @@ def create_user():
               type: string
             Email:
               type: string
+      409:
+        description: "Email is already taken"
     """
     data = request.get_json()
-    user = UsersService.create_user(data['Username'], data['Email'], data['PasswordHash'])
+    try:
+        user = UsersService.create_user(data['Username'], data['Email'], data['PasswordHash'])
+    except DuplicateValueError as e:
+        return jsonify({"error": str(e)}), 409
     return jsonify({"UserID": user.UserID, "Username": user.Username, "Email": user.Email}), 201
+
+
+@users_bp.route('/<int:user_id>', methods=['PATCH'])
+def patch_user(user_id):
+    """
+    Partially update a user with optimistic concurrency control
+    ---
+    tags:
+      - Users
+    parameters:
+      - name: user_id
+        in: path
+        type: integer
+        required: true
+        description: "ID of the user"
+      - name: If-Match
+        in: header
+        type: string
+        required: false
+        description: "Current version of the user (alternative to Version in the body)"
+      - name: body
+        in: body
+        required: true
+        schema:
+          type: object
+          properties:
+            Version:
+              type: integer
+            Username:
+              type: string
+            Email:
+              type: string
+            PasswordHash:
+              type: string
+    responses:
+      200:
+        description: "User updated, returns the changed fields (except PasswordHash) and the new version"
+      400:
+        description: "Missing version or invalid fields"
+      404:
+        description: "User not found"
+      409:
+        description: "Version is stale (the user was changed concurrently) or Email is already taken"
+    """
+    try:
+        version, changes = split_patch_body(request.get_json(), request.headers.get('If-Match'), {"Username", "Email", "PasswordHash"})
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        new_version = UsersService.patch_user(user_id, version, changes)
+    except StaleVersionError:
+        return jsonify({"error": "User was modified concurrently", "Version": version}), 409
+    except DuplicateValueError as e:
+        return jsonify({"error": str(e)}), 409
+    if new_version is None:
+        return jsonify({"error": "User not found"}), 404
+    # PasswordHash не повертається, як і в GET /users/<id>
+    public = {field: value for field, value in changes.items() if field != "PasswordHash"}
+    return jsonify({"UserID": user_id, **public, "Version": new_version})
+
+
+@users_bp.route('/', methods=['DELETE'])
+def delete_users():
+    """
+    Delete several users by ID in one statement
+    ---
+    tags:
+      - Users
+    parameters:
+      - name: ids
+        in: query
+        type: string
+        required: true
+        description: "Comma-separated IDs, e.g. 1,2,3"
+    responses:
+      200:
+        description: "Number of deleted users"
+      400:
+        description: "Invalid ids"
+      404:
+        description: "None of the users were found"
+    """
+    try:
+        ids = parse_ids(request.args.get('ids', ''))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    deleted = UsersService.delete_users(ids)
+    if deleted:
+        return jsonify({"deleted": deleted})
+    return jsonify({"error": "No users found"}), 404
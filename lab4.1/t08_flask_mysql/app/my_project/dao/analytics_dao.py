@@ -0,0 +1,273 @@
+import heapq
+from collections import Counter, namedtuple
+from datetime import datetime
+from itertools import islice, takewhile
+
+from sqlalchemy import func, select, update
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project import unit_of_work
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, INSERT
+from t08_flask_mysql.app.my_project.domain.change_log import ChangeLog
+from t08_flask_mysql.app.my_project.domain.games import Game
+from t08_flask_mysql.app.my_project.domain.purchase_rollup import PurchaseDailyRollup, RollupWatermark
+from t08_flask_mysql.app.my_project.domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+from t08_flask_mysql.app.my_project.sharding import get_ownership_shards
+
+# LastID цього rollup-у — ChangeID журналу змін, а не OwnershipID (див. refresh_purchase_rollups)
+PURCHASES_ROLLUP = "purchases_daily_changes"
+PurchaseRow = namedtuple("PurchaseRow", ["OwnershipID", "GameID", "PurchaseDate", "PublisherID"])
+
+
+class AnalyticsDAO:
+    @staticmethod
+    def get_watermark(for_update=False):
+        """
+        ChangeID останньої врахованої події або None, якщо rollup-и ще не будувалися.
+        for_update блокує рядок, щоб оновлення rollup-ів і видалення покупок виконувались по черзі
+        """
+        stmt = select(RollupWatermark.LastID).where(RollupWatermark.Name == PURCHASES_ROLLUP)
+        if for_update:
+            stmt = stmt.with_for_update()
+        return db.session.execute(stmt).scalar()
+
+    @staticmethod
+    def refresh_purchase_rollups(batch_size, settled_before):
+        """
+        Інкрементально додає до rollup-ів покупки з подіями INSERT у журналі змін після watermark.
+        Журнал, а не OwnershipID: при шардуванні кожен процес видає ID зі свого блоку IdAllocator-а,
+        тож менший OwnershipID може закомітитися пізніше за більший. ChangeID теж видається до коміту,
+        тому watermark не заходить за першу подію, молодшу за settled_before: транзакція з меншим
+        ChangeID могла ще не закомітитися. Повертає кількість оброблених покупок
+        """
+        processed = 0
+        while True:
+            last_id = AnalyticsDAO.get_watermark(for_update=True)
+            if last_id is None or last_id < ChangeLogDAO.get_compacted_up_to():
+                # Rollup-и ще не будувалися або потрібні події вже видалені компактизацією
+                return processed + AnalyticsDAO.rebuild_purchase_rollups(batch_size, settled_before)
+            events = db.session.execute(
+                select(ChangeLog.ChangeID, ChangeLog.EntityID, ChangeLog.ChangedAt)
+                .where(ChangeLog.Entity == UserGameOwnership.__tablename__, ChangeLog.Operation == INSERT,
+                       ChangeLog.ChangeID > last_id)
+                .order_by(ChangeLog.ChangeID)
+                .limit(batch_size)
+            ).all()
+            settled = list(takewhile(lambda event: event.ChangedAt < settled_before, events))
+            if not settled:
+                break
+
+            # Compare-and-set watermark: якщо інший воркер уже обробив цю пачку, нічого не рахуємо двічі
+            moved = db.session.execute(
+                update(RollupWatermark)
+                .where(RollupWatermark.Name == PURCHASES_ROLLUP, RollupWatermark.LastID == last_id)
+                .values(LastID=settled[-1].ChangeID, UpdatedAt=datetime.now())
+            ).rowcount
+            if not moved:
+                break
+
+            # Покупки, видалені після події, вже не знайдуться — їх і не віднімали (див. record_deleted_purchases)
+            rows = AnalyticsDAO._purchases_by_id({event.EntityID for event in settled})
+            AnalyticsDAO._apply(*AnalyticsDAO._count(rows))
+            unit_of_work.complete()
+
+            processed += len(rows)
+            if len(settled) < batch_size:
+                break
+        return processed
+
+    @staticmethod
+    def rebuild_purchase_rollups(batch_size, settled_before):
+        """
+        Перераховує rollup-и повним проходом гарячої таблиці та архіву, а watermark ставить перед першою
+        подією журналу, молодшою за settled_before. Покупки з пізнішими подіями INSERT пропускаються —
+        їх додасть refresh
+        """
+        first_unsettled = db.session.execute(
+            select(func.min(ChangeLog.ChangeID)).where(ChangeLog.ChangedAt >= settled_before)
+        ).scalar()
+        last_id = first_unsettled - 1 if first_unsettled is not None else ChangeLogDAO.max_id(ChangeLog)
+        last_id = max(ChangeLogDAO.get_compacted_up_to(), last_id)
+        db.session.execute(PurchaseDailyRollup.__table__.delete())
+        AnalyticsDAO._set_watermark(last_id)
+        unit_of_work.complete()
+
+        processed = 0
+        after_id = 0
+        while True:
+            rows = AnalyticsDAO._purchases_after(after_id, batch_size)
+            if not rows:
+                break
+            after_id = rows[-1].OwnershipID
+            pending = AnalyticsDAO._pending({row.OwnershipID for row in rows}, last_id)
+            counted = [row for row in rows if row.OwnershipID not in pending]
+            AnalyticsDAO._apply(*AnalyticsDAO._count(counted))
+            unit_of_work.complete()
+
+            processed += len(counted)
+            if len(rows) < batch_size:
+                break
+        return processed + AnalyticsDAO.refresh_purchase_rollups(batch_size, settled_before)
+
+    @staticmethod
+    def _set_watermark(last_id):
+        moved = db.session.execute(
+            update(RollupWatermark)
+            .where(RollupWatermark.Name == PURCHASES_ROLLUP)
+            .values(LastID=last_id, UpdatedAt=datetime.now())
+        ).rowcount
+        if not moved:
+            db.session.add(RollupWatermark(Name=PURCHASES_ROLLUP, LastID=last_id, UpdatedAt=datetime.now()))
+
+    @staticmethod
+    def _pending(ownership_ids, last_id):
+        """
+        Покупки, чиї події INSERT новіші за watermark, — у rollup-ах їх ще немає
+        """
+        if not ownership_ids:
+            return set()
+        return set(db.session.execute(
+            select(ChangeLog.EntityID).where(
+                ChangeLog.Entity == UserGameOwnership.__tablename__, ChangeLog.Operation == INSERT,
+                ChangeLog.ChangeID > last_id, ChangeLog.EntityID.in_(ownership_ids),
+            )
+        ).scalars())
+
+    @staticmethod
+    def _count(rows):
+        counts = Counter()
+        publishers = {}
+        for row in rows:
+            if row.PurchaseDate is None:
+                continue
+            key = (row.PurchaseDate.date(), row.GameID)
+            counts[key] += 1
+            publishers[key] = row.PublisherID
+        return counts, publishers
+
+    @staticmethod
+    def _purchases_after(last_id, batch_size):
+        """
+        Наступні batch_size покупок після last_id з гарячої таблиці та архіву (для перебудови).
+        Видавець — з основної БД
+        """
+        shards = get_ownership_shards()
+        if shards is None:
+            streams = [
+                db.session.execute(
+                    select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                    .where(table.c.OwnershipID > last_id)
+                    .order_by(table.c.OwnershipID)
+                    .limit(batch_size)
+                ).all()
+                for table in (UserGameOwnership.__table__, UserGameOwnershipArchive.__table__)
+            ]
+        else:
+            streams = [
+                shards.scatter(
+                    select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                    .where(table.c.OwnershipID > last_id)
+                    .order_by(table.c.OwnershipID)
+                    .limit(batch_size),
+                    key=lambda row: row.OwnershipID,
+                )
+                for table in (shards.table, shards.archive_table)
+            ]
+        rows = list(islice(heapq.merge(*streams, key=lambda row: row.OwnershipID), batch_size))
+        return AnalyticsDAO._with_publishers(rows)
+
+    @staticmethod
+    def _purchases_by_id(ownership_ids):
+        """
+        Покупки за OwnershipID з гарячої таблиці та архіву (рядок міг уже переїхати в архів)
+        """
+        shards = get_ownership_shards()
+        if shards is None:
+            streams = [
+                db.session.execute(
+                    select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                    .where(table.c.OwnershipID.in_(ownership_ids))
+                ).all()
+                for table in (UserGameOwnership.__table__, UserGameOwnershipArchive.__table__)
+            ]
+        else:
+            streams = [
+                shards.scatter(
+                    select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                    .where(table.c.OwnershipID.in_(ownership_ids))
+                    .order_by(table.c.OwnershipID),
+                    key=lambda row: row.OwnershipID,
+                )
+                for table in (shards.table, shards.archive_table)
+            ]
+        found = {}
+        for stream in streams:
+            for row in stream:
+                found.setdefault(row.OwnershipID, row)
+        return AnalyticsDAO._with_publishers(list(found.values()))
+
+    @staticmethod
+    def _with_publishers(rows):
+        publishers = dict(db.session.execute(
+            select(Game.GameID, Game.PublisherID).where(Game.GameID.in_({row.GameID for row in rows}))
+        ).all()) if rows else {}
+        return [PurchaseRow(*row, publishers.get(row.GameID)) for row in rows]
+
+    @staticmethod
+    def record_deleted_purchases(rows):
+        """
+        Віднімає видалені покупки, які вже були враховані в rollup-ах: їхньої події INSERT
+        немає серед подій після watermark
+        """
+        last_id = AnalyticsDAO.get_watermark(for_update=True)
+        if last_id is None:
+            return
+        pending = AnalyticsDAO._pending({row.OwnershipID for row in rows}, last_id)
+        counts = Counter(
+            (row.PurchaseDate.date(), row.GameID)
+            for row in rows
+            if row.OwnershipID not in pending and row.PurchaseDate is not None
+        )
+        AnalyticsDAO._apply({key: -count for key, count in counts.items()}, {})
+
+    @staticmethod
+    def _apply(counts, publishers):
+        if not counts:
+            return
+        existing = {
+            (rollup.Day, rollup.GameID): rollup
+            for rollup in db.session.execute(
+                select(PurchaseDailyRollup).where(
+                    PurchaseDailyRollup.Day.in_({day for day, _ in counts}),
+                    PurchaseDailyRollup.GameID.in_({game_id for _, game_id in counts}),
+                )
+            ).scalars()
+        }
+        for (day, game_id), delta in counts.items():
+            rollup = existing.get((day, game_id))
+            if rollup is None:
+                db.session.add(PurchaseDailyRollup(Day=day, GameID=game_id,
+                                                   PublisherID=publishers.get((day, game_id)), Purchases=delta))
+            else:
+                rollup.Purchases += delta
+
+    @staticmethod
+    def get_daily_purchases(date_from=None, date_to=None, game_id=None, publisher_id=None, group_by=None):
+        group_columns = {
+            "game": [PurchaseDailyRollup.GameID],
+            "publisher": [PurchaseDailyRollup.PublisherID],
+        }.get(group_by, [])
+        stmt = (
+            select(PurchaseDailyRollup.Day, *group_columns, func.sum(PurchaseDailyRollup.Purchases).label("Purchases"))
+            .group_by(PurchaseDailyRollup.Day, *group_columns)
+            .order_by(PurchaseDailyRollup.Day, *group_columns)
+        )
+        if date_from is not None:
+            stmt = stmt.where(PurchaseDailyRollup.Day >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(PurchaseDailyRollup.Day <= date_to)
+        if game_id is not None:
+            stmt = stmt.where(PurchaseDailyRollup.GameID == game_id)
+        if publisher_id is not None:
+            stmt = stmt.where(PurchaseDailyRollup.PublisherID == publisher_id)
+        return db.session.execute(stmt).all()
@@ -0,0 +1,122 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import delete, func, inspect, select, update
+from sqlalchemy.orm import aliased
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project import unit_of_work
+from t08_flask_mysql.app.my_project.domain.change_log import ChangeLog
+from t08_flask_mysql.app.my_project.domain.purchase_rollup import RollupWatermark
+
+INSERT = "insert"
+UPDATE = "update"
+DELETE = "delete"
+# Найбільший ChangeID, видалений під час компактизації; старіші курсори вже не можна продовжити
+COMPACTED_WATERMARK = "change_log_compacted"
+COMPACT_CHUNK_SIZE = 1000
+
+
+class CursorExpiredError(Exception):
+    """
+    Події після курсора вже видалені компактизацією — клієнт має виконати повну синхронізацію
+    """
+
+    def __init__(self, cursor, compacted_up_to):
+        super().__init__(f"Cursor {cursor} is older than the retained change log (compacted up to {compacted_up_to})")
+        self.cursor = cursor
+        self.compacted_up_to = compacted_up_to
+
+
+class ChangeLogDAO:
+    @staticmethod
+    def record(model, operation, ids):
+        """
+        Додає події до поточної сесії — вони потрапляють у БД у тій самій транзакції, що й зміна
+        """
+        db.session.add_all(
+            ChangeLog(Entity=model.__tablename__, EntityID=entity_id, Operation=operation) for entity_id in ids
+        )
+
+    @staticmethod
+    def max_id(model):
+        pk = inspect(model).primary_key[0]
+        return db.session.execute(select(func.max(pk))).scalar() or 0
+
+    @staticmethod
+    def record_inserted_since(model, last_id):
+        """
+        Для збережених процедур, які не повертають ID: журналює рядки, що з'явилися після last_id
+        """
+        pk = inspect(model).primary_key[0]
+        ChangeLogDAO.record(model, INSERT, db.session.execute(select(pk).where(pk > last_id)).scalars().all())
+
+    @staticmethod
+    def get_compacted_up_to():
+        watermark = db.session.get(RollupWatermark, COMPACTED_WATERMARK)
+        return watermark.LastID if watermark else 0
+
+    @staticmethod
+    def get_changes(since, limit, settled_before, entity=None):
+        """
+        Події з ChangeID > since у порядку запису. Найсвіжіші (молодші за settled_before) не віддаються,
+        щоб транзакція з меншим ChangeID, яка ще не закомітилась, не була пропущена.
+        since=0 — від найстарішої збереженої події, навіть після компактизації
+        """
+        compacted_up_to = ChangeLogDAO.get_compacted_up_to()
+        if since and since < compacted_up_to:
+            raise CursorExpiredError(since, compacted_up_to)
+
+        stmt = (
+            select(ChangeLog)
+            .where(ChangeLog.ChangeID > since, ChangeLog.ChangedAt < settled_before)
+            .order_by(ChangeLog.ChangeID)
+            .limit(limit)
+        )
+        if entity is not None:
+            stmt = stmt.where(ChangeLog.Entity == entity)
+        return db.session.execute(stmt).scalars().all()
+
+    @staticmethod
+    def compact(retention_days, collapse=False):
+        """
+        Видаляє події, старші за retention_days, і (за потреби) усі, крім останньої, події кожного запису.
+        Повертає кількість видалених подій
+        """
+        removed = 0
+        expired_up_to = db.session.execute(
+            select(func.max(ChangeLog.ChangeID))
+            .where(ChangeLog.ChangedAt < datetime.now() - timedelta(days=retention_days))
+        ).scalar()
+        if expired_up_to is not None:
+            removed += db.session.execute(delete(ChangeLog).where(ChangeLog.ChangeID <= expired_up_to)).rowcount
+            ChangeLogDAO._advance_watermark(expired_up_to)
+            unit_of_work.complete()
+
+        if collapse:
+            newer = aliased(ChangeLog)
+            superseded = select(ChangeLog.ChangeID).where(
+                select(newer.ChangeID).where(
+                    newer.Entity == ChangeLog.Entity,
+                    newer.EntityID == ChangeLog.EntityID,
+                    newer.ChangeID > ChangeLog.ChangeID,
+                ).exists()
+            ).limit(COMPACT_CHUNK_SIZE)
+            while True:
+                ids = db.session.execute(superseded).scalars().all()
+                if not ids:
+                    break
+                removed += db.session.execute(delete(ChangeLog).where(ChangeLog.ChangeID.in_(ids))).rowcount
+                unit_of_work.complete()
+        return removed
+
+    @staticmethod
+    def _advance_watermark(change_id):
+        watermark = db.session.get(RollupWatermark, COMPACTED_WATERMARK)
+        if watermark is None:
+            db.session.add(RollupWatermark(Name=COMPACTED_WATERMARK, LastID=change_id, UpdatedAt=datetime.now()))
+        elif watermark.LastID < change_id:
+            db.session.execute(
+                update(RollupWatermark)
+                .where(RollupWatermark.Name == COMPACTED_WATERMARK)
+                .values(LastID=change_id, UpdatedAt=datetime.now())
+            )
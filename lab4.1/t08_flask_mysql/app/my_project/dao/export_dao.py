@@ -0,0 +1,51 @@
+from sqlalchemy import inspect, select
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project.domain.games import Game
+from t08_flask_mysql.app.my_project.domain.publisher import Publisher
+from t08_flask_mysql.app.my_project.domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+from t08_flask_mysql.app.my_project.domain.users import User
+from t08_flask_mysql.app.my_project.dao.sharded_ownership_dao import ShardedOwnershipDAO
+from t08_flask_mysql.app.my_project.sharding import get_ownership_shards
+
+
+class ExportDAO:
+    # Таблиці, доступні для експорту, та колонка дати для інкрементального експорту
+    TABLES = {
+        "users": (User, User.RegistrationDate),
+        "games": (Game, Game.ReleaseDate),
+        "publishers": (Publisher, None),
+        "user_game_ownership": (UserGameOwnership, UserGameOwnership.PurchaseDate),
+        "user_game_ownership_archive": (UserGameOwnershipArchive, UserGameOwnershipArchive.PurchaseDate),
+    }
+
+    @staticmethod
+    def get_columns(table):
+        model, _ = ExportDAO.TABLES[table]
+        return [column.key for column in inspect(model).columns]
+
+    @staticmethod
+    def stream_rows(table, chunk_size, since_id=None, since_date=None):
+        """
+        Потоково читає таблицю серверним курсором шматками по chunk_size рядків,
+        тож у пам'яті одночасно є лише один шматок
+        """
+        model, date_column = ExportDAO.TABLES[table]
+        if model in (UserGameOwnership, UserGameOwnershipArchive) and get_ownership_shards() is not None:
+            # Шарди читаються паралельними потоками, злитими за OwnershipID
+            yield from ShardedOwnershipDAO.stream_rows(chunk_size, since_id, since_date, ExportDAO.get_columns(table),
+                                                       archived=model is UserGameOwnershipArchive)
+            return
+        pk = inspect(model).primary_key[0]
+        stmt = select(*inspect(model).columns).order_by(pk)
+        if since_id is not None:
+            stmt = stmt.where(pk > since_id)
+        if since_date is not None:
+            stmt = stmt.where(date_column >= since_date)
+
+        result = db.session.execute(stmt.execution_options(yield_per=chunk_size))
+        try:
+            for partition in result.partitions():
+                yield partition
+        finally:
+            result.close()
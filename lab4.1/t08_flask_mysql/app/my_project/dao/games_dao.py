@@ -1,61 +1,91 @@
 from t08_flask_mysql.app.my_project.domain.games import Game
 from t08_flask_mysql.app.my_project.db import db
-from sqlalchemy import text
-from sqlalchemy import func
+from t08_flask_mysql.app.my_project import bloom, response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.list_query import build_select
+from t08_flask_mysql.app.my_project.statements import get_by_pk, prepared
+from t08_flask_mysql.app.my_project.dao.multi_get import get_many
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, INSERT
+from t08_flask_mysql.app.my_project.dao.optimistic import delete_entities, patch_entity, update_entity
+from sqlalchemy import bindparam, func, select, text
+
 class GamesDAO:
+    # Білий список полів для ?fields=, ?filter[...]= та ?sort=
+    LIST_COLUMNS = {
+        "GameID": Game.GameID,
+        "GameName": Game.GameName,
+        "PublisherID": Game.PublisherID,
+        "ReleaseDate": Game.ReleaseDate,
+        "Version": Game.Version,
+    }
+    DEFAULT_LIST_FIELDS = ["GameID", "GameName", "PublisherID", "ReleaseDate"]
+
+    # Готові параметризовані запити гарячих шляхів читання
+    DEFAULT_LIST = prepared("games.list", build_select(Game, LIST_COLUMNS, DEFAULT_LIST_FIELDS))
+    BY_ID = prepared("games.by_id", select(Game).where(Game.GameID == bindparam("id")))
+    NAME_STATISTICS = {
+        operation: prepared(f"games.name_{operation.lower()}", select(expression))
+        for operation, expression in (
+            ("MIN", func.min(func.length(Game.GameName))),
+            ("MAX", func.max(func.length(Game.GameName))),
+            ("AVG", func.avg(func.length(Game.GameName))),
+            ("COUNT", func.count(Game.GameName)),
+        )
+    }
+    CREATE_RANDOM_TABLES = prepared("games.create_random_game_tables", text("CALL create_random_game_tables()"))
+
     @staticmethod
-    def get_all_games():
-        return Game.query.all()
+    def get_all_games(list_query=None):
+        if list_query is None or list_query.is_default():
+            return db.session.execute(GamesDAO.DEFAULT_LIST).all()
+        stmt = build_select(Game, GamesDAO.LIST_COLUMNS, GamesDAO.DEFAULT_LIST_FIELDS, list_query)
+        return db.session.execute(stmt).all()
 
     @staticmethod
     def get_game_by_id(game_id):
-        return Game.query.get(game_id)
+        return get_by_pk(Game, GamesDAO.BY_ID, game_id)
+
+    @staticmethod
+    def get_games_by_ids(ids):
+        return get_many(Game, ids)
 
     @staticmethod
     def create_game(game_name, publisher_id, release_date):
         new_game = Game(GameName=game_name, PublisherID=publisher_id, ReleaseDate=release_date)
         db.session.add(new_game)
-        db.session.commit()
+        db.session.flush()
+        ChangeLogDAO.record(Game, INSERT, [new_game.GameID])
+        unit_of_work.complete()
+        response_cache.invalidate(Game.__tablename__)
+        bloom.add(Game.__tablename__, {"GameName": game_name})
         return new_game
 
     @staticmethod
     def update_game(game_id, game_name, publisher_id, release_date):
-        game = Game.query.get(game_id)
-        if game:
-            game.GameName = game_name
-            game.PublisherID = publisher_id
-            game.ReleaseDate = release_date
-            db.session.commit()
-            return game
-        return None
+        return update_entity(Game, game_id, {"GameName": game_name, "PublisherID": publisher_id,
+                                             "ReleaseDate": release_date})
+
+    @staticmethod
+    def patch_game(game_id, version, changes):
+        return patch_entity(Game, game_id, version, changes)
 
     @staticmethod
     def delete_game(game_id):
-        game = Game.query.get(game_id)
-        if game:
-            db.session.delete(game)
-            db.session.commit()
-            return True
-        return False
+        return delete_entities(Game, [game_id]) > 0
+
+    @staticmethod
+    def delete_games(ids):
+        return delete_entities(Game, ids)
 
     @staticmethod
     def get_game_name_statistics(operation):
-        valid_operations = {
-            'MIN': func.min(func.length(Game.GameName)),
-            'MAX': func.max(func.length(Game.GameName)),
-            'AVG': func.avg(func.length(Game.GameName)),
-            'COUNT': func.count(Game.GameName)
-        }
-
-        if operation.upper() not in valid_operations:
+        if operation.upper() not in GamesDAO.NAME_STATISTICS:
             raise ValueError(f"Invalid operation: {operation}. Use MIN, MAX, AVG, or COUNT.")
 
-        result = db.session.query(valid_operations[operation.upper()]).scalar()
+        result = db.session.execute(GamesDAO.NAME_STATISTICS[operation.upper()]).scalar()
         return result
 
     @staticmethod
     def execute_create_random_game_tables():
         # Викликаємо збережену процедуру
-        sql = text("CALL create_random_game_tables()")
-        db.session.execute(sql)
-        db.session.commit()
\ No newline at end of file
+        db.session.execute(GamesDAO.CREATE_RANDOM_TABLES)
+        unit_of_work.complete()
\ No newline at end of file
@@ -0,0 +1,55 @@
+import threading
+
+from flask import current_app
+from sqlalchemy import bindparam, inspect, select
+from sqlalchemy.orm.util import identity_key
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project.statements import prepared
+
+# Ключі конфігурації
+MULTI_GET_CHUNK_SIZE = "MULTI_GET_CHUNK_SIZE"
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Модель -> готовий SELECT ... WHERE id IN (:ids) з розгортанням списку під час виконання
+_by_ids = {}
+_by_ids_lock = threading.Lock()
+
+
+def _by_ids_statement(model):
+    statement = _by_ids.get(model)
+    if statement is None:
+        with _by_ids_lock:
+            statement = _by_ids.get(model)
+            if statement is None:
+                pk = inspect(model).primary_key[0]
+                statement = _by_ids[model] = prepared(f"{model.__tablename__}.by_ids",
+                                                      select(model).where(pk.in_(bindparam("ids", expanding=True))))
+    return statement
+
+
+def get_many(model, ids):
+    """
+    Завантажує сутності за списком ID одним SELECT ... WHERE id IN (...) на кожен шматок.
+    Об'єкти, що вже є в identity map сесії, беруться звідти без запиту до БД.
+    Повертає список у порядку запитаних ID, з None для відсутніх
+    """
+    pk = inspect(model).primary_key[0]
+    found = {}
+    to_load = []
+    for entity_id in dict.fromkeys(ids):
+        obj = db.session.identity_map.get(identity_key(model, entity_id))
+        if obj is not None and not inspect(obj).expired_attributes:
+            found[entity_id] = obj
+        else:
+            to_load.append(entity_id)
+
+    statement = _by_ids_statement(model)
+    chunk_size = current_app.config.get(MULTI_GET_CHUNK_SIZE, DEFAULT_CHUNK_SIZE)
+    for start in range(0, len(to_load), chunk_size):
+        chunk = to_load[start:start + chunk_size]
+        for obj in db.session.execute(statement, {"ids": chunk}).scalars():
+            found[getattr(obj, pk.key)] = obj
+
+    return [found.get(entity_id) for entity_id in ids]
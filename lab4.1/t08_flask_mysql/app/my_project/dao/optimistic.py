@@ -0,0 +1,105 @@
+from sqlalchemy import delete, inspect, select, update
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project import bloom, response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, DELETE, UPDATE
+
+
+class StaleVersionError(Exception):
+    """
+    Запис існує, але його версія вже змінилася (конкурентне оновлення)
+    """
+
+    def __init__(self, entity_id, version):
+        super().__init__(f"Version {version} of entity {entity_id} is stale")
+        self.entity_id = entity_id
+        self.version = version
+
+
+class DuplicateValueError(Exception):
+    """
+    Значення унікального поля вже зайняте іншим записом
+    """
+
+    def __init__(self, field, value):
+        super().__init__(f"{field} '{value}' is already taken")
+        self.field = field
+        self.value = value
+
+
+def split_patch_body(data, if_match, allowed_fields):
+    """
+    Відокремлює версію (поле Version або заголовок If-Match) від змінюваних полів PATCH-запиту
+    """
+    data = dict(data or {})
+    version = data.pop("Version", None)
+    if version is None and if_match:
+        version = if_match.strip().strip('"')
+    try:
+        version = int(version)
+    except (TypeError, ValueError):
+        raise ValueError("Version (or If-Match header) with the current entity version is required")
+
+    unknown = set(data) - set(allowed_fields)
+    if unknown:
+        raise ValueError(f"Fields cannot be patched: {', '.join(sorted(unknown))}")
+    if not data:
+        raise ValueError("Nothing to update")
+    return version, data
+
+
+def patch_entity(model, entity_id, version, changes):
+    """
+    Один UPDATE ... WHERE id = :id AND Version = :version.
+    Повертає нову версію, None — якщо запису немає, StaleVersionError — якщо версія застаріла
+    """
+    pk = inspect(model).primary_key[0]
+    result = db.session.execute(
+        update(model)
+        .where(pk == entity_id, model.Version == version)
+        .values(**changes, Version=model.Version + 1)
+    )
+    if result.rowcount:
+        ChangeLogDAO.record(model, UPDATE, [entity_id])
+        unit_of_work.complete()
+        response_cache.invalidate(model.__tablename__)
+        bloom.add(model.__tablename__, changes)
+        return version + 1
+
+    # Лише у разі невдачі з'ясовуємо, чи це 404, чи 409
+    if db.session.execute(select(pk).where(pk == entity_id)).first() is None:
+        return None
+    raise StaleVersionError(entity_id, version)
+
+
+def update_entity(model, entity_id, changes):
+    """
+    Безумовний UPDATE одним запитом (з інкрементом версії). Повертає True, якщо рядок оновлено
+    """
+    pk = inspect(model).primary_key[0]
+    result = db.session.execute(
+        update(model).where(pk == entity_id).values(**changes, Version=model.Version + 1)
+    )
+    if result.rowcount:
+        ChangeLogDAO.record(model, UPDATE, [entity_id])
+        unit_of_work.complete()
+        response_cache.invalidate(model.__tablename__)
+        bloom.add(model.__tablename__, changes)
+    return bool(result.rowcount)
+
+
+def delete_entities(model, ids):
+    """
+    DELETE ... WHERE id IN (...) одним запитом. Повертає кількість видалених рядків
+    """
+    pk = inspect(model).primary_key[0]
+    # Для журналу змін потрібні лише ID, що справді існують
+    existing = db.session.execute(select(pk).where(pk.in_(list(ids)))).scalars().all()
+    if not existing:
+        return 0
+    result = db.session.execute(delete(model).where(pk.in_(existing)))
+    if result.rowcount:
+        ChangeLogDAO.record(model, DELETE, existing)
+        unit_of_work.complete()
+        response_cache.invalidate(model.__tablename__)
+    return result.rowcount
@@ -1,43 +1,78 @@
 from t08_flask_mysql.app.my_project.domain.publisher import Publisher
 from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project import response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.list_query import build_select
+from t08_flask_mysql.app.my_project.statements import get_by_pk, prepared
+from t08_flask_mysql.app.my_project.dao.multi_get import get_many
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, INSERT, UPDATE
+from t08_flask_mysql.app.my_project.dao.optimistic import delete_entities, patch_entity, update_entity
+from t08_flask_mysql.app.my_project.domain.games import Game
+from sqlalchemy import bindparam, select, text, update
 
 class PublishersDAO:
+    # Білий список полів для ?fields=, ?filter[...]= та ?sort=
+    LIST_COLUMNS = {
+        "PublisherID": Publisher.PublisherID,
+        "PublisherName": Publisher.PublisherName,
+        "Version": Publisher.Version,
+    }
+    DEFAULT_LIST_FIELDS = ["PublisherID", "PublisherName"]
+
+    # Готові параметризовані запити гарячих шляхів читання
+    DEFAULT_LIST = prepared("publishers.list", build_select(Publisher, LIST_COLUMNS, DEFAULT_LIST_FIELDS))
+    BY_ID = prepared("publishers.by_id", select(Publisher).where(Publisher.PublisherID == bindparam("id")))
+    GAMES = prepared("publishers.games", select(Game).where(Game.PublisherID == bindparam("id")).order_by(Game.GameID))
+    INSERT_NONAME = prepared("publishers.insert_noname_publishers", text("CALL InsertNonamePublishers(:startNum)"))
+
     @staticmethod
-    def get_all_publishers():
-        return Publisher.query.all()
+    def get_all_publishers(list_query=None):
+        if list_query is None or list_query.is_default():
+            return db.session.execute(PublishersDAO.DEFAULT_LIST).all()
+        stmt = build_select(Publisher, PublishersDAO.LIST_COLUMNS, PublishersDAO.DEFAULT_LIST_FIELDS, list_query)
+        return db.session.execute(stmt).all()
 
     @staticmethod
     def get_publisher_by_id(publisher_id):
-        return Publisher.query.get(publisher_id)
+        return get_by_pk(Publisher, PublishersDAO.BY_ID, publisher_id)
+
+    @staticmethod
+    def get_publishers_by_ids(ids):
+        return get_many(Publisher, ids)
 
     @staticmethod
     def create_publisher(publisher_name):
         new_publisher = Publisher(PublisherName=publisher_name)
         db.session.add(new_publisher)
-        db.session.commit()
+        db.session.flush()
+        ChangeLogDAO.record(Publisher, INSERT, [new_publisher.PublisherID])
+        unit_of_work.complete()
+        response_cache.invalidate(Publisher.__tablename__)
         return new_publisher
 
     @staticmethod
     def update_publisher(publisher_id, publisher_name):
-        publisher = Publisher.query.get(publisher_id)
-        if publisher:
-            publisher.PublisherName = publisher_name
-            db.session.commit()
-            return publisher
-        return None
+        return update_entity(Publisher, publisher_id, {"PublisherName": publisher_name})
+
+    @staticmethod
+    def patch_publisher(publisher_id, version, changes):
+        return patch_entity(Publisher, publisher_id, version, changes)
 
     @staticmethod
     def delete_publisher(publisher_id):
-        publisher = Publisher.query.get(publisher_id)
-        if publisher:
-            db.session.delete(publisher)
-            db.session.commit()
-            return True
-        return False
+        return PublishersDAO.delete_publishers([publisher_id]) > 0
+
+    @staticmethod
+    def delete_publishers(ids):
+        # Як і раніше при session.delete(), ігри видаленого видавця залишаються без видавця
+        game_ids = db.session.execute(select(Game.GameID).where(Game.PublisherID.in_(list(ids)))).scalars().all()
+        if game_ids:
+            db.session.execute(
+                update(Game).where(Game.GameID.in_(game_ids)).values(PublisherID=None, Version=Game.Version + 1)
+            )
+            ChangeLogDAO.record(Game, UPDATE, game_ids)
+        return delete_entities(Publisher, ids)
 
     @staticmethod
     def get_games_by_publisher(publisher_id):
-        publisher = Publisher.query.get(publisher_id)
-        if publisher:
-            return publisher.games
-        return None
+        # Ігри одним запитом за PublisherID, без завантаження самого видавця та lazy-зв'язку
+        return db.session.execute(PublishersDAO.GAMES, {"id": publisher_id}).scalars().all()
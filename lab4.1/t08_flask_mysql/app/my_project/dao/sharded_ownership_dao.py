@@ -0,0 +1,300 @@
+from collections import defaultdict, namedtuple
+from datetime import datetime
+from itertools import islice
+
+from sqlalchemy import create_engine, select, true
+
+from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project import bloom, leaderboards, response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.archive import move_batch
+from t08_flask_mysql.app.my_project.domain.games import Game
+from t08_flask_mysql.app.my_project.domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+from t08_flask_mysql.app.my_project.domain.users import User
+from t08_flask_mysql.app.my_project.list_query import ListQuery, OPERATORS, _convert, build_select
+from t08_flask_mysql.app.my_project.sharding import get_ownership_shards, sort_key
+from t08_flask_mysql.app.my_project.dao.analytics_dao import AnalyticsDAO
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, DELETE, INSERT
+
+SHARD_FIELDS = ["OwnershipID", "UserID", "GameID", "PurchaseDate"]
+# Поля з основної БД: (колонка-назва, колонка-ключ, поле-ключ у шарді)
+JOINED_FIELDS = {
+    "Username": (User.Username, User.UserID, "UserID"),
+    "GameName": (Game.GameName, Game.GameID, "GameID"),
+}
+HYDRATE_CHUNK_SIZE = 500
+
+
+class ShardedOwnership:
+    """
+    Власність із шарду разом з користувачем і грою з основної БД — ті самі атрибути, що й у моделі
+    """
+    __slots__ = ("OwnershipID", "UserID", "GameID", "PurchaseDate", "user", "game")
+
+    def __init__(self, OwnershipID, UserID, GameID, PurchaseDate, user=None, game=None):
+        self.OwnershipID = OwnershipID
+        self.UserID = UserID
+        self.GameID = GameID
+        self.PurchaseDate = PurchaseDate
+        self.user = user
+        self.game = game
+
+
+class ShardedOwnershipDAO:
+    """
+    UserGameOwnership, розподілена між шардами за UserID (див. sharding.py). Запити одного
+    користувача йдуть в один шард, решта — у всі шарди зі злиттям відсортованих потоків
+    """
+
+    @staticmethod
+    def get_all_ownerships(list_query=None, default_fields=(), include_archived=False):
+        shards = get_ownership_shards()
+        table = shards.view if include_archived else shards.table
+        list_query = list_query or ListQuery()
+        fields = list_query.fields or list(default_fields)
+        columns = {name: table.c[name] for name in SHARD_FIELDS}
+
+        # Фільтри за полями основної БД перетворюються на фільтри за ID в шардах
+        filters = []
+        for name, op, raw in list_query.filters:
+            if name not in JOINED_FIELDS:
+                filters.append((name, op, raw))
+                continue
+            column, key_column, key_field = JOINED_FIELDS[name]
+            value = [_convert(column, item) for item in raw.split(",")] if op == "in" else _convert(column, raw)
+            ids = db.session.execute(select(key_column).where(OPERATORS[op](column, value))).scalars().all()
+            if not ids:
+                return []
+            filters.append((key_field, "in", ",".join(str(entity_id) for entity_id in ids)))
+
+        sort = []
+        for name, descending in list_query.sort:
+            if name in JOINED_FIELDS:
+                raise ValueError(f"Sorting by '{name}' is not supported for sharded ownerships")
+            sort.append((name, descending))
+        # Унікальний ключ в кінці — порядок злиття однаковий з порядком у кожному шарді
+        if not any(name == "OwnershipID" for name, _ in sort):
+            sort.append(("OwnershipID", False))
+
+        needed = set(fields) | {name for name, _ in sort}
+        needed |= {JOINED_FIELDS[name][2] for name in fields if name in JOINED_FIELDS}
+        shard_fields = [name for name in SHARD_FIELDS if name in needed]
+        stmt = build_select(table, columns, shard_fields, ListQuery(shard_fields, filters, sort))
+        merged = shards.scatter(
+            stmt, ShardedOwnershipDAO._route(shards, filters),
+            sort_key([(shard_fields.index(name), descending) for name, descending in sort]),
+        )
+
+        row_type = namedtuple("OwnershipRow", fields)
+        result = []
+        while True:
+            chunk = list(islice(merged, HYDRATE_CHUNK_SIZE))
+            if not chunk:
+                break
+            names = {name: ShardedOwnershipDAO._names(name, {getattr(row, JOINED_FIELDS[name][2]) for row in chunk})
+                     for name in fields if name in JOINED_FIELDS}
+            for row in chunk:
+                values = row._asdict()
+                # Як і INNER JOIN у нешардованому запиті: без користувача чи гри рядок не повертається
+                if any(values[JOINED_FIELDS[name][2]] not in found for name, found in names.items()):
+                    continue
+                for name, found in names.items():
+                    values[name] = found[values[JOINED_FIELDS[name][2]]]
+                result.append(row_type(*(values[name] for name in fields)))
+        return result
+
+    @staticmethod
+    def _route(shards, filters):
+        # filter[UserID]=... (eq / in) обмежує запит шардами цих користувачів
+        indexes = None
+        for name, op, raw in filters:
+            if name != "UserID" or op not in ("eq", "in"):
+                continue
+            user_ids = [int(item) for item in raw.split(",")] if op == "in" else [int(raw)]
+            routed = {shards.index_for(user_id) for user_id in user_ids}
+            indexes = routed if indexes is None else indexes & routed
+        return indexes
+
+    @staticmethod
+    def _names(name, ids):
+        column, key_column, _ = JOINED_FIELDS[name]
+        if not ids:
+            return {}
+        return dict(db.session.execute(select(key_column, column).where(key_column.in_(ids))).all())
+
+    @staticmethod
+    def _find(ownership_id, include_archived=False):
+        # За ID шард невідомий — перевіряємо шарди по черзі
+        shards = get_ownership_shards()
+        table = shards.view if include_archived else shards.table
+        stmt = select(table).where(table.c.OwnershipID == ownership_id)
+        for index, engine in enumerate(shards.engines):
+            with engine.connect() as conn:
+                row = conn.execute(stmt).first()
+            if row is not None:
+                return index, row
+        return None, None
+
+    @staticmethod
+    def get_ownership_by_id(ownership_id, include_archived=False):
+        _, row = ShardedOwnershipDAO._find(ownership_id, include_archived)
+        if row is None:
+            return None
+        return ShardedOwnership(**row._asdict(), user=db.session.get(User, row.UserID),
+                                game=db.session.get(Game, row.GameID))
+
+    @staticmethod
+    def create_ownership(user_id, game_id, purchase_date=None):
+        shards = get_ownership_shards()
+        # У шарді немає зовнішніх ключів на Users і Games — перевіряємо їх тут
+        row = db.session.execute(
+            select(User, Game).join(Game, true()).where(User.UserID == user_id, Game.GameID == game_id)
+        ).first()
+        if row is None:
+            raise ValueError(f"User {user_id} or game {game_id} does not exist")
+
+        ownership = ShardedOwnership(shards.allocator.next_id(), user_id, game_id,
+                                     purchase_date or datetime.now(), *row)
+        with shards.begin(shards.index_for(user_id)) as conn:
+            conn.execute(shards.table.insert().values(
+                OwnershipID=ownership.OwnershipID, UserID=user_id, GameID=game_id,
+                PurchaseDate=ownership.PurchaseDate,
+            ))
+        ChangeLogDAO.record(UserGameOwnership, INSERT, [ownership.OwnershipID])
+        unit_of_work.complete()
+        response_cache.invalidate(UserGameOwnership.__tablename__)
+        return ownership
+
+    @staticmethod
+    def delete_ownership(ownership_id, include_archived=False):
+        shards = get_ownership_shards()
+        index, row = ShardedOwnershipDAO._find(ownership_id, include_archived)
+        if row is None:
+            return False
+        AnalyticsDAO.record_deleted_purchases([row])
+        leaderboards.record_deleted([row])
+        tables = [shards.table, shards.archive_table] if include_archived else [shards.table]
+        deleted = 0
+        with shards.begin(index) as conn:
+            for table in tables:
+                deleted += conn.execute(table.delete().where(table.c.OwnershipID == ownership_id)).rowcount
+        if not deleted:
+            return False
+        ChangeLogDAO.record(UserGameOwnership, DELETE, [ownership_id])
+        unit_of_work.complete()
+        response_cache.invalidate(UserGameOwnership.__tablename__)
+        return True
+
+    @staticmethod
+    def link_user_to_game(username, game_name):
+        # Процедура LinkUserToGame пише в основну БД, тож для шардів зв'язок створюється тут
+        user_id = db.session.execute(select(User.UserID).where(User.Username == username)).scalar()
+        if user_id is None:
+            bloom.record_false_positive("users.username")
+            raise ValueError(f"User '{username}' not found")
+        game_id = db.session.execute(select(Game.GameID).where(Game.GameName == game_name)).scalar()
+        if game_id is None:
+            bloom.record_false_positive("games.name")
+            raise ValueError(f"Game '{game_name}' not found")
+        ShardedOwnershipDAO.create_ownership(user_id, game_id)
+
+    @staticmethod
+    def stream_rows(chunk_size, since_id=None, since_date=None, columns=None, archived=False):
+        """
+        Рядки всіх шардів (гарячі або, з archived, архівні) у порядку OwnershipID (злиття потоків),
+        шматками по chunk_size
+        """
+        shards = get_ownership_shards()
+        table = shards.archive_table if archived else shards.table
+        stmt = select(*(table.c[name] for name in columns or SHARD_FIELDS)).order_by(table.c.OwnershipID)
+        if since_id is not None:
+            stmt = stmt.where(table.c.OwnershipID > since_id)
+        if since_date is not None:
+            stmt = stmt.where(table.c.PurchaseDate >= since_date)
+        merged = shards.scatter(stmt, key=lambda row: row.OwnershipID, chunk_size=chunk_size)
+        while True:
+            chunk = list(islice(merged, chunk_size))
+            if not chunk:
+                return
+            yield chunk
+
+    @staticmethod
+    def archive_ownerships(cutoff, batch_size):
+        # Кожен шард архівує свої рядки окремо, транзакція на пачку
+        shards = get_ownership_shards()
+        moved = 0
+        for index in range(len(shards)):
+            while True:
+                with shards.begin(index) as conn:
+                    count = move_batch(conn, shards.table, shards.archive_table, cutoff, "PurchaseDate", batch_size)
+                if not count:
+                    break
+                moved += count
+        if moved:
+            response_cache.invalidate(UserGameOwnership.__tablename__)
+        return moved
+
+    @staticmethod
+    def reshard(from_main=False, retired=(), batch_size=1000):
+        """
+        Переносить рядки в шард, що відповідає їхньому UserID: після додавання шардів, із шардів,
+        що виводяться (retired — їхні URI), та з основної БД (from_main) після ввімкнення шардування.
+        Рядок спершу з'являється в цільовому шарді й лише потім видаляється з джерела, тож
+        перерваний перенос можна просто запустити ще раз. Повертає кількість перенесених рядків
+        """
+        shards = get_ownership_shards()
+        if shards is None:
+            raise ValueError("OWNERSHIP_SHARDS is not configured")
+
+        # (шард-джерело, engine, таблиця-джерело, таблиця в цільовому шарді)
+        tables = [(shards.table, shards.table), (shards.archive_table, shards.archive_table)]
+        retired_engines = [create_engine(uri) for uri in retired]
+        sources = [(index, engine) + pair for index, engine in enumerate(shards.engines) for pair in tables]
+        sources += [(None, engine) + pair for engine in retired_engines for pair in tables]
+        if from_main:
+            sources.append((None, db.engine, UserGameOwnership.__table__, shards.table))
+            sources.append((None, db.engine, UserGameOwnershipArchive.__table__, shards.archive_table))
+
+        moved = 0
+        try:
+            for source_index, engine, table, target_table in sources:
+                moved += ShardedOwnershipDAO._move_misplaced(shards, source_index, engine, table, target_table,
+                                                             batch_size)
+        finally:
+            for engine in retired_engines:
+                engine.dispose()
+        if moved:
+            response_cache.invalidate(UserGameOwnership.__tablename__)
+        return moved
+
+    @staticmethod
+    def _move_misplaced(shards, source_index, engine, table, target_table, batch_size):
+        moved = 0
+        last_id = 0
+        columns = [table.c[name] for name in SHARD_FIELDS]
+        while True:
+            with engine.connect() as conn:
+                rows = conn.execute(
+                    select(*columns).where(table.c.OwnershipID > last_id).order_by(table.c.OwnershipID).limit(batch_size)
+                ).all()
+            if not rows:
+                return moved
+            last_id = rows[-1].OwnershipID
+
+            targets = defaultdict(list)
+            for row in rows:
+                target = shards.index_for(row.UserID)
+                if target != source_index:
+                    targets[target].append(row)
+            for target, group in targets.items():
+                ids = [row.OwnershipID for row in group]
+                with shards.engines[target].begin() as conn:
+                    # Рядки, скопійовані перерваним попереднім запуском, не вставляємо вдруге
+                    existing = set(conn.execute(
+                        select(target_table.c.OwnershipID).where(target_table.c.OwnershipID.in_(ids))
+                    ).scalars())
+                    new_rows = [row._asdict() for row in group if row.OwnershipID not in existing]
+                    if new_rows:
+                        conn.execute(target_table.insert(), new_rows)
+                with engine.begin() as conn:
+                    conn.execute(table.delete().where(table.c.OwnershipID.in_(ids)))
+                moved += len(group)
@@ -1,37 +1,161 @@
-from t08_flask_mysql.app.my_project.domain.user_game_ownership import UserGameOwnership
+from t08_flask_mysql.app.my_project.domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+from t08_flask_mysql.app.my_project.domain.games import Game
+from t08_flask_mysql.app.my_project.domain.users import User
 from t08_flask_mysql.app.my_project.db import db
-from sqlalchemy import text
+from t08_flask_mysql.app.my_project import bloom, leaderboards, response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.archive import move_batch, union_view
+from t08_flask_mysql.app.my_project.list_query import build_select
+from t08_flask_mysql.app.my_project.statements import get_by_pk, prepared
+from t08_flask_mysql.app.my_project.dao.optimistic import delete_entities
+from t08_flask_mysql.app.my_project.dao.analytics_dao import AnalyticsDAO
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, DELETE, INSERT
+from t08_flask_mysql.app.my_project.dao.sharded_ownership_dao import ShardedOwnershipDAO
+from t08_flask_mysql.app.my_project.sharding import get_ownership_shards
+from sqlalchemy import bindparam, delete, select, text, true
 class UserGameOwnershipDAO:
+    # Білий список полів для ?fields=, ?filter[...]= та ?sort=
+    LIST_COLUMNS = {
+        "OwnershipID": UserGameOwnership.OwnershipID,
+        "UserID": UserGameOwnership.UserID,
+        "Username": User.Username,
+        "GameID": UserGameOwnership.GameID,
+        "GameName": Game.GameName,
+        "PurchaseDate": UserGameOwnership.PurchaseDate,
+    }
+    DEFAULT_LIST_FIELDS = ["OwnershipID", "UserID", "Username", "GameID", "GameName", "PurchaseDate"]
+    # Users та Games приєднуються лише тоді, коли їхні поля справді потрібні
+    LIST_JOINS = [
+        (User, User.UserID == UserGameOwnership.UserID, ["Username"]),
+        (Game, Game.GameID == UserGameOwnership.GameID, ["GameName"]),
+    ]
+
+    # Готові параметризовані запити гарячих шляхів читання
+    DEFAULT_LIST = prepared("user_game_ownership.list", build_select(
+        UserGameOwnership, LIST_COLUMNS, DEFAULT_LIST_FIELDS, joins=LIST_JOINS))
+    BY_ID = prepared("user_game_ownership.by_id",
+                     select(UserGameOwnership).where(UserGameOwnership.OwnershipID == bindparam("id")))
+    LINK_USER_TO_GAME = prepared("user_game_ownership.link_user_to_game",
+                                 text("CALL LinkUserToGame(:username, :game_name)"))
+
+    # View "гарячі + архівні покупки" — лише для запитів з include_archived
+    ALL = union_view("UserGameOwnershipAll", UserGameOwnership.__table__)
+    ALL_LIST_COLUMNS = dict(LIST_COLUMNS, OwnershipID=ALL.c.OwnershipID, UserID=ALL.c.UserID,
+                            GameID=ALL.c.GameID, PurchaseDate=ALL.c.PurchaseDate)
+    ALL_LIST_JOINS = [
+        (User, User.UserID == ALL.c.UserID, ["Username"]),
+        (Game, Game.GameID == ALL.c.GameID, ["GameName"]),
+    ]
+
     @staticmethod
-    def get_all_ownerships():
-        return UserGameOwnership.query.all()
+    def get_all_ownerships(list_query=None, include_archived=False):
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.get_all_ownerships(list_query, UserGameOwnershipDAO.DEFAULT_LIST_FIELDS,
+                                                          include_archived)
+        if include_archived:
+            stmt = build_select(UserGameOwnershipDAO.ALL, UserGameOwnershipDAO.ALL_LIST_COLUMNS,
+                                UserGameOwnershipDAO.DEFAULT_LIST_FIELDS, list_query,
+                                UserGameOwnershipDAO.ALL_LIST_JOINS)
+            return db.session.execute(stmt).all()
+        if list_query is None or list_query.is_default():
+            return db.session.execute(UserGameOwnershipDAO.DEFAULT_LIST).all()
+        stmt = build_select(UserGameOwnership, UserGameOwnershipDAO.LIST_COLUMNS,
+                            UserGameOwnershipDAO.DEFAULT_LIST_FIELDS, list_query, UserGameOwnershipDAO.LIST_JOINS)
+        return db.session.execute(stmt).all()
 
     @staticmethod
-    def get_ownership_by_id(ownership_id):
-        return UserGameOwnership.query.get(ownership_id)
+    def get_ownership_by_id(ownership_id, include_archived=False):
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.get_ownership_by_id(ownership_id, include_archived)
+        ownership = get_by_pk(UserGameOwnership, UserGameOwnershipDAO.BY_ID, ownership_id)
+        if ownership is None and include_archived:
+            ownership = db.session.get(UserGameOwnershipArchive, ownership_id)
+        return ownership
 
     @staticmethod
     def create_ownership(user_id, game_id, purchase_date=None):
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.create_ownership(user_id, game_id, purchase_date)
         new_ownership = UserGameOwnership(UserID=user_id, GameID=game_id, PurchaseDate=purchase_date)
+        # Користувач і гра потрібні для відповіді — завантажуємо обох одним SELECT, а не двома lazy-запитами
+        row = db.session.execute(
+            select(User, Game).join(Game, true()).where(User.UserID == user_id, Game.GameID == game_id)
+        ).first()
+        if row:
+            new_ownership.user, new_ownership.game = row
         db.session.add(new_ownership)
-        db.session.commit()
+        db.session.flush()
+        ChangeLogDAO.record(UserGameOwnership, INSERT, [new_ownership.OwnershipID])
+        unit_of_work.complete()
+        response_cache.invalidate(UserGameOwnership.__tablename__)
         return new_ownership
 
     @staticmethod
-    def delete_ownership(ownership_id):
-        ownership = UserGameOwnership.query.get(ownership_id)
-        if ownership:
-            db.session.delete(ownership)
-            db.session.commit()
-            return True
-        return False
+    def delete_ownership(ownership_id, include_archived=False):
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.delete_ownership(ownership_id, include_archived)
+        # Дата та гра видаленої покупки потрібні, щоб відняти її з rollup-ів аналітики
+        rows = db.session.execute(
+            select(UserGameOwnership.OwnershipID, UserGameOwnership.GameID, UserGameOwnership.PurchaseDate)
+            .where(UserGameOwnership.OwnershipID == ownership_id)
+        ).all()
+        if rows:
+            AnalyticsDAO.record_deleted_purchases(rows)
+            leaderboards.record_deleted(rows)
+            return delete_entities(UserGameOwnership, [ownership_id]) > 0
+        if not include_archived:
+            return False
+
+        archived = db.session.get(UserGameOwnershipArchive, ownership_id)
+        if archived is None:
+            return False
+        AnalyticsDAO.record_deleted_purchases([archived])
+        leaderboards.record_deleted([archived])
+        db.session.execute(delete(UserGameOwnershipArchive).where(UserGameOwnershipArchive.OwnershipID == ownership_id))
+        # Для клієнтів стрічки змін архів — та сама сутність UserGameOwnership
+        ChangeLogDAO.record(UserGameOwnership, DELETE, [ownership_id])
+        unit_of_work.complete()
+        response_cache.invalidate(UserGameOwnership.__tablename__)
+        return True
 
     @staticmethod
     def link_user_to_game(username, game_name):
-        sql = text("CALL LinkUserToGame(:username, :game_name)")
-        db.session.execute(sql, {'username': username, 'game_name': game_name})
-        db.session.commit()
-
+        # "Точно немає" від фільтра Блума не є підставою відмовити: рядок іншого воркера може бути
+        # ще не синхронізований у фільтр, тож промах підтверджуємо запитом до БД
+        if not bloom.might_contain("users.username", username):
+            if not UserGameOwnershipDAO._exists(User.Username, username):
+                raise ValueError(f"User '{username}' not found")
+        if not bloom.might_contain("games.name", game_name):
+            if not UserGameOwnershipDAO._exists(Game.GameName, game_name):
+                raise ValueError(f"Game '{game_name}' not found")
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.link_user_to_game(username, game_name)
+        last_id = ChangeLogDAO.max_id(UserGameOwnership)
+        db.session.execute(UserGameOwnershipDAO.LINK_USER_TO_GAME, {'username': username, 'game_name': game_name})
+        ChangeLogDAO.record_inserted_since(UserGameOwnership, last_id)
+        unit_of_work.complete()
+        response_cache.invalidate(UserGameOwnership.__tablename__)
 
+    @staticmethod
+    def _exists(column, value):
+        return db.session.execute(select(column).where(column == value).limit(1)).first() is not None
 
+    @staticmethod
+    def archive_ownerships(cutoff, batch_size):
+        """
+        Переносить покупки, старші за cutoff, в архів пачками по batch_size рядків (транзакція на пачку).
+        Це не видалення: у стрічку змін і rollup-и аналітики нічого не пишеться. Повертає кількість рядків
+        """
+        if get_ownership_shards() is not None:
+            return ShardedOwnershipDAO.archive_ownerships(cutoff, batch_size)
+        moved = 0
+        while True:
+            count = move_batch(db.session, UserGameOwnership.__table__, UserGameOwnershipArchive.__table__,
+                               cutoff, "PurchaseDate", batch_size)
+            if not count:
+                break
+            unit_of_work.complete()
+            moved += count
+        if moved:
+            response_cache.invalidate(UserGameOwnership.__tablename__)
+        return moved
 
@@ -1,45 +1,105 @@
 from t08_flask_mysql.app.my_project.domain.users import User
 from t08_flask_mysql.app.my_project.db import db
-from sqlalchemy import text
+from t08_flask_mysql.app.my_project import bloom, response_cache, unit_of_work
+from t08_flask_mysql.app.my_project.list_query import build_select
+from t08_flask_mysql.app.my_project.statements import get_by_pk, prepared
+from t08_flask_mysql.app.my_project.dao.multi_get import get_many
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO, INSERT
+from t08_flask_mysql.app.my_project.dao.optimistic import DuplicateValueError, delete_entities, patch_entity, update_entity
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.exc import IntegrityError
 
 class UsersDAO:
+    # Білий список полів для ?fields=, ?filter[...]= та ?sort=
+    LIST_COLUMNS = {
+        "UserID": User.UserID,
+        "Username": User.Username,
+        "Email": User.Email,
+        "PasswordHash": User.PasswordHash,
+        "RegistrationDate": User.RegistrationDate,
+        "Version": User.Version,
+    }
+    DEFAULT_LIST_FIELDS = ["UserID", "Username", "Email", "PasswordHash"]
+
+    # Готові параметризовані запити гарячих шляхів читання
+    DEFAULT_LIST = prepared("users.list", build_select(User, LIST_COLUMNS, DEFAULT_LIST_FIELDS))
+    BY_ID = prepared("users.by_id", select(User).where(User.UserID == bindparam("id")))
+    INSERT_USER = prepared("users.insert_user", text("CALL InsertUser(:username, :email, :passwordHash)"))
+    EMAIL_EXISTS = prepared("users.email_exists", select(User.UserID).where(User.Email == bindparam("email")))
+
     @staticmethod
-    def get_all_users():
-        return User.query.all()
+    def get_all_users(list_query=None):
+        if list_query is None or list_query.is_default():
+            return db.session.execute(UsersDAO.DEFAULT_LIST).all()
+        stmt = build_select(User, UsersDAO.LIST_COLUMNS, UsersDAO.DEFAULT_LIST_FIELDS, list_query)
+        return db.session.execute(stmt).all()
 
     @staticmethod
     def get_user_by_id(user_id):
-        return User.query.get(user_id)
+        return get_by_pk(User, UsersDAO.BY_ID, user_id)
+
+    @staticmethod
+    def get_users_by_ids(ids):
+        return get_many(User, ids)
+
+    @staticmethod
+    def check_email_free(email, user_id=None):
+        """
+        Email, зайнятий іншим користувачем (не user_id), — DuplicateValueError.
+        Якщо фільтр Блума каже "точно немає", запиту до БД не буде
+        """
+        if not bloom.might_contain("users.email", email):
+            return
+        row = db.session.execute(UsersDAO.EMAIL_EXISTS, {"email": email}).first()
+        if row is None:
+            bloom.record_false_positive("users.email")
+        elif row.UserID != user_id:
+            raise DuplicateValueError("Email", email)
 
     @staticmethod
     def create_user(username, email, password_hash):
+        UsersDAO.check_email_free(email)
         new_user = User(Username=username, Email=email, PasswordHash=password_hash)
         db.session.add(new_user)
-        db.session.commit()
+        try:
+            db.session.flush()
+        except IntegrityError:
+            # Фільтр Блума ще не бачив Email (інший воркер, паралельний запит) — 409, а не 500
+            raise DuplicateValueError("Email", email)
+        ChangeLogDAO.record(User, INSERT, [new_user.UserID])
+        unit_of_work.complete()
+        response_cache.invalidate(User.__tablename__)
+        bloom.add(User.__tablename__, {"Username": username, "Email": email})
         return new_user
 
     @staticmethod
     def update_user(user_id, username, email, password_hash):
-        user = User.query.get(user_id)
-        if user:
-            user.Username = username
-            user.Email = email
-            user.PasswordHash = password_hash
-            db.session.commit()
-            return user
-        return None
+        return update_entity(User, user_id, {"Username": username, "Email": email, "PasswordHash": password_hash})
+
+    @staticmethod
+    def patch_user(user_id, version, changes):
+        if "Email" in changes:
+            UsersDAO.check_email_free(changes["Email"], user_id)
+        try:
+            return patch_entity(User, user_id, version, changes)
+        except IntegrityError:
+            # Email зайняли паралельно між перевіркою та UPDATE — UNIQUE-обмеження в Users лише на Email
+            raise DuplicateValueError("Email", changes.get("Email"))
 
     @staticmethod
     def delete_user(user_id):
-        user = User.query.get(user_id)
-        if user:
-            db.session.delete(user)
-            db.session.commit()
-            return True
-        return False
+        return delete_entities(User, [user_id]) > 0
+
+    @staticmethod
+    def delete_users(ids):
+        return delete_entities(User, ids)
 
     @staticmethod
     def create_user_via_procedure(username, email, password_hash):
-        sql = text("CALL InsertUser(:username, :email, :passwordHash)")
-        db.session.execute(sql, {"username": username, "email": email, "passwordHash": password_hash})
-        db.session.commit()
\ No newline at end of file
+        UsersDAO.check_email_free(email)
+        last_id = ChangeLogDAO.max_id(User)
+        db.session.execute(UsersDAO.INSERT_USER, {"username": username, "email": email, "passwordHash": password_hash})
+        ChangeLogDAO.record_inserted_since(User, last_id)
+        unit_of_work.complete()
+        response_cache.invalidate(User.__tablename__)
+        bloom.add(User.__tablename__, {"Username": username, "Email": email})
@@ -1,2 +1,3 @@
 from flask_sqlalchemy import SQLAlchemy
-db = SQLAlchemy()
\ No newline at end of file
+# expire_on_commit=False: після коміту об'єкти не перечитуються з БД під час серіалізації відповіді
+db = SQLAlchemy(session_options={"expire_on_commit": False})
@@ -0,0 +1,152 @@
+import threading
+import time
+from typing import Optional
+
+from flask import Flask, current_app, g, has_request_context, jsonify, request
+
+# Ключі конфігурації
+DEADLINE_ENABLED = "DEADLINE_ENABLED"
+DEADLINE_DEFAULT_MS = "DEADLINE_DEFAULT_MS"
+DEADLINE_ROUTE_BUDGETS = "DEADLINE_ROUTE_BUDGETS"
+
+DEFAULT_BUDGET_MS = 15000
+# Як часто (у віртуальних інструкціях SQLite) перевіряти, чи не минув дедлайн
+SQLITE_PROGRESS_OPS = 1000
+EXEMPT_ENDPOINTS = {"metrics", "static"}
+
+
+class DeadlineExceeded(Exception):
+    """
+    Бюджет часу запиту вичерпано — запит до БД скасовано або не розпочато
+    """
+
+
+def init_deadlines(app: Flask) -> None:
+    """
+    Кожен маршрут отримує бюджет часу; залишок застосовується до кожного запиту до БД
+    (MAX_EXECUTION_TIME / KILL QUERY у MySQL, progress handler у SQLite). Прострочені запити — 504
+    """
+    if not app.config.get(DEADLINE_ENABLED, True):
+        return
+
+    from sqlalchemy import event
+
+    from .db import db
+    from .sharding import shard_engines
+
+    app.extensions["deadlines"] = {"exceeded": 0}
+
+    with app.app_context():
+        engines = list(db.engines.values()) + shard_engines(app)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute, retval=True)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+        event.listen(engine, "handle_error", _handle_error)
+
+    from .metrics import register_counter
+
+    register_counter(app, "deadline_exceeded_total", "Requests cancelled because their time budget ran out",
+                     lambda: app.extensions["deadlines"]["exceeded"])
+
+    app.before_request(_start)
+    app.register_error_handler(DeadlineExceeded, _deadline_response)
+
+
+def _start() -> None:
+    if request.endpoint is None or request.endpoint in EXEMPT_ENDPOINTS:
+        return
+    budgets = current_app.config.get(DEADLINE_ROUTE_BUDGETS) or {}
+    budget_ms = budgets.get(request.endpoint, current_app.config.get(DEADLINE_DEFAULT_MS, DEFAULT_BUDGET_MS))
+    # Бюджет 0 (наприклад, для потокового експорту) — без дедлайну
+    if budget_ms:
+        deadline = time.monotonic() + budget_ms / 1000.0
+        # Вкладений запит (batch) не може жити довше за зовнішній
+        outer = g.get("deadline")
+        g.deadline = min(deadline, outer) if outer is not None else deadline
+
+
+def remaining() -> Optional[float]:
+    """
+    Скільки секунд лишилося до дедлайну поточного запиту (None — дедлайну немає)
+    """
+    if not has_request_context():
+        return None
+    deadline = g.get("deadline")
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def _exceeded() -> DeadlineExceeded:
+    current_app.extensions["deadlines"]["exceeded"] += 1
+    return DeadlineExceeded("Request deadline exceeded")
+
+
+def _deadline_response(error: DeadlineExceeded):
+    return jsonify({"error": "Request deadline exceeded"}), 504
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    left = remaining()
+    if left is None:
+        return statement, parameters
+    if left <= 0:
+        raise _exceeded()
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        dbapi_connection = conn.connection.dbapi_connection
+        deadline = time.monotonic() + left
+        # Ненульове значення з обробника перериває запит (sqlite3.OperationalError: interrupted)
+        dbapi_connection.set_progress_handler(lambda: time.monotonic() > deadline, SQLITE_PROGRESS_OPS)
+        conn.info["deadline_guard"] = dbapi_connection
+    elif dialect == "mysql":
+        stripped = statement.lstrip()
+        if stripped[:6].upper() == "SELECT":
+            # Сервер сам зупинить SELECT, щойно мине залишок бюджету
+            statement = f"SELECT /*+ MAX_EXECUTION_TIME({max(1, int(left * 1000))}) */{stripped[6:]}"
+        else:
+            # CALL та DML підказку ігнорують — їх перериває KILL QUERY з окремого з'єднання
+            timer = threading.Timer(left, _kill_query, (conn.engine, conn.connection.dbapi_connection.thread_id(),
+                                                        conn.info))
+            timer.daemon = True
+            timer.start()
+            conn.info["deadline_guard"] = timer
+    return statement, parameters
+
+
+def _kill_query(engine, thread_id: int, info: dict) -> None:
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    killer = engine.dialect.connect(*cargs, **cparams)
+    try:
+        cursor = killer.cursor()
+        cursor.execute(f"KILL QUERY {int(thread_id)}")
+        cursor.close()
+        info["deadline_killed"] = True
+    finally:
+        killer.close()
+
+
+def _clear_guard(conn) -> None:
+    guard = conn.info.pop("deadline_guard", None)
+    if guard is None:
+        return
+    if isinstance(guard, threading.Timer):
+        guard.cancel()
+    else:
+        guard.set_progress_handler(None, 0)
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _clear_guard(conn)
+    conn.info.pop("deadline_killed", None)
+
+
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    killed = False
+    if conn is not None:
+        _clear_guard(conn)
+        killed = conn.info.pop("deadline_killed", False)
+    left = remaining()
+    if killed or (left is not None and left <= 0):
+        # Транзакцію відкотить unit of work (504), тож з'єднання повернеться в пул чистим
+        raise _exceeded() from exception_context.original_exception
@@ -0,0 +1,15 @@
+from datetime import datetime
+
+from t08_flask_mysql.app.my_project.db import db
+
+class ChangeLog(db.Model):
+    __tablename__ = 'ChangeLog'
+
+    # Курсор стрічки змін: монотонно зростає в порядку запису
+    ChangeID = db.Column(db.BigInteger().with_variant(db.Integer, "sqlite"), primary_key=True)
+    Entity = db.Column(db.String(50), nullable=False)
+    EntityID = db.Column(db.Integer, nullable=False)
+    Operation = db.Column(db.String(10), nullable=False)
+    ChangedAt = db.Column(db.DateTime, nullable=False, default=datetime.now, index=True)
+
+    __table_args__ = (db.Index('ix_ChangeLog_Entity_EntityID', 'Entity', 'EntityID'),)
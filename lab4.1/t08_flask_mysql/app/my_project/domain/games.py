@@ -7,6 +7,10 @@ class Game(db.Model):
     GameName = db.Column(db.String(100), nullable=False)
     PublisherID = db.Column(db.Integer, db.ForeignKey('Publishers.PublisherID'), nullable=True)
     ReleaseDate = db.Column(db.Date)
+    # Версія для оптимістичного блокування (PATCH з перевіркою версії)
+    Version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": Version}
 
     # Відношення до таблиці Publishers
     publisher = db.relationship('Publisher', back_populates='games')
@@ -0,0 +1,8 @@
+from t08_flask_mysql.app.my_project.db import db
+
+class IdSequence(db.Model):
+    __tablename__ = 'IdSequences'
+
+    # Назва послідовності та перший ще не виданий ID (видається блоками)
+    Name = db.Column(db.String(50), primary_key=True)
+    NextID = db.Column(db.BigInteger, nullable=False)
@@ -5,6 +5,10 @@ class Publisher(db.Model):
 
     PublisherID = db.Column(db.Integer, primary_key=True)
     PublisherName = db.Column(db.String(100), nullable=False)
+    # Версія для оптимістичного блокування (PATCH з перевіркою версії)
+    Version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": Version}
 
     # Відношення до таблиці Games
     games = db.relationship('Game', back_populates='publisher', lazy=True)
@@ -0,0 +1,18 @@
+from t08_flask_mysql.app.my_project.db import db
+
+class PurchaseDailyRollup(db.Model):
+    __tablename__ = 'PurchaseDailyRollup'
+
+    Day = db.Column(db.Date, primary_key=True)
+    GameID = db.Column(db.Integer, primary_key=True)
+    PublisherID = db.Column(db.Integer, nullable=True, index=True)
+    Purchases = db.Column(db.Integer, nullable=False, default=0)
+
+
+class RollupWatermark(db.Model):
+    __tablename__ = 'RollupWatermark'
+
+    # Назва rollup-у та остання врахована ним подія (ChangeID журналу змін)
+    Name = db.Column(db.String(50), primary_key=True)
+    LastID = db.Column(db.Integer, nullable=False, default=0)
+    UpdatedAt = db.Column(db.DateTime)
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from t08_flask_mysql.app.my_project.db import db
 from t08_flask_mysql.app.my_project.domain.games import Game
 from t08_flask_mysql.app.my_project.domain.users import User
@@ -8,8 +10,30 @@ class UserGameOwnership(db.Model):
     OwnershipID = db.Column(db.Integer, primary_key=True)
     UserID = db.Column(db.Integer, db.ForeignKey('Users.UserID'), nullable=False)
     GameID = db.Column(db.Integer, db.ForeignKey('Games.GameID'), nullable=False)
-    PurchaseDate = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Значення за замовчуванням обчислюється в Python, тож після INSERT його не треба перечитувати
+    PurchaseDate = db.Column(db.DateTime, default=datetime.now, index=True)
 
     # Відношення
     user = db.relationship('User', back_populates='owned_games')
     game = db.relationship('Game', back_populates='owned_by_users')
+
+    # ID архівованих рядків не мають видаватися повторно (SQLite без AUTOINCREMENT бере MAX(id) + 1)
+    __table_args__ = {'sqlite_autoincrement': True}
+
+
+class UserGameOwnershipArchive(db.Model):
+    """
+    Холодне сховище: старі покупки, перенесені з UserGameOwnership командою archive-ownerships
+    """
+    __tablename__ = 'UserGameOwnershipArchive'
+
+    OwnershipID = db.Column(db.Integer, primary_key=True, autoincrement=False)
+    UserID = db.Column(db.Integer, nullable=False, index=True)
+    GameID = db.Column(db.Integer, nullable=False)
+    PurchaseDate = db.Column(db.DateTime, index=True)
+
+    # Без зовнішніх ключів: холодні рядки не перевіряються під час записів у Users і Games; зв'язки лише для читання
+    user = db.relationship('User', primaryjoin='foreign(UserGameOwnershipArchive.UserID) == User.UserID',
+                           viewonly=True)
+    game = db.relationship('Game', primaryjoin='foreign(UserGameOwnershipArchive.GameID) == Game.GameID',
+                           viewonly=True)
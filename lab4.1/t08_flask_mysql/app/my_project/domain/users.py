@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from t08_flask_mysql.app.my_project.db import db
 
 class User(db.Model):
@@ -7,7 +9,12 @@ class User(db.Model):
     Username = db.Column(db.String(50), nullable=False)
     Email = db.Column(db.String(100), unique=True, nullable=False)
     PasswordHash = db.Column(db.String(255), nullable=False)
-    RegistrationDate = db.Column(db.DateTime, default=db.func.current_timestamp())
+    # Значення за замовчуванням обчислюється в Python, тож після INSERT його не треба перечитувати
+    RegistrationDate = db.Column(db.DateTime, default=datetime.now)
+    # Версія для оптимістичного блокування (PATCH з перевіркою версії)
+    Version = db.Column(db.Integer, nullable=False, default=1, server_default="1")
+
+    __mapper_args__ = {"version_id_col": Version}
 
     owned_games = db.relationship('UserGameOwnership', back_populates='user')
 
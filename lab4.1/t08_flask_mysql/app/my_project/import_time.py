@@ -0,0 +1,64 @@
+import os
+import subprocess
+import sys
+
+import click
+from flask import current_app, has_app_context
+
+# Ключі конфігурації
+IMPORT_TIME_BUDGET_MS = "IMPORT_TIME_BUDGET_MS"
+
+DEFAULT_IMPORT_TIME_BUDGET_MS = 250
+APP_FACTORY_MODULE = "t08_flask_mysql.app.my_project"
+
+# Корінь проєкту (lab4.1), з якого імпортується пакет t08_flask_mysql
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+def measure_import_time(module: str = APP_FACTORY_MODULE):
+    """
+    Імпортує модуль у "холодному" інтерпретаторі з -X importtime.
+    Повертає загальний час у мс та список (self_us, cumulative_us, name)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    entries = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(self_us), int(cumulative_us), name.strip()))
+        # Кумулятивний час цільового модуля вже включає час усіх його залежностей
+        if name.strip() == module:
+            total_us = int(cumulative_us)
+    return total_us / 1000, entries
+
+
+@click.command("import-time")
+@click.option("--budget", type=int, default=None, help="Budget in milliseconds (overrides IMPORT_TIME_BUDGET_MS)")
+@click.option("--top", type=int, default=10, help="How many of the slowest modules to print")
+def import_time_command(budget, top):
+    """Fail if cold import of the app factory exceeds the time budget (no app or database needed)."""
+    if budget is None:
+        config = current_app.config if has_app_context() else {}
+        budget = config.get(IMPORT_TIME_BUDGET_MS, DEFAULT_IMPORT_TIME_BUDGET_MS)
+
+    total_ms, entries = measure_import_time()
+    for self_us, _, name in sorted(entries, reverse=True)[:top]:
+        click.echo(f"{self_us / 1000:8.2f} ms  {name}")
+    click.echo(f"Cold import of {APP_FACTORY_MODULE}: {total_ms:.1f} ms (budget {budget} ms)")
+
+    if total_ms > budget:
+        raise click.ClickException(f"Import time budget exceeded by {total_ms - budget:.1f} ms")
+
+
+if __name__ == "__main__":
+    # Перевірка без застосунку та БД (наприклад, у CI): python -m t08_flask_mysql.app.my_project.import_time
+    import_time_command()
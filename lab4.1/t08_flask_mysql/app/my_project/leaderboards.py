@@ -0,0 +1,567 @@
+import math
+import threading
+import time
+from bisect import bisect_left, insort
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from flask import Flask, current_app
+
+# Ключі конфігурації
+LEADERBOARD_ENABLED = "LEADERBOARD_ENABLED"
+LEADERBOARD_WINDOWS = "LEADERBOARD_WINDOWS"
+LEADERBOARD_BUCKET_SECONDS = "LEADERBOARD_BUCKET_SECONDS"
+LEADERBOARD_MAX_K = "LEADERBOARD_MAX_K"
+LEADERBOARD_REBUILD_INTERVAL = "LEADERBOARD_REBUILD_INTERVAL"
+LEADERBOARD_SYNC_INTERVAL = "LEADERBOARD_SYNC_INTERVAL"
+
+DEFAULT_WINDOWS = {"24h": 86400}
+DEFAULT_BUCKET_SECONDS = 300
+DEFAULT_MAX_K = 100
+DEFAULT_REBUILD_INTERVAL = 3600
+DEFAULT_SYNC_INTERVAL = 1.0
+ALL_TIME = "all"
+# Видалення, яке не вдалося зіставити з грою, виправляє лише перебудова — але не частіше ніж раз на хвилину
+MIN_REBUILD_SPACING = 60.0
+BUILD_CHUNK_SIZE = 5000
+
+
+class RankedCounter:
+    """
+    Лічильники з упорядкованим списком (-кількість, ключ): зміна — O(log n) пошуку плюс зсув
+    списку, top-K — зріз перших k елементів. Рівні кількості впорядковані за ключем
+    """
+
+    def __init__(self, counts: Optional[Dict] = None):
+        self.counts: Dict = {key: count for key, count in (counts or {}).items() if count > 0}
+        self._order: List[Tuple[int, object]] = sorted((-count, key) for key, count in self.counts.items())
+
+    def add(self, key, delta: int) -> None:
+        if key is None or not delta:
+            return
+        old = self.counts.get(key, 0)
+        new = old + delta
+        if old:
+            del self._order[bisect_left(self._order, (-old, key))]
+        if new > 0:
+            self.counts[key] = new
+            insort(self._order, (-new, key))
+        else:
+            self.counts.pop(key, None)
+
+    def top(self, k: int) -> List[Tuple[object, int]]:
+        return [(key, -count) for count, key in self._order[:k]]
+
+    def __len__(self) -> int:
+        return len(self.counts)
+
+
+class _Window:
+    __slots__ = ("seconds", "buckets", "start", "games", "publishers")
+
+    def __init__(self, seconds: int, bucket_seconds: int):
+        self.seconds = seconds
+        # Вікно ковзає цілими кошиками, тож фактично охоплює від seconds до seconds + bucket_seconds
+        self.buckets = max(1, math.ceil(seconds / bucket_seconds))
+        self.start = 0
+        self.games = RankedCounter()
+        self.publishers = RankedCounter()
+
+
+class LeaderboardState:
+    """
+    Рахунки однієї побудови: за весь час та для кожного ковзного вікна (кошики по bucket_seconds
+    за PurchaseDate). Стан синхронізації з журналом змін належить побудові й замінюється разом з нею
+    """
+
+    def __init__(self, windows: Dict[str, int], bucket_seconds: int):
+        self.bucket_seconds = bucket_seconds
+        self.games = RankedCounter()
+        self.publishers = RankedCounter()
+        self.windows = {name: _Window(seconds, bucket_seconds) for name, seconds in windows.items()}
+        # Кошик -> покупки за грою та ID покупок у ньому (щоб відняти видалення всередині вікна)
+        self.buckets: Dict[int, Counter] = {}
+        self.bucket_ids: Dict[int, List[int]] = {}
+        self.recent: Dict[int, Tuple[int, int]] = {}
+        self.game_info: Dict[int, Tuple[str, Optional[int]]] = {}
+        self.publisher_names: Dict[int, str] = {}
+        self.cursor = 0
+        self.synced_since: Optional[datetime] = None
+        self.seen: Dict[int, datetime] = {}
+        # INSERT, рядок якого вже зник до синхронізації: наступний DELETE нічого не віднімає
+        self.missing: Dict[int, float] = {}
+        self.unresolved_deletes = 0
+        self.events_applied = 0
+
+    def bucket_of(self, moment: datetime) -> int:
+        return int(moment.timestamp() // self.bucket_seconds)
+
+    def publisher_of(self, game_id: int) -> Optional[int]:
+        info = self.game_info.get(game_id)
+        return info[1] if info else None
+
+    def oldest_bucket(self) -> int:
+        return min((window.start for window in self.windows.values()), default=0)
+
+    def advance(self, now: datetime) -> None:
+        current = self.bucket_of(now)
+        for window in self.windows.values():
+            start = current - window.buckets + 1
+            if start <= window.start:
+                continue
+            for bucket in [bucket for bucket in self.buckets if window.start <= bucket < start]:
+                for game_id, count in self.buckets[bucket].items():
+                    window.games.add(game_id, -count)
+                    window.publishers.add(self.publisher_of(game_id), -count)
+            window.start = start
+        oldest = self.oldest_bucket()
+        for bucket in [bucket for bucket in self.buckets if bucket < oldest]:
+            del self.buckets[bucket]
+            for ownership_id in self.bucket_ids.pop(bucket, ()):
+                self.recent.pop(ownership_id, None)
+
+    def add_purchase(self, ownership_id: int, game_id: int, purchase_date: Optional[datetime]) -> None:
+        publisher_id = self.publisher_of(game_id)
+        self.games.add(game_id, 1)
+        self.publishers.add(publisher_id, 1)
+        if purchase_date is None:
+            return
+        bucket = self.bucket_of(purchase_date)
+        if bucket < self.oldest_bucket():
+            return
+        for window in self.windows.values():
+            if bucket >= window.start:
+                window.games.add(game_id, 1)
+                window.publishers.add(publisher_id, 1)
+        self.buckets.setdefault(bucket, Counter())[game_id] += 1
+        self.recent[ownership_id] = (game_id, bucket)
+        self.bucket_ids.setdefault(bucket, []).append(ownership_id)
+
+    def remove_purchase(self, ownership_id: int, game_id: Optional[int]) -> bool:
+        """
+        Віднімає видалену покупку. Гру покупки з вікна відомо з recent, старішої — з підказки DAO
+        цього процесу; без неї повертає False
+        """
+        if self.missing.pop(ownership_id, None) is not None:
+            return True
+        recent = self.recent.pop(ownership_id, None)
+        if recent is not None:
+            game_id, bucket = recent
+            publisher_id = self.publisher_of(game_id)
+            self.games.add(game_id, -1)
+            self.publishers.add(publisher_id, -1)
+            for window in self.windows.values():
+                if bucket >= window.start:
+                    window.games.add(game_id, -1)
+                    window.publishers.add(publisher_id, -1)
+            self.buckets[bucket][game_id] -= 1
+            return True
+        if game_id is None:
+            return False
+        # Покупка з вікна була б у recent — тож ця враховувалась лише в загальному рейтингу
+        self.games.add(game_id, -1)
+        self.publishers.add(self.publisher_of(game_id), -1)
+        return True
+
+    def set_game(self, game_id: int, name: str, publisher_id: Optional[int]) -> None:
+        old_publisher = self.publisher_of(game_id)
+        self.game_info[game_id] = (name, publisher_id)
+        if old_publisher == publisher_id:
+            return
+        # Гра перейшла до іншого видавця — разом з усіма своїми покупками
+        for games, publishers in [(self.games, self.publishers)] + [
+            (window.games, window.publishers) for window in self.windows.values()
+        ]:
+            count = games.counts.get(game_id, 0)
+            publishers.add(old_publisher, -count)
+            publishers.add(publisher_id, count)
+
+    def remove_game(self, game_id: int) -> None:
+        publisher_id = self.publisher_of(game_id)
+        for games, publishers in [(self.games, self.publishers)] + [
+            (window.games, window.publishers) for window in self.windows.values()
+        ]:
+            count = games.counts.get(game_id, 0)
+            games.add(game_id, -count)
+            publishers.add(publisher_id, -count)
+        for counter in self.buckets.values():
+            counter.pop(game_id, None)
+        self.game_info.pop(game_id, None)
+
+    def boards(self, window: str) -> Tuple[RankedCounter, RankedCounter]:
+        if window == ALL_TIME:
+            return self.games, self.publishers
+        return self.windows[window].games, self.windows[window].publishers
+
+
+class Leaderboards:
+    """
+    Top-K найпопулярніших ігор і видавців за весь час та за ковзні вікна. Будуються під час старту
+    з UserGameOwnership (разом з архівом і шардами), далі оновлюються інкрементально з журналу змін,
+    повністю перебудовуються у фоні раз на rebuild_interval
+    """
+
+    def __init__(self, app: Flask, windows: Dict[str, int], bucket_seconds: int, rebuild_interval: float,
+                 sync_interval: float):
+        self.app = app
+        self.windows = dict(windows)
+        self.bucket_seconds = bucket_seconds
+        self.rebuild_interval = rebuild_interval
+        self.sync_interval = sync_interval
+        self.state = LeaderboardState(self.windows, bucket_seconds)
+        self.built_at = 0.0
+        self.build_seconds = 0.0
+        self.rebuilds = 0
+        self._synced_at = 0.0
+        # Видалені цим процесом покупки: OwnershipID -> (GameID, коли записано).
+        # Застосовуються лише коли DELETE з'явиться в журналі змін, тобто після коміту
+        self._deleted: Dict[int, Tuple[int, float]] = {}
+        self._lock = threading.RLock()
+        self._sync_lock = threading.Lock()
+        self._rebuild_lock = threading.Lock()
+
+    def _models(self):
+        from .domain.games import Game
+        from .domain.publisher import Publisher
+        from .domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+
+        return Game, Publisher, UserGameOwnership, UserGameOwnershipArchive
+
+    def _ownership_selects(self, build) -> Iterable:
+        """
+        Виконує build(table) для гарячої таблиці та архіву в основній БД або в кожному шарді
+        """
+        from .db import db
+        from .sharding import get_ownership_shards
+
+        _, _, hot, archive = self._models()
+        shards = get_ownership_shards()
+        if shards is None:
+            for table in (hot.__table__, archive.__table__):
+                yield from db.session.execute(build(table).execution_options(yield_per=BUILD_CHUNK_SIZE))
+            return
+        for table in (shards.table, shards.archive_table):
+            for index in range(len(shards)):
+                yield from shards.stream(index, build(table), BUILD_CHUNK_SIZE)
+
+    def build(self) -> None:
+        """
+        Повна побудова (потрібен контекст застосунку). Курсор, події вікна перечитування й рахунки
+        читаються в одній транзакції основної БД (у MySQL — один знімок REPEATABLE READ), тож після
+        заміни sync застосує лише події, яких ще не було в прочитаних даних
+        """
+        from sqlalchemy import func, select
+
+        from .dao.change_log_dao import ChangeLogDAO
+        from .db import db
+        from .domain.change_log import ChangeLog
+
+        game, publisher, _, _ = self._models()
+        started = datetime.now()
+        began = time.monotonic()
+        state = LeaderboardState(self.windows, self.bucket_seconds)
+        try:
+            state.cursor = max(db.session.execute(select(func.max(ChangeLog.ChangeID))).scalar() or 0,
+                               ChangeLogDAO.get_compacted_up_to())
+            since = started - timedelta(seconds=_settle_seconds())
+            state.seen = dict(db.session.execute(
+                select(ChangeLog.ChangeID, ChangeLog.ChangedAt)
+                .where(ChangeLog.Entity.in_(self._entities()), ChangeLog.ChangedAt >= since)
+            ).all())
+            state.synced_since = started
+
+            for row in db.session.execute(select(game.GameID, game.GameName, game.PublisherID)):
+                state.game_info[row.GameID] = (row.GameName, row.PublisherID)
+            state.publisher_names = dict(db.session.execute(select(publisher.PublisherID, publisher.PublisherName)).all())
+
+            totals = Counter()
+            for row in self._ownership_selects(
+                lambda table: select(table.c.GameID, func.count().label("Purchases")).group_by(table.c.GameID)
+            ):
+                totals[row.GameID] += row.Purchases
+            by_publisher = Counter()
+            for game_id, count in totals.items():
+                by_publisher[state.publisher_of(game_id)] += count
+            by_publisher.pop(None, None)
+            state.games = RankedCounter(totals)
+            state.publishers = RankedCounter(by_publisher)
+
+            # Покупки за найдовше вікно — у кошики (індекс за PurchaseDate)
+            state.advance(started)
+            window_start = datetime.fromtimestamp(state.oldest_bucket() * self.bucket_seconds)
+            recent = self._ownership_selects(
+                lambda table: select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                .where(table.c.PurchaseDate >= window_start)
+            )
+            self._load_recent(state, recent)
+        finally:
+            db.session.rollback()
+
+        with self._lock:
+            self.state = state
+        self.built_at = time.monotonic()
+        self.build_seconds = self.built_at - began
+        self.rebuilds += 1
+        self.sync(force=True)
+
+    @staticmethod
+    def _load_recent(state: LeaderboardState, rows) -> None:
+        windows = {name: Counter() for name in state.windows}
+        for row in rows:
+            bucket = state.bucket_of(row.PurchaseDate)
+            state.buckets.setdefault(bucket, Counter())[row.GameID] += 1
+            state.bucket_ids.setdefault(bucket, []).append(row.OwnershipID)
+            state.recent[row.OwnershipID] = (row.GameID, bucket)
+            for name, window in state.windows.items():
+                if bucket >= window.start:
+                    windows[name][row.GameID] += 1
+        for name, counts in windows.items():
+            by_publisher = Counter()
+            for game_id, count in counts.items():
+                by_publisher[state.publisher_of(game_id)] += count
+            by_publisher.pop(None, None)
+            state.windows[name].games = RankedCounter(counts)
+            state.windows[name].publishers = RankedCounter(by_publisher)
+
+    @staticmethod
+    def _entities() -> List[str]:
+        return ["UserGameOwnership", "Games", "Publishers"]
+
+    def record_deleted(self, rows) -> None:
+        """
+        Викликається DAO перед видаленням покупок: гру старої покупки інакше вже не дізнатися
+        """
+        now = time.monotonic()
+        for row in rows:
+            self._deleted[row.OwnershipID] = (row.GameID, now)
+
+    def top(self, board: str, window: str, k: int) -> List[Dict]:
+        self._refresh()
+        with self._lock:
+            state = self.state
+            state.advance(datetime.now())
+            games, publishers = state.boards(window)
+            if board == "games":
+                return [
+                    {"Rank": rank, "GameID": game_id, "GameName": state.game_info.get(game_id, (None, None))[0],
+                     "PublisherID": state.publisher_of(game_id), "Owners": count}
+                    for rank, (game_id, count) in enumerate(games.top(k), 1)
+                ]
+            return [
+                {"Rank": rank, "PublisherID": publisher_id, "PublisherName": state.publisher_names.get(publisher_id),
+                 "Sales": count}
+                for rank, (publisher_id, count) in enumerate(publishers.top(k), 1)
+            ]
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now - self._synced_at >= self.sync_interval:
+            self.sync()
+        stale = now - self.built_at >= self.rebuild_interval
+        drifted = self.state.unresolved_deletes and now - self.built_at >= MIN_REBUILD_SPACING
+        if (stale or drifted) and self._rebuild_lock.acquire(blocking=False):
+            threading.Thread(target=self._rebuild_in_background, name="leaderboard-rebuild", daemon=True).start()
+
+    def _rebuild_in_background(self) -> None:
+        try:
+            with self.app.app_context():
+                self.build()
+        except Exception:
+            self.app.logger.exception("Leaderboard rebuild failed")
+            # Наступна спроба — не раніше ніж через rebuild_interval
+            self.built_at = time.monotonic()
+        finally:
+            self._rebuild_lock.release()
+
+    def sync(self, force: bool = False) -> None:
+        """
+        Застосовує нові покупки, видалення та зміни ігор і видавців з журналу змін після курсора
+        (і ще раз — події вікна перечитування, яких ще не було, див. _settle_seconds)
+        """
+        if not self._sync_lock.acquire(blocking=force):
+            return
+        try:
+            from sqlalchemy import or_, select
+
+            from .dao.change_log_dao import ChangeLogDAO, DELETE, INSERT
+            from .db import db
+            from .domain.change_log import ChangeLog
+
+            self._synced_at = time.monotonic()
+            started = datetime.now()
+            state = self.state
+            if state.cursor < ChangeLogDAO.get_compacted_up_to():
+                # Пропущені події вже видалені компактизацією — лише повна перебудова
+                self.built_at = 0.0
+                return
+
+            since = (state.synced_since or started) - timedelta(seconds=_settle_seconds())
+            events = [
+                event for event in db.session.execute(
+                    select(ChangeLog.ChangeID, ChangeLog.Entity, ChangeLog.EntityID, ChangeLog.Operation,
+                           ChangeLog.ChangedAt)
+                    .where(ChangeLog.Entity.in_(self._entities()),
+                           or_(ChangeLog.ChangeID > state.cursor, ChangeLog.ChangedAt >= since))
+                    .order_by(ChangeLog.ChangeID)
+                ).all()
+                if event.ChangeID not in state.seen
+            ]
+            games = {event.EntityID for event in events if event.Entity == "Games" and event.Operation != DELETE}
+            publishers = {event.EntityID for event in events
+                          if event.Entity == "Publishers" and event.Operation != DELETE}
+            inserted = {event.EntityID for event in events
+                        if event.Entity == "UserGameOwnership" and event.Operation == INSERT}
+            game_rows, publisher_rows, purchase_rows = self._load_changed(games, publishers, inserted)
+            game_rows.update(self._load_games({row.GameID for row in purchase_rows.values()}
+                                              - set(state.game_info) - set(game_rows)))
+
+            with self._lock:
+                state.advance(started)
+                for publisher_id, name in publisher_rows.items():
+                    state.publisher_names[publisher_id] = name
+                for game_id, (name, publisher_id) in game_rows.items():
+                    state.set_game(game_id, name, publisher_id)
+                for event in events:
+                    state.seen[event.ChangeID] = event.ChangedAt
+                    state.cursor = max(state.cursor, event.ChangeID)
+                    self._apply(state, event, purchase_rows)
+                state.seen = {change_id: at for change_id, at in state.seen.items() if at >= since}
+                state.synced_since = started
+            self._prune()
+        finally:
+            self._sync_lock.release()
+
+    def _apply(self, state: LeaderboardState, event, purchase_rows) -> None:
+        from .dao.change_log_dao import DELETE, INSERT
+
+        if event.Entity == "Games":
+            if event.Operation == DELETE:
+                state.remove_game(event.EntityID)
+            return
+        if event.Entity == "Publishers":
+            if event.Operation == DELETE:
+                state.publisher_names.pop(event.EntityID, None)
+            return
+        state.events_applied += 1
+        if event.Operation == INSERT:
+            row = purchase_rows.get(event.EntityID)
+            if row is None:
+                state.missing[event.EntityID] = time.monotonic()
+            else:
+                state.add_purchase(row.OwnershipID, row.GameID, row.PurchaseDate)
+        elif event.Operation == DELETE:
+            hint = self._deleted.pop(event.EntityID, None)
+            if not state.remove_purchase(event.EntityID, hint[0] if hint else None):
+                # Видалення іншим воркером покупки поза вікном — загальний рейтинг виправить перебудова
+                state.unresolved_deletes += 1
+
+    def _load_changed(self, games, publishers, inserted):
+        from sqlalchemy import select
+
+        from .db import db
+
+        game, publisher, _, _ = self._models()
+        game_rows = self._load_games(games)
+        publisher_rows = dict(db.session.execute(
+            select(publisher.PublisherID, publisher.PublisherName).where(publisher.PublisherID.in_(publishers))
+        ).all()) if publishers else {}
+        purchase_rows = {}
+        if inserted:
+            # Рядок міг уже переїхати в архів або між шардами — беремо перший знайдений
+            for row in self._ownership_selects(
+                lambda table: select(table.c.OwnershipID, table.c.GameID, table.c.PurchaseDate)
+                .where(table.c.OwnershipID.in_(inserted))
+            ):
+                purchase_rows.setdefault(row.OwnershipID, row)
+        return game_rows, publisher_rows, purchase_rows
+
+    def _load_games(self, ids) -> Dict[int, Tuple[str, Optional[int]]]:
+        if not ids:
+            return {}
+        from sqlalchemy import select
+
+        from .db import db
+
+        game, _, _, _ = self._models()
+        return {row.GameID: (row.GameName, row.PublisherID) for row in db.session.execute(
+            select(game.GameID, game.GameName, game.PublisherID).where(game.GameID.in_(ids))
+        )}
+
+    def _prune(self) -> None:
+        # Підказки та пропущені INSERT старші за інтервал перебудови вже не потрібні — її все одно буде зроблено
+        cutoff = time.monotonic() - self.rebuild_interval
+        self._deleted = {key: value for key, value in self._deleted.items() if value[1] >= cutoff}
+        state = self.state
+        state.missing = {key: at for key, at in state.missing.items() if at >= cutoff}
+
+    def report(self) -> Dict:
+        state = self.state
+        windows = {ALL_TIME: state.games, **{name: window.games for name, window in state.windows.items()}}
+        return {
+            "games_ranked": {name: len(games) for name, games in windows.items()},
+            "publishers_ranked": {ALL_TIME: len(state.publishers),
+                                  **{name: len(window.publishers) for name, window in state.windows.items()}},
+            "recent_purchases": len(state.recent),
+            "buckets": len(state.buckets),
+            "events_applied": state.events_applied,
+            "unresolved_deletes": state.unresolved_deletes,
+            "rebuilds": self.rebuilds,
+            "build_seconds": round(self.build_seconds, 3),
+        }
+
+
+def _settle_seconds() -> float:
+    """
+    Вікно перечитування журналу змін: події, молодші за нього, читаються ще раз, бо транзакція з меншим
+    ChangeID могла закомітитись пізніше. Те саме вікно, що й у стрічки змін, — найдовша дозволена транзакція
+    """
+    from .service.change_log_service import ChangeLogService
+
+    return ChangeLogService.settle_seconds()
+
+
+def init_leaderboards(app: Flask) -> None:
+    """
+    Рейтинги ігор за кількістю власників і видавців за продажами (за весь час і за ковзні вікна)
+    у пам'яті процесу, без GROUP BY на кожен запит
+    """
+    if not app.config.get(LEADERBOARD_ENABLED, True):
+        return
+
+    leaderboards = Leaderboards(
+        app,
+        app.config.get(LEADERBOARD_WINDOWS) or DEFAULT_WINDOWS,
+        app.config.get(LEADERBOARD_BUCKET_SECONDS, DEFAULT_BUCKET_SECONDS),
+        app.config.get(LEADERBOARD_REBUILD_INTERVAL, DEFAULT_REBUILD_INTERVAL),
+        app.config.get(LEADERBOARD_SYNC_INTERVAL, DEFAULT_SYNC_INTERVAL),
+    )
+    with app.app_context():
+        leaderboards.build()
+    app.extensions["leaderboards"] = leaderboards
+
+    from .metrics import register_gauge
+
+    def ranked(key):
+        return lambda: {(("window", name),): count for name, count in leaderboards.report()[key].items()}
+
+    register_gauge(app, "leaderboard_games_ranked", "Games with at least one purchase in each window",
+                   ranked("games_ranked"))
+    register_gauge(app, "leaderboard_publishers_ranked", "Publishers with at least one sale in each window",
+                   ranked("publishers_ranked"))
+    register_gauge(app, "leaderboard_recent_purchases", "Purchases kept in sliding-window buckets",
+                   lambda: leaderboards.report()["recent_purchases"])
+    register_gauge(app, "leaderboard_unresolved_deletes", "Deletes by other workers waiting for a rebuild",
+                   lambda: leaderboards.report()["unresolved_deletes"])
+    register_gauge(app, "leaderboard_build_seconds", "Duration of the last full leaderboard build",
+                   lambda: leaderboards.report()["build_seconds"])
+
+
+def get_leaderboards() -> Optional[Leaderboards]:
+    return current_app.extensions.get("leaderboards")
+
+
+def record_deleted(rows) -> None:
+    leaderboards = get_leaderboards()
+    if leaderboards is not None:
+        leaderboards.record_deleted(rows)
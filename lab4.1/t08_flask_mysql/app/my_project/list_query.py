@@ -0,0 +1,138 @@
+import re
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from flask import current_app
+from sqlalchemy import select
+
+# Ключі конфігурації
+MULTI_GET_MAX_IDS = "MULTI_GET_MAX_IDS"
+
+DEFAULT_MULTI_GET_MAX_IDS = 1000
+
+# ?filter[Поле]=значення або ?filter[Поле][оператор]=значення
+FILTER_PATTERN = re.compile(r"^filter\[(\w+)\](?:\[(\w+)\])?$")
+OPERATORS = {
+    "eq": lambda column, value: column == value,
+    "ne": lambda column, value: column != value,
+    "gt": lambda column, value: column > value,
+    "gte": lambda column, value: column >= value,
+    "lt": lambda column, value: column < value,
+    "lte": lambda column, value: column <= value,
+    "in": lambda column, value: column.in_(value),
+}
+
+
+class ListQuery:
+    """
+    Розібрані параметри ?fields=, ?filter[...]= та ?sort= для спискових ендпоінтів
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None,
+                 filters: Optional[List[Tuple[str, str, str]]] = None,
+                 sort: Optional[List[Tuple[str, bool]]] = None):
+        self.fields = fields
+        self.filters = filters or []
+        self.sort = sort or []
+
+    def is_default(self) -> bool:
+        return not (self.fields or self.filters or self.sort)
+
+    def referenced_fields(self) -> set:
+        return set(self.fields or ()) | {f for f, _, _ in self.filters} | {f for f, _ in self.sort}
+
+
+def parse_list_query(args, allowed_fields: Iterable[str]) -> ListQuery:
+    """
+    Перевіряє параметри запиту за білим списком полів. Некоректні параметри — ValueError
+    """
+    allowed = set(allowed_fields)
+
+    def check(name: str) -> str:
+        if name not in allowed:
+            raise ValueError(f"Unknown field '{name}'. Allowed fields: {', '.join(sorted(allowed))}")
+        return name
+
+    fields = None
+    if args.get("fields"):
+        fields = [check(name.strip()) for name in args["fields"].split(",") if name.strip()]
+
+    filters = []
+    for key, value in args.items(multi=True):
+        match = FILTER_PATTERN.match(key)
+        if not match:
+            continue
+        name, op = check(match.group(1)), (match.group(2) or "eq").lower()
+        if op not in OPERATORS:
+            raise ValueError(f"Unknown filter operator '{op}'. Use one of {', '.join(OPERATORS)}")
+        filters.append((name, op, value))
+
+    sort = []
+    if args.get("sort"):
+        for name in args["sort"].split(","):
+            name = name.strip()
+            if name:
+                descending = name.startswith("-")
+                sort.append((check(name.lstrip("-")), descending))
+
+    return ListQuery(fields, filters, sort)
+
+
+def parse_ids(raw: str) -> List[int]:
+    """
+    Розбирає ?ids=1,2,3 у список цілих чисел, зберігаючи порядок
+    """
+    try:
+        ids = [int(item) for item in raw.split(",") if item.strip()]
+    except ValueError:
+        raise ValueError("ids must be a comma-separated list of integers")
+    if not ids:
+        raise ValueError("ids must not be empty")
+    max_ids = current_app.config.get(MULTI_GET_MAX_IDS, DEFAULT_MULTI_GET_MAX_IDS)
+    if len(ids) > max_ids:
+        raise ValueError(f"Too many ids: {len(ids)} (max {max_ids})")
+    return ids
+
+
+def _convert(column, raw: str):
+    try:
+        python_type = column.type.python_type
+    except NotImplementedError:
+        return raw
+    try:
+        if python_type is datetime:
+            return datetime.fromisoformat(raw)
+        if python_type is date:
+            return date.fromisoformat(raw)
+        return python_type(raw)
+    except ValueError:
+        raise ValueError(f"Invalid value '{raw}' for field '{column.key}'")
+
+
+def build_select(base, columns: Dict[str, object], default_fields: Sequence[str],
+                 list_query: Optional[ListQuery] = None, joins: Sequence[tuple] = ()):
+    """
+    Компілює ListQuery у SELECT лише потрібних колонок з WHERE та ORDER BY.
+    joins — (таблиця, умова з'єднання, поля цієї таблиці); JOIN додається, лише якщо поле використано
+    """
+    list_query = list_query or ListQuery()
+    fields = list_query.fields or list(default_fields)
+
+    stmt = select(*(columns[name].label(name) for name in fields)).select_from(base)
+    referenced = set(fields) | list_query.referenced_fields()
+    for target, onclause, names in joins:
+        if referenced & set(names):
+            stmt = stmt.join(target, onclause)
+
+    for name, op, raw in list_query.filters:
+        column = columns[name]
+        if op == "in":
+            value = [_convert(column, item) for item in raw.split(",")]
+        else:
+            value = _convert(column, raw)
+        stmt = stmt.where(OPERATORS[op](column, value))
+
+    for name, descending in list_query.sort:
+        stmt = stmt.order_by(columns[name].desc() if descending else columns[name].asc())
+
+    return stmt
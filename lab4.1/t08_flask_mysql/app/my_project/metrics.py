@@ -0,0 +1,336 @@
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+# Ключі конфігурації
+METRICS_ENABLED = "METRICS_ENABLED"
+METRICS_MULTIPROC_DIR = "METRICS_MULTIPROC_DIR"
+METRICS_FLUSH_INTERVAL = "METRICS_FLUSH_INTERVAL"
+METRICS_BUCKETS = "METRICS_BUCKETS"
+
+DEFAULT_FLUSH_INTERVAL = 5.0
+DEFAULT_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0]
+SKIPPED_ENDPOINTS = {"metrics", "static"}
+
+
+class _ThreadStats:
+    """
+    Лічильники одного потоку. Пише в них лише потік-власник, тому блокування не потрібні;
+    під час scrape знімки всіх потоків зливаються разом
+    """
+
+    def __init__(self, buckets_count: int):
+        self.buckets_count = buckets_count
+        self.requests: Dict[Tuple[str, str, str, str], int] = {}
+        # [лічильники по бакетах..., +Inf, сума секунд]
+        self.latency: Dict[Tuple[str, str, str], List[float]] = {}
+        self.in_flight = 0
+
+    def observe(self, labels: Tuple[str, str, str, str], bucket: int, seconds: float) -> None:
+        self.requests[labels] = self.requests.get(labels, 0) + 1
+        key = labels[:2] + labels[3:]
+        hist = self.latency.get(key)
+        if hist is None:
+            hist = self.latency[key] = [0] * (self.buckets_count + 2)
+        hist[bucket] += 1
+        hist[-1] += seconds
+
+
+class MetricsRegistry:
+    def __init__(self, buckets: List[float]):
+        self.buckets = buckets
+        self._local = threading.local()
+        self._threads: List[_ThreadStats] = []
+        self._threads_lock = threading.Lock()
+        self._gauges: Dict[str, Tuple[str, Callable]] = {}
+        self._counters: Dict[str, Tuple[str, Callable]] = {}
+        self._last_flush = 0.0
+
+    def stats(self) -> _ThreadStats:
+        stats = getattr(self._local, "stats", None)
+        if stats is None:
+            stats = self._local.stats = _ThreadStats(len(self.buckets))
+            with self._threads_lock:
+                self._threads.append(stats)
+        return stats
+
+    def register_gauge(self, name: str, help_text: str, fn: Callable) -> None:
+        """
+        fn повертає число або словник {мітки (dict або tuple пар): значення}
+        """
+        self._gauges[name] = (help_text, fn)
+
+    def register_counter(self, name: str, help_text: str, fn: Callable) -> None:
+        """
+        fn повертає монотонний підсумок процесу (у тій самій формі, що й gauge); name закінчується на _total.
+        На відміну від gauge, значення потрапляють у знімок і сумуються по всіх процесах
+        """
+        self._counters[name] = (help_text, fn)
+
+    def counter_values(self) -> List[list]:
+        values = []
+        for name, (_, fn) in self._counters.items():
+            try:
+                value = fn()
+            except Exception:  # лічильник не повинен ламати scrape чи скидання знімка
+                continue
+            items = value.items() if isinstance(value, dict) else [((), value)]
+            for labels, item in items:
+                pairs = labels.items() if isinstance(labels, dict) else labels
+                values.append([name, [list(pair) for pair in pairs], item])
+        return values
+
+    def observe(self, blueprint: str, endpoint: str, method: str, status: str, seconds: float) -> None:
+        self.stats().observe((blueprint, endpoint, method, status), bisect_left(self.buckets, seconds), seconds)
+
+    def snapshot(self) -> dict:
+        requests: Dict[tuple, int] = {}
+        latency: Dict[tuple, List[float]] = {}
+        in_flight = 0
+        with self._threads_lock:
+            threads = list(self._threads)
+        for stats in threads:
+            for key, value in dict(stats.requests).items():
+                requests[key] = requests.get(key, 0) + value
+            for key, hist in dict(stats.latency).items():
+                merged = latency.setdefault(key, [0] * len(hist))
+                for i, value in enumerate(list(hist)):
+                    merged[i] += value
+            in_flight += stats.in_flight
+        return {
+            "pid": os.getpid(),
+            "requests": [[list(k), v] for k, v in requests.items()],
+            "latency": [[list(k), v] for k, v in latency.items()],
+            "in_flight": in_flight,
+            "counters": self.counter_values(),
+        }
+
+
+def init_metrics(app: Flask) -> None:
+    """
+    Збирає метрики запитів та віддає їх на /metrics у текстовому форматі Prometheus
+    """
+    if not app.config.get(METRICS_ENABLED, True):
+        return
+
+    registry = MetricsRegistry(sorted(app.config.get(METRICS_BUCKETS, DEFAULT_BUCKETS)))
+    app.extensions["metrics"] = registry
+
+    _register_db_gauges(app, registry)
+
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
+    app.add_url_rule("/metrics", "metrics", _metrics_view)
+
+
+def get_registry() -> Optional[MetricsRegistry]:
+    return current_app.extensions.get("metrics")
+
+
+def register_gauge(app: Flask, name: str, help_text: str, fn: Callable) -> None:
+    registry = app.extensions.get("metrics")
+    if registry is not None:
+        registry.register_gauge(name, help_text, fn)
+
+
+def register_counter(app: Flask, name: str, help_text: str, fn: Callable) -> None:
+    registry = app.extensions.get("metrics")
+    if registry is not None:
+        registry.register_counter(name, help_text, fn)
+
+
+def _register_db_gauges(app: Flask, registry: MetricsRegistry) -> None:
+    from .db import db
+
+    # gauge викликаються під час scrape, тобто вже в контексті застосунку
+    def pool_stat(method: str):
+        def read():
+            fn = getattr(db.engine.pool, method, None)
+            # overflow() у SQLAlchemy від'ємний, поки пул не заповнений
+            return max(fn(), 0) if callable(fn) else 0
+        return read
+
+    registry.register_gauge("db_pool_size", "Configured size of the DB connection pool", pool_stat("size"))
+    registry.register_gauge("db_pool_checked_out", "DB connections currently in use", pool_stat("checkedout"))
+    registry.register_gauge("db_pool_checked_in", "Idle DB connections in the pool", pool_stat("checkedin"))
+    registry.register_gauge("db_pool_overflow", "DB connections opened above the pool size", pool_stat("overflow"))
+    registry.register_gauge(
+        "sqlalchemy_compiled_cache_entries",
+        "Statements held in the SQLAlchemy compiled cache",
+        lambda: len(db.engine._compiled_cache or ()),
+    )
+
+
+def _before_request() -> None:
+    registry = get_registry()
+    if request.endpoint in SKIPPED_ENDPOINTS:
+        return
+    registry.stats().in_flight += 1
+    g.metrics_start = time.perf_counter()
+
+
+def _after_request(response: Response) -> Response:
+    start = g.pop("metrics_start", None)
+    if start is None:
+        return response
+
+    registry = get_registry()
+    registry.observe(
+        request.blueprint or "none",
+        request.endpoint or "none",
+        request.method,
+        str(response.status_code),
+        time.perf_counter() - start,
+    )
+    g.metrics_observed = True
+    _maybe_flush(registry)
+    return response
+
+
+def _teardown_request(exc) -> None:
+    if g.pop("metrics_observed", False) or g.pop("metrics_start", None) is not None:
+        get_registry().stats().in_flight -= 1
+
+
+def _multiproc_dir() -> Optional[str]:
+    return current_app.config.get(METRICS_MULTIPROC_DIR) or os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+
+
+def _maybe_flush(registry: MetricsRegistry, force: bool = False) -> None:
+    """
+    Періодично скидає знімок процесу у спільний каталог, щоб /metrics будь-якого воркера бачив усі процеси
+    """
+    directory = _multiproc_dir()
+    if not directory:
+        return
+    now = time.monotonic()
+    if not force and now - registry._last_flush < current_app.config.get(METRICS_FLUSH_INTERVAL, DEFAULT_FLUSH_INTERVAL):
+        return
+    registry._last_flush = now
+
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"metrics-{os.getpid()}.json")
+    tmp_path = f"{path}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(registry.snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _collect_snapshots(registry: MetricsRegistry) -> List[dict]:
+    own = registry.snapshot()
+    directory = _multiproc_dir()
+    if not directory:
+        return [own]
+
+    _maybe_flush(registry, force=True)
+    snapshots = [own]
+    for path in glob.glob(os.path.join(directory, "metrics-*.json")):
+        try:
+            with open(path, encoding="utf-8") as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if snapshot.get("pid") == own["pid"]:
+            continue
+        # Лічильники завершених процесів зберігаються, а їхні gauge — ні
+        if not _pid_alive(snapshot.get("pid", 0)):
+            snapshot["in_flight"] = 0
+        snapshots.append(snapshot)
+    return snapshots
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    if isinstance(labels, dict):
+        labels = labels.items()
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _render(registry: MetricsRegistry, snapshots: List[dict]) -> str:
+    requests: Dict[tuple, int] = {}
+    latency: Dict[tuple, List[float]] = {}
+    counters: Dict[tuple, float] = {}
+    in_flight = 0
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get("counters", []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for key, value in snapshot["requests"]:
+            requests[tuple(key)] = requests.get(tuple(key), 0) + value
+        for key, hist in snapshot["latency"]:
+            merged = latency.setdefault(tuple(key), [0] * len(hist))
+            for i, value in enumerate(hist):
+                merged[i] += value
+        in_flight += snapshot["in_flight"]
+
+    lines = [
+        "# HELP http_requests_total Total HTTP requests processed",
+        "# TYPE http_requests_total counter",
+    ]
+    for (blueprint, endpoint, method, status), value in sorted(requests.items()):
+        labels = (("blueprint", blueprint), ("endpoint", endpoint), ("method", method), ("status", status))
+        lines.append(f"http_requests_total{_format_labels(labels)} {value}")
+
+    lines += [
+        "# HELP http_requests_in_flight HTTP requests currently being processed",
+        "# TYPE http_requests_in_flight gauge",
+        f"http_requests_in_flight {in_flight}",
+        "# HELP http_request_duration_seconds HTTP request latency",
+        "# TYPE http_request_duration_seconds histogram",
+    ]
+    for (blueprint, endpoint, status), hist in sorted(latency.items()):
+        base = (("blueprint", blueprint), ("endpoint", endpoint), ("status", status))
+        cumulative = 0
+        for bound, count in zip(registry.buckets + ["+Inf"], hist[:-1]):
+            cumulative += count
+            lines.append(f"http_request_duration_seconds_bucket{_format_labels(base + (('le', bound),))} {cumulative}")
+        lines.append(f"http_request_duration_seconds_sum{_format_labels(base)} {hist[-1]}")
+        lines.append(f"http_request_duration_seconds_count{_format_labels(base)} {cumulative}")
+
+    for name, (help_text, _) in sorted(registry._counters.items()):
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        for (counter, labels), value in sorted(counters.items()):
+            if counter == name:
+                lines.append(f"{name}{_format_labels(labels)} {value}")
+
+    for name, (help_text, fn) in sorted(registry._gauges.items()):
+        try:
+            value = fn()
+        except Exception:  # gauge не повинен ламати весь scrape
+            continue
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+        if isinstance(value, dict):
+            for labels, item in value.items():
+                lines.append(f"{name}{_format_labels(labels)} {item}")
+        else:
+            lines.append(f"{name} {value}")
+
+    return "\n".join(lines) + "\n"
+
+
+def _metrics_view():
+    registry = get_registry()
+    body = _render(registry, _collect_snapshots(registry))
+    return Response(body, content_type="text/plain; version=0.0.4; charset=utf-8")
@@ -0,0 +1,214 @@
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import Counter
+from typing import Dict, List, Optional
+
+from flask import Flask, Response, current_app, g, request
+
+from . import batch_state
+from .admin import is_admin_request
+
+# Ключі конфігурації
+PROFILER_ENABLED = "PROFILER_ENABLED"
+PROFILER_SAMPLE_RATE = "PROFILER_SAMPLE_RATE"
+PROFILER_INTERVAL = "PROFILER_INTERVAL"
+PROFILER_DIR = "PROFILER_DIR"
+PROFILER_TOP_N = "PROFILER_TOP_N"
+PROFILER_MAX_PROFILES = "PROFILER_MAX_PROFILES"
+
+DEFAULT_SAMPLE_RATE = 0.0
+DEFAULT_INTERVAL = 0.005
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), "my_project_profiles")
+DEFAULT_TOP_N = 30
+DEFAULT_MAX_PROFILES = 200
+PROFILE_HEADER = "X-Profile"
+SKIPPED_ENDPOINTS = {"metrics", "static"}
+
+
+class SamplingProfiler:
+    """
+    Окремий потік раз на interval знімає стек потоку запиту (sys._current_frames).
+    Сам запит не сповільнюється трасуванням кожного виклику, як у cProfile
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.started = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._thread.start()
+
+    def stop(self) -> float:
+        self._stop.set()
+        self._thread.join()
+        return time.perf_counter() - self.started
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame))
+                frame = frame.f_back
+            stack.reverse()
+            self.stacks[tuple(stack)] += 1
+            self.samples += 1
+
+    def collapsed(self) -> str:
+        # Формат "f1;f2;f3 кількість" — вхід для flamegraph.pl / speedscope
+        return "".join(f"{';'.join(stack)} {count}\n" for stack, count in self.stacks.most_common())
+
+    def top(self, limit: int) -> List[dict]:
+        own: Counter = Counter()
+        total: Counter = Counter()
+        for stack, count in self.stacks.items():
+            own[stack[-1]] += count
+            for name in set(stack):
+                total[name] += count
+        return [
+            {"function": name, "self": own[name], "total": count,
+             "self_pct": round(100.0 * own[name] / self.samples, 1) if self.samples else 0.0}
+            for name, count in sorted(total.items(), key=lambda item: (-own[item[0]], -item[1]))[:limit]
+        ]
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    path = code.co_filename.replace("\\", "/").split("/")
+    return f"{code.co_name} ({'/'.join(path[-2:])}:{code.co_firstlineno})"
+
+
+def init_profiler(app: Flask) -> None:
+    """
+    Профілює окремі запити: з заголовком X-Profile і адмінським токеном або випадкову частку
+    PROFILER_SAMPLE_RATE. Результат — collapsed-стеки для flame graph та top-N функцій
+    """
+    if not app.config.get(PROFILER_ENABLED, True):
+        return
+    app.before_request(_start_profiling)
+    app.after_request(_add_profile_header)
+    app.teardown_request(_stop_profiling)
+
+
+def profiles_dir() -> str:
+    return current_app.config.get(PROFILER_DIR) or DEFAULT_DIR
+
+
+def _should_profile() -> bool:
+    # Операції batch-запиту потрапляють у профіль самого batch
+    if request.endpoint is None or request.endpoint in SKIPPED_ENDPOINTS or batch_state.active():
+        return False
+    if PROFILE_HEADER in request.headers and is_admin_request():
+        return True
+    rate = current_app.config.get(PROFILER_SAMPLE_RATE, DEFAULT_SAMPLE_RATE)
+    return rate > 0 and random.random() < rate
+
+
+def _start_profiling() -> None:
+    if not _should_profile():
+        return
+    profiler = SamplingProfiler(threading.get_ident(), current_app.config.get(PROFILER_INTERVAL, DEFAULT_INTERVAL))
+    # Ідентифікатор сортується за часом (до мікросекунд) — це використовують список і ротація
+    now = time.time()
+    g.profile_id = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now % 1 * 1e6):06d}-{uuid.uuid4().hex[:6]}"
+    g.profiler = profiler
+    profiler.start()
+
+
+def _add_profile_header(response: Response) -> Response:
+    profile_id = g.get("profile_id")
+    if profile_id is not None:
+        response.headers["X-Profile-Id"] = profile_id
+        g.profile_status = response.status_code
+    return response
+
+
+def _stop_profiling(exc) -> None:
+    profiler: Optional[SamplingProfiler] = g.pop("profiler", None)
+    if profiler is None:
+        return
+    duration = profiler.stop()
+    try:
+        _save(g.pop("profile_id"), profiler, duration, g.pop("profile_status", 500))
+    except OSError:
+        current_app.logger.warning("Could not save request profile", exc_info=True)
+
+
+def _save(profile_id: str, profiler: SamplingProfiler, duration: float, status: int) -> None:
+    directory = profiles_dir()
+    os.makedirs(directory, exist_ok=True)
+    meta = {
+        "id": profile_id,
+        "endpoint": request.endpoint,
+        "method": request.method,
+        "path": request.full_path.rstrip("?"),
+        "status": status,
+        "duration_ms": round(duration * 1000, 2),
+        "samples": profiler.samples,
+        "interval_ms": profiler.interval * 1000,
+        "top": profiler.top(current_app.config.get(PROFILER_TOP_N, DEFAULT_TOP_N)),
+    }
+    with open(os.path.join(directory, f"{profile_id}.collapsed"), "w", encoding="utf-8") as f:
+        f.write(profiler.collapsed())
+    with open(os.path.join(directory, f"{profile_id}.json"), "w", encoding="utf-8") as f:
+        json.dump(meta, f)
+    _prune(directory, current_app.config.get(PROFILER_MAX_PROFILES, DEFAULT_MAX_PROFILES))
+
+
+def _prune(directory: str, keep: int) -> None:
+    ids = sorted(name[:-len(".json")] for name in os.listdir(directory) if name.endswith(".json"))
+    for profile_id in ids[:-keep] if keep > 0 else ids:
+        for suffix in (".json", ".collapsed"):
+            try:
+                os.remove(os.path.join(directory, profile_id + suffix))
+            except FileNotFoundError:
+                pass
+
+
+def list_profiles(endpoint: Optional[str] = None) -> List[Dict]:
+    """
+    Метадані збережених профілів (без top-N), новіші першими
+    """
+    directory = profiles_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if not name.endswith(".json"):
+            continue
+        meta = load_profile(name[:-len(".json")])
+        if meta is None or (endpoint is not None and meta["endpoint"] != endpoint):
+            continue
+        meta.pop("top", None)
+        profiles.append(meta)
+    return profiles
+
+
+def load_profile(profile_id: str) -> Optional[Dict]:
+    try:
+        with open(os.path.join(profiles_dir(), f"{os.path.basename(profile_id)}.json"), encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def load_collapsed(profile_id: str) -> Optional[str]:
+    try:
+        with open(os.path.join(profiles_dir(), f"{os.path.basename(profile_id)}.collapsed"), encoding="utf-8") as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
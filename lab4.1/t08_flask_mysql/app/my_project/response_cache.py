@@ -0,0 +1,241 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Optional, Tuple
+
+from flask import Flask, Response, current_app, g, request
+
+from . import batch_state
+
+# Ключі конфігурації
+RESPONSE_CACHE_ENABLED = "RESPONSE_CACHE_ENABLED"
+RESPONSE_CACHE_PATH = "RESPONSE_CACHE_PATH"
+RESPONSE_CACHE_TTL = "RESPONSE_CACHE_TTL"
+RESPONSE_CACHE_MAX_BYTES = "RESPONSE_CACHE_MAX_BYTES"
+RESPONSE_CACHE_VARY_HEADERS = "RESPONSE_CACHE_VARY_HEADERS"
+
+# Файл кешу за замовчуванням — у instance-теці застосунку (не в спільному /tmp), доступ лише власнику
+DEFAULT_FILE_NAME = "response_cache.sqlite3"
+DEFAULT_TTL = 30
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_VARY_HEADERS = ["Accept"]
+# Blueprint -> таблиця, від якої залежать його GET-відповіді.
+# Users не кешується: відповіді містять PasswordHash
+CACHED_BLUEPRINTS = {
+    "games": "Games",
+    "publishers": "Publishers",
+    "user_game_ownership": "UserGameOwnership",
+}
+# Зміна таблиці робить застарілими й відповіді залежних таблиць
+# (власність містить Username/GameName, ігри — PublisherID, /publishers/<id>/games — список ігор)
+DEPENDENTS = {
+    "Users": ["UserGameOwnership"],
+    "Games": ["UserGameOwnership", "Publishers"],
+    "Publishers": ["Games"],
+}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    Key TEXT PRIMARY KEY,
+    Tag TEXT NOT NULL,
+    Status INTEGER NOT NULL,
+    ContentType TEXT NOT NULL,
+    Body BLOB NOT NULL,
+    Size INTEGER NOT NULL,
+    Created REAL NOT NULL,
+    Expires REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_tag ON entries (Tag);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (Created);
+CREATE TABLE IF NOT EXISTS generations (
+    Tag TEXT PRIMARY KEY,
+    Gen INTEGER NOT NULL
+);
+"""
+
+
+class ResponseCacheStore:
+    """
+    Кеш відповідей у локальному SQLite-файлі, спільному для всіх воркерів на машині.
+    Кожна таблиця має лічильник поколінь: відповідь, обчислена до інвалідації, не буде збережена
+    """
+
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.connection().executescript(SCHEMA)
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Tuple[int, str, bytes]]:
+        return self.connection().execute(
+            "SELECT Status, ContentType, Body FROM entries WHERE Key = ? AND Expires > ?", (key, time.time())
+        ).fetchone()
+
+    def generation(self, tag: str) -> int:
+        row = self.connection().execute("SELECT Gen FROM generations WHERE Tag = ?", (tag,)).fetchone()
+        return row[0] if row else 0
+
+    def put(self, key: str, tag: str, generation: int, status: int, content_type: str, body: bytes, ttl: float) -> None:
+        now = time.time()
+        conn = self.connection()
+        # Зберігаємо лише якщо таблицю не змінили, поки відповідь обчислювалась
+        conn.execute(
+            "INSERT OR REPLACE INTO entries (Key, Tag, Status, ContentType, Body, Size, Created, Expires) "
+            "SELECT ?, ?, ?, ?, ?, ?, ?, ? "
+            "WHERE COALESCE((SELECT Gen FROM generations WHERE Tag = ?), 0) = ?",
+            (key, tag, status, content_type, body, len(body), now, now + ttl, tag, generation),
+        )
+        self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        conn.execute("DELETE FROM entries WHERE Expires <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(Size), 0) FROM entries").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Видаляємо найстаріші записи, доки не звільнимо місце із запасом
+        excess = total - int(self.max_bytes * 0.9)
+        victims = []
+        for key, size in conn.execute("SELECT Key, Size FROM entries ORDER BY Created"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE Key = ?", victims)
+
+    def invalidate(self, tags: Iterable[str]) -> None:
+        conn = self.connection()
+        for tag in tags:
+            conn.execute(
+                "INSERT INTO generations (Tag, Gen) VALUES (?, 1) "
+                "ON CONFLICT (Tag) DO UPDATE SET Gen = Gen + 1",
+                (tag,),
+            )
+            conn.execute("DELETE FROM entries WHERE Tag = ?", (tag,))
+
+
+def init_response_cache(app: Flask) -> None:
+    """
+    Спільний для всіх воркерів кеш GET-відповідей з TTL, обмеженням розміру
+    та інвалідацією з DAO після коміту змін
+    """
+    if not app.config.get(RESPONSE_CACHE_ENABLED, True):
+        return
+
+    store = ResponseCacheStore(
+        _private_path(app.config.get(RESPONSE_CACHE_PATH) or os.path.join(app.instance_path, DEFAULT_FILE_NAME)),
+        app.config.get(RESPONSE_CACHE_MAX_BYTES, DEFAULT_MAX_BYTES),
+    )
+    app.extensions["response_cache"] = store
+
+    from .metrics import register_counter
+
+    register_counter(app, "response_cache_hits_total", "Responses served from the shared response cache",
+                     lambda: store.hits)
+    register_counter(app, "response_cache_misses_total", "Cacheable requests that missed the shared response cache",
+                     lambda: store.misses)
+
+    app.before_request(_lookup)
+    app.after_request(_store)
+
+
+def _private_path(path: str) -> str:
+    """
+    Створює теку (0700) та файл кешу (0600) до того, як їх відкриє SQLite: у кеші тіла відповідей,
+    які не повинні читати інші користувачі машини. Файли -wal/-shm SQLite створює з тими самими правами
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    os.close(os.open(path, os.O_CREAT | os.O_RDWR, 0o600))
+    os.chmod(path, 0o600)
+    return path
+
+
+def invalidate(*tables: str) -> None:
+    """
+    Викликається DAO після запису: скидає кешовані відповіді таблиць (і залежних від них)
+    лише після успішного коміту транзакції
+    """
+    store: Optional[ResponseCacheStore] = current_app.extensions.get("response_cache")
+    if store is None:
+        return
+
+    tags = set()
+    pending = list(tables)
+    while pending:
+        table = pending.pop()
+        if table not in tags:
+            tags.add(table)
+            pending.extend(DEPENDENTS.get(table, ()))
+
+    from .unit_of_work import on_commit
+
+    on_commit(lambda: _safe(store.invalidate, tags))
+
+
+def _safe(fn, *args):
+    try:
+        return fn(*args)
+    except sqlite3.Error:
+        current_app.logger.warning("Response cache is unavailable", exc_info=True)
+        return None
+
+
+def _cache_key() -> str:
+    vary = current_app.config.get(RESPONSE_CACHE_VARY_HEADERS, DEFAULT_VARY_HEADERS)
+    parts = [request.method, request.full_path] + [f"{name}:{request.headers.get(name, '')}" for name in vary]
+    return hashlib.sha256("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def _lookup():
+    if request.method != "GET" or request.blueprint not in CACHED_BLUEPRINTS:
+        return None
+    # Усередині batch читання мають бачити ще не закомічені зміни попередніх операцій,
+    # а їхні відповіді не можна класти в спільний кеш
+    if batch_state.active():
+        return None
+    store: ResponseCacheStore = current_app.extensions["response_cache"]
+    tag = CACHED_BLUEPRINTS[request.blueprint]
+    key = _cache_key()
+
+    if "no-cache" not in request.headers.get("Cache-Control", ""):
+        cached = _safe(store.get, key)
+        if cached is not None:
+            store.hits += 1
+            status, content_type, body = cached
+            response = Response(body, status=status, content_type=content_type)
+            response.headers["X-Cache"] = "HIT"
+            return response
+
+    generation = _safe(store.generation, tag)
+    if generation is not None:
+        store.misses += 1
+        g.response_cache_entry = (key, tag, generation)
+    return None
+
+
+def _store(response: Response) -> Response:
+    entry = g.pop("response_cache_entry", None)
+    if entry is None:
+        return response
+    response.headers["X-Cache"] = "MISS"
+    if response.status_code != 200 or response.is_streamed or response.direct_passthrough:
+        return response
+
+    key, tag, generation = entry
+    ttl = current_app.config.get(RESPONSE_CACHE_TTL, DEFAULT_TTL)
+    store: ResponseCacheStore = current_app.extensions["response_cache"]
+    _safe(store.put, key, tag, generation, response.status_code, response.content_type, response.get_data(), ttl)
+    return response
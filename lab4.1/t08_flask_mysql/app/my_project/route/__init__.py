@@ -1,11 +1,24 @@
-from t08_flask_mysql.app.my_project.controller.users_controller import users_bp
-from t08_flask_mysql.app.my_project.controller.publishers_controller import publishers_bp
-from t08_flask_mysql.app.my_project.controller.games_controller import games_bp
-from t08_flask_mysql.app.my_project.controller.user_game_ownership_controller import user_game_bp
-
 def register_routes(app):
+    # Контролери імпортуються лише під час реєстрації, щоб сам імпорт пакета
+    # не тягнув за собою всі сервіси, DAO та моделі
+    from t08_flask_mysql.app.my_project.controller.users_controller import users_bp
+    from t08_flask_mysql.app.my_project.controller.publishers_controller import publishers_bp
+    from t08_flask_mysql.app.my_project.controller.games_controller import games_bp
+    from t08_flask_mysql.app.my_project.controller.user_game_ownership_controller import user_game_bp
+    from t08_flask_mysql.app.my_project.controller.analytics_controller import analytics_bp
+    from t08_flask_mysql.app.my_project.controller.export_controller import export_bp
+    from t08_flask_mysql.app.my_project.controller.changes_controller import changes_bp
+    from t08_flask_mysql.app.my_project.controller.internal_controller import internal_bp
+    from t08_flask_mysql.app.my_project.controller.batch_controller import batch_bp
+    from t08_flask_mysql.app.my_project.controller.leaderboards_controller import leaderboards_bp
+
     app.register_blueprint(users_bp, url_prefix='/users')
     app.register_blueprint(publishers_bp, url_prefix='/publishers')
     app.register_blueprint(games_bp, url_prefix='/games')
     app.register_blueprint(user_game_bp, url_prefix='/user-game-ownership')
-
+    app.register_blueprint(analytics_bp, url_prefix='/analytics')
+    app.register_blueprint(export_bp, url_prefix='/export')
+    app.register_blueprint(changes_bp, url_prefix='/changes')
+    app.register_blueprint(internal_bp, url_prefix='/_internal')
+    app.register_blueprint(batch_bp, url_prefix='/batch')
+    app.register_blueprint(leaderboards_bp, url_prefix='/leaderboards')
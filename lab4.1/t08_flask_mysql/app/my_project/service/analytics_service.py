@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from flask import current_app
+
+from t08_flask_mysql.app.my_project.dao.analytics_dao import AnalyticsDAO
+from t08_flask_mysql.app.my_project.service.change_log_service import ChangeLogService
+
+# Ключі конфігурації
+ANALYTICS_REFRESH_BATCH_SIZE = "ANALYTICS_REFRESH_BATCH_SIZE"
+
+DEFAULT_REFRESH_BATCH_SIZE = 5000
+GRANULARITIES = ("day", "week")
+GROUP_BY = ("game", "publisher")
+
+
+class AnalyticsService:
+    @staticmethod
+    def refresh_purchase_rollups():
+        return AnalyticsDAO.refresh_purchase_rollups(
+            current_app.config.get(ANALYTICS_REFRESH_BATCH_SIZE, DEFAULT_REFRESH_BATCH_SIZE),
+            ChangeLogService.settled_before(),
+        )
+
+    @staticmethod
+    def rebuild_purchase_rollups():
+        return AnalyticsDAO.rebuild_purchase_rollups(
+            current_app.config.get(ANALYTICS_REFRESH_BATCH_SIZE, DEFAULT_REFRESH_BATCH_SIZE),
+            ChangeLogService.settled_before(),
+        )
+
+    @staticmethod
+    def get_purchases(granularity, date_from=None, date_to=None, game_id=None, publisher_id=None, group_by=None):
+        rows = AnalyticsDAO.get_daily_purchases(date_from, date_to, game_id, publisher_id, group_by)
+        group_key = {"game": "GameID", "publisher": "PublisherID"}.get(group_by)
+
+        buckets = {}
+        for row in rows:
+            period = row.Day
+            if granularity == "week":
+                period = row.Day - timedelta(days=row.Day.weekday())
+            key = (period, getattr(row, group_key) if group_key else None)
+            buckets[key] = buckets.get(key, 0) + int(row.Purchases)
+
+        result = []
+        for (period, group), purchases in buckets.items():
+            if not purchases:
+                continue
+            item = {"Period": period.isoformat(), "Purchases": purchases}
+            if group_key:
+                item[group_key] = group
+            result.append(item)
+        return result
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from t08_flask_mysql.app.my_project.batch import BATCH_MAX_SECONDS, DEFAULT_MAX_SECONDS
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO
+from t08_flask_mysql.app.my_project.deadlines import DEADLINE_DEFAULT_MS, DEADLINE_ROUTE_BUDGETS, DEFAULT_BUDGET_MS
+
+# Ключі конфігурації
+CHANGE_FEED_DEFAULT_LIMIT = "CHANGE_FEED_DEFAULT_LIMIT"
+CHANGE_FEED_MAX_LIMIT = "CHANGE_FEED_MAX_LIMIT"
+CHANGE_FEED_SETTLE_SECONDS = "CHANGE_FEED_SETTLE_SECONDS"
+CHANGE_LOG_RETENTION_DAYS = "CHANGE_LOG_RETENTION_DAYS"
+
+DEFAULT_LIMIT = 100
+DEFAULT_MAX_LIMIT = 1000
+# Запас поверх найдовшої дозволеної транзакції (різниця годинників воркерів, час самого коміту)
+SETTLE_MARGIN_SECONDS = 1.0
+DEFAULT_RETENTION_DAYS = 7
+ENTITIES = ("Users", "Games", "Publishers", "UserGameOwnership")
+
+
+class ChangeLogService:
+    @staticmethod
+    def get_changes(since=0, limit=None, entity=None):
+        """
+        Повертає (події, наступний курсор, чи є ще події)
+        """
+        config = current_app.config
+        max_limit = config.get(CHANGE_FEED_MAX_LIMIT, DEFAULT_MAX_LIMIT)
+        limit = limit or config.get(CHANGE_FEED_DEFAULT_LIMIT, DEFAULT_LIMIT)
+        if since < 0:
+            raise ValueError("since must be a non-negative cursor")
+        if not 0 < limit <= max_limit:
+            raise ValueError(f"limit must be between 1 and {max_limit}")
+        if entity is not None and entity not in ENTITIES:
+            raise ValueError(f"Unknown entity '{entity}'. Use one of {', '.join(ENTITIES)}")
+
+        settled_before = ChangeLogService.settled_before()
+        # Беремо на одну подію більше, щоб знати, чи є наступна сторінка
+        changes = ChangeLogDAO.get_changes(since, limit + 1, settled_before, entity)
+        has_more = len(changes) > limit
+        changes = changes[:limit]
+        next_cursor = changes[-1].ChangeID if changes else since
+        return changes, next_cursor, has_more
+
+    @staticmethod
+    def settled_before():
+        """
+        Події, записані пізніше, ще не віддаються споживачам: транзакція з меншим ChangeID могла не закомітитися
+        """
+        return datetime.now() - timedelta(seconds=ChangeLogService.settle_seconds())
+
+    @staticmethod
+    def settle_seconds():
+        """
+        CHANGE_FEED_SETTLE_SECONDS, а якщо не задано — найдовша транзакція, яку дозволяють бюджети дедлайнів
+        і ліміт batch-запиту. Транзакції без дедлайну (CLI-команди, маршрути з бюджетом 0, вимкнені дедлайни)
+        ця межа не покриває: події, що закомітились пізніше, споживач пропустить
+        """
+        config = current_app.config
+        configured = config.get(CHANGE_FEED_SETTLE_SECONDS)
+        if configured is not None:
+            return configured
+        budgets_ms = [config.get(DEADLINE_DEFAULT_MS, DEFAULT_BUDGET_MS),
+                      *(config.get(DEADLINE_ROUTE_BUDGETS) or {}).values()]
+        longest = max(max(budgets_ms) / 1000.0, config.get(BATCH_MAX_SECONDS, DEFAULT_MAX_SECONDS))
+        return longest + SETTLE_MARGIN_SECONDS
+
+    @staticmethod
+    def compact(retention_days=None, collapse=False):
+        if retention_days is None:
+            retention_days = current_app.config.get(CHANGE_LOG_RETENTION_DAYS, DEFAULT_RETENTION_DAYS)
+        return ChangeLogDAO.compact(retention_days, collapse)
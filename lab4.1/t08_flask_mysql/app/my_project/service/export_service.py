@@ -0,0 +1,69 @@
+import csv
+import io
+import json
+from datetime import date, datetime
+
+from flask import current_app
+
+from t08_flask_mysql.app.my_project.dao.export_dao import ExportDAO
+
+# Ключі конфігурації
+EXPORT_CHUNK_SIZE = "EXPORT_CHUNK_SIZE"
+
+DEFAULT_CHUNK_SIZE = 1000
+FORMATS = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _json_default(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return str(value)
+
+
+class ExportService:
+    @staticmethod
+    def tables():
+        return list(ExportDAO.TABLES)
+
+    @staticmethod
+    def export(table, export_format, since_id=None, since_date=None):
+        """
+        Генерує експорт таблиці шматками тексту; кожен шматок — це один шматок рядків з БД
+        """
+        if table not in ExportDAO.TABLES:
+            raise ValueError(f"Unknown table '{table}'. Use one of {', '.join(ExportDAO.TABLES)}")
+        if export_format not in FORMATS:
+            raise ValueError(f"Unknown format '{export_format}'. Use one of {', '.join(FORMATS)}")
+        if since_date is not None and ExportDAO.TABLES[table][1] is None:
+            raise ValueError(f"Table '{table}' has no date column for since_date")
+
+        columns = ExportDAO.get_columns(table)
+        chunks = ExportDAO.stream_rows(
+            table, current_app.config.get(EXPORT_CHUNK_SIZE, DEFAULT_CHUNK_SIZE), since_id, since_date
+        )
+        if export_format == "csv":
+            return ExportService._csv(columns, chunks)
+        return ExportService._ndjson(columns, chunks)
+
+    @staticmethod
+    def _csv(columns, chunks):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+        yield buffer.getvalue()
+        for rows in chunks:
+            buffer.seek(0)
+            buffer.truncate()
+            writer.writerows(
+                [value.isoformat() if isinstance(value, (date, datetime)) else value for value in row]
+                for row in rows
+            )
+            yield buffer.getvalue()
+
+    @staticmethod
+    def _ndjson(columns, chunks):
+        for rows in chunks:
+            yield "".join(json.dumps(dict(zip(columns, row)), default=_json_default) + "\n" for row in rows)
@@ -1,14 +1,24 @@
 from t08_flask_mysql.app.my_project.dao.games_dao import GamesDAO
+from t08_flask_mysql.app.my_project.single_flight import coalesce
 
 class GamesService:
     @staticmethod
-    def get_all_games():
-        return GamesDAO.get_all_games()
+    def list_fields():
+        return GamesDAO.LIST_COLUMNS.keys()
 
     @staticmethod
+    def get_all_games(list_query=None):
+        return GamesDAO.get_all_games(list_query)
+
+    @staticmethod
+    @coalesce
     def get_game_by_id(game_id):
         return GamesDAO.get_game_by_id(game_id)
 
+    @staticmethod
+    def get_games_by_ids(ids):
+        return GamesDAO.get_games_by_ids(ids)
+
     @staticmethod
     def create_game(game_name, publisher_id, release_date):
         return GamesDAO.create_game(game_name, publisher_id, release_date)
@@ -17,10 +27,18 @@ class GamesService:
     def update_game(game_id, game_name, publisher_id, release_date):
         return GamesDAO.update_game(game_id, game_name, publisher_id, release_date)
 
+    @staticmethod
+    def patch_game(game_id, version, changes):
+        return GamesDAO.patch_game(game_id, version, changes)
+
     @staticmethod
     def delete_game(game_id):
         return GamesDAO.delete_game(game_id)
 
+    @staticmethod
+    def delete_games(ids):
+        return GamesDAO.delete_games(ids)
+
     @staticmethod
     def get_game_name_statistics(operation):
         return GamesDAO.get_game_name_statistics(operation)
@@ -0,0 +1,32 @@
+from flask import current_app
+
+from t08_flask_mysql.app.my_project.leaderboards import (
+    ALL_TIME, DEFAULT_MAX_K, LEADERBOARD_MAX_K, get_leaderboards,
+)
+
+DEFAULT_K = 10
+
+
+class LeaderboardsDisabledError(Exception):
+    """
+    Рейтинги вимкнено в конфігурації (LEADERBOARD_ENABLED)
+    """
+
+
+class LeaderboardService:
+    @staticmethod
+    def windows():
+        leaderboards = get_leaderboards()
+        return [ALL_TIME] + (list(leaderboards.windows) if leaderboards else [])
+
+    @staticmethod
+    def get_top(board, window=ALL_TIME, k=DEFAULT_K):
+        leaderboards = get_leaderboards()
+        if leaderboards is None:
+            raise LeaderboardsDisabledError()
+        if window != ALL_TIME and window not in leaderboards.windows:
+            raise ValueError(f"Invalid window. Use one of {', '.join(LeaderboardService.windows())}.")
+        max_k = current_app.config.get(LEADERBOARD_MAX_K, DEFAULT_MAX_K)
+        if k < 1 or k > max_k:
+            raise ValueError(f"k must be between 1 and {max_k}")
+        return leaderboards.top(board, window, k)
@@ -1,16 +1,28 @@
 from t08_flask_mysql.app.my_project.dao.publishers_dao import PublishersDAO
-from sqlalchemy import text
 from t08_flask_mysql.app.my_project.db import db
+from t08_flask_mysql.app.my_project.single_flight import coalesce
+from t08_flask_mysql.app.my_project.dao.change_log_dao import ChangeLogDAO
+from t08_flask_mysql.app.my_project.domain.publisher import Publisher
+from t08_flask_mysql.app.my_project import response_cache, unit_of_work
 
 class PublishersService:
     @staticmethod
-    def get_all_publishers():
-        return PublishersDAO.get_all_publishers()
+    def list_fields():
+        return PublishersDAO.LIST_COLUMNS.keys()
 
     @staticmethod
+    def get_all_publishers(list_query=None):
+        return PublishersDAO.get_all_publishers(list_query)
+
+    @staticmethod
+    @coalesce
     def get_publisher_by_id(publisher_id):
         return PublishersDAO.get_publisher_by_id(publisher_id)
 
+    @staticmethod
+    def get_publishers_by_ids(ids):
+        return PublishersDAO.get_publishers_by_ids(ids)
+
     @staticmethod
     def create_publisher(publisher_name):
         return PublishersDAO.create_publisher(publisher_name)
@@ -19,16 +31,27 @@ class PublishersService:
     def update_publisher(publisher_id, publisher_name):
         return PublishersDAO.update_publisher(publisher_id, publisher_name)
 
+    @staticmethod
+    def patch_publisher(publisher_id, version, changes):
+        return PublishersDAO.patch_publisher(publisher_id, version, changes)
+
     @staticmethod
     def delete_publisher(publisher_id):
         return PublishersDAO.delete_publisher(publisher_id)
 
     @staticmethod
+    def delete_publishers(ids):
+        return PublishersDAO.delete_publishers(ids)
+
+    @staticmethod
+    @coalesce
     def get_games_by_publisher(publisher_id):
         return PublishersDAO.get_games_by_publisher(publisher_id)
 
     @staticmethod
     def create_noname_publishers(start_num):
-        sql = text("CALL InsertNonamePublishers(:startNum)")
-        db.session.execute(sql, {"startNum": start_num})
-        db.session.commit()
\ No newline at end of file
+        last_id = ChangeLogDAO.max_id(Publisher)
+        db.session.execute(PublishersDAO.INSERT_NONAME, {"startNum": start_num})
+        ChangeLogDAO.record_inserted_since(Publisher, last_id)
+        unit_of_work.complete()
+        response_cache.invalidate(Publisher.__tablename__)
\ No newline at end of file
@@ -1,22 +1,46 @@
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from t08_flask_mysql.app.my_project.archive import (
+    DEFAULT_ARCHIVE_AFTER_DAYS, DEFAULT_BATCH_SIZE, OWNERSHIP_ARCHIVE_AFTER_DAYS, OWNERSHIP_ARCHIVE_BATCH_SIZE,
+)
+from t08_flask_mysql.app.my_project.dao.sharded_ownership_dao import ShardedOwnershipDAO
 from t08_flask_mysql.app.my_project.dao.user_game_ownership_dao import UserGameOwnershipDAO
 
 class UserGameOwnershipService:
     @staticmethod
-    def get_all_ownerships():
-        return UserGameOwnershipDAO.get_all_ownerships()
+    def list_fields():
+        return UserGameOwnershipDAO.LIST_COLUMNS.keys()
+
+    @staticmethod
+    def get_all_ownerships(list_query=None, include_archived=False):
+        return UserGameOwnershipDAO.get_all_ownerships(list_query, include_archived)
 
     @staticmethod
-    def get_ownership_by_id(ownership_id):
-        return UserGameOwnershipDAO.get_ownership_by_id(ownership_id)
+    def get_ownership_by_id(ownership_id, include_archived=False):
+        return UserGameOwnershipDAO.get_ownership_by_id(ownership_id, include_archived)
 
     @staticmethod
     def create_ownership(user_id, game_id, purchase_date=None):
         return UserGameOwnershipDAO.create_ownership(user_id, game_id, purchase_date)
 
     @staticmethod
-    def delete_ownership(ownership_id):
-        return UserGameOwnershipDAO.delete_ownership(ownership_id)
+    def delete_ownership(ownership_id, include_archived=False):
+        return UserGameOwnershipDAO.delete_ownership(ownership_id, include_archived)
 
     @staticmethod
     def link_user_to_game(username, game_name):
         UserGameOwnershipDAO.link_user_to_game(username, game_name)
+
+    @staticmethod
+    def reshard_ownerships(from_main=False, retired=(), batch_size=1000):
+        return ShardedOwnershipDAO.reshard(from_main, retired, batch_size)
+
+    @staticmethod
+    def archive_ownerships(older_than_days=None, batch_size=None):
+        if older_than_days is None:
+            older_than_days = current_app.config.get(OWNERSHIP_ARCHIVE_AFTER_DAYS, DEFAULT_ARCHIVE_AFTER_DAYS)
+        if batch_size is None:
+            batch_size = current_app.config.get(OWNERSHIP_ARCHIVE_BATCH_SIZE, DEFAULT_BATCH_SIZE)
+        return UserGameOwnershipDAO.archive_ownerships(datetime.now() - timedelta(days=older_than_days), batch_size)
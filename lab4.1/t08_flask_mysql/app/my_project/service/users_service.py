@@ -1,14 +1,24 @@
 from t08_flask_mysql.app.my_project.dao.users_dao import UsersDAO
+from t08_flask_mysql.app.my_project.single_flight import coalesce
 
 class UsersService:
     @staticmethod
-    def get_all_users():
-        return UsersDAO.get_all_users()
+    def list_fields():
+        return UsersDAO.LIST_COLUMNS.keys()
 
     @staticmethod
+    def get_all_users(list_query=None):
+        return UsersDAO.get_all_users(list_query)
+
+    @staticmethod
+    @coalesce
     def get_user_by_id(user_id):
         return UsersDAO.get_user_by_id(user_id)
 
+    @staticmethod
+    def get_users_by_ids(ids):
+        return UsersDAO.get_users_by_ids(ids)
+
     @staticmethod
     def create_user(username, email, password_hash):
         return UsersDAO.create_user(username, email, password_hash)
@@ -17,10 +27,18 @@ class UsersService:
     def update_user(user_id, username, email, password_hash):
         return UsersDAO.update_user(user_id, username, email, password_hash)
 
+    @staticmethod
+    def patch_user(user_id, version, changes):
+        return UsersDAO.patch_user(user_id, version, changes)
+
     @staticmethod
     def delete_user(user_id):
         return UsersDAO.delete_user(user_id)
 
+    @staticmethod
+    def delete_users(ids):
+        return UsersDAO.delete_users(ids)
+
     @staticmethod
     def create_user_via_procedure(username, email, password_hash):
         UsersDAO.create_user_via_procedure(username, email, password_hash)
@@ -0,0 +1,225 @@
+import functools
+import heapq
+import threading
+import zlib
+from contextlib import contextmanager
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence
+
+from flask import Flask, current_app, g
+from sqlalchemy import Column, Index, MetaData, Table, create_engine, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from . import unit_of_work
+from .archive import create_view, union_view
+from .db import db
+
+# Ключі конфігурації
+OWNERSHIP_SHARDS = "OWNERSHIP_SHARDS"
+OWNERSHIP_ID_BLOCK = "OWNERSHIP_ID_BLOCK"
+
+DEFAULT_ID_BLOCK = 100
+OWNERSHIP_SEQUENCE = "UserGameOwnership"
+
+
+def shard_index(user_id: int, count: int) -> int:
+    """
+    Стабільний (однаковий у всіх процесах і між перезапусками) номер шарду для користувача
+    """
+    return zlib.crc32(str(int(user_id)).encode("ascii")) % count
+
+
+def shard_table(source: Table, metadata: MetaData, key: str) -> Table:
+    """
+    Копія таблиці для шарду: ті самі колонки та індекси (плюс індекс за ключем шардування),
+    але без зовнішніх ключів (користувачі та ігри лишаються в основній БД) і без автоінкременту — ID видає IdAllocator
+    """
+    columns = [Column(column.name, column.type, primary_key=column.primary_key,
+                      nullable=column.nullable, autoincrement=False) for column in source.columns]
+    indexes = [Index(index.name, *(column.name for column in index.columns)) for index in source.indexes]
+    if not any([column.name for column in index.columns] == [key] for index in source.indexes):
+        indexes.append(Index(f"ix_{source.name}_{key}", key))
+    return Table(source.name, metadata, *columns, *indexes)
+
+
+class IdAllocator:
+    """
+    Глобально унікальні ID для рядків у різних шардах. Блок ID резервується в основній БД
+    окремою короткою транзакцією, далі ID видаються з пам'яті процесу. ID різних процесів не йдуть
+    у порядку комітів, тож інкрементальні споживачі читають журнал змін, а не "ID > останнього"
+    """
+
+    def __init__(self, name: str, block: int, initial: Callable[..., int]):
+        self.name = name
+        self.block = block
+        self.initial = initial
+        self._next = 0
+        self._end = 0
+        self._lock = threading.Lock()
+
+    def next_id(self) -> int:
+        with self._lock:
+            if self._next >= self._end:
+                self._next, self._end = self._reserve()
+            value = self._next
+            self._next += 1
+            return value
+
+    def _reserve(self):
+        from .domain.id_sequence import IdSequence
+
+        for _ in range(3):
+            try:
+                with db.engine.begin() as conn:
+                    moved = conn.execute(
+                        update(IdSequence).where(IdSequence.Name == self.name)
+                        .values(NextID=IdSequence.NextID + self.block)
+                    ).rowcount
+                    if not moved:
+                        conn.execute(IdSequence.__table__.insert().values(Name=self.name,
+                                                                          NextID=self.initial(conn) + self.block))
+                    end = conn.execute(select(IdSequence.NextID).where(IdSequence.Name == self.name)).scalar_one()
+                return end - self.block, end
+            except IntegrityError:
+                # Інший процес саме створив послідовність — повторюємо через UPDATE
+                continue
+        raise RuntimeError(f"Could not reserve IDs for sequence '{self.name}'")
+
+
+class ShardSet:
+    """
+    Шарди однієї таблиці: окремий engine на кожен URI, рядок потрапляє в шард за хешем ключа
+    """
+
+    def __init__(self, name: str, uris: Sequence[str], source: Table, key: str, id_block: int,
+                 archive: Optional[Table] = None, view_name: Optional[str] = None):
+        self.name = name
+        self.uris = list(uris)
+        self.key = key
+        self.source = source
+        self.metadata = MetaData()
+        self.table = shard_table(source, self.metadata, key)
+        # Архів і view "гаряча + архів" у кожному шарді (див. archive.py)
+        self.archive_source = archive
+        self.archive_table = shard_table(archive, self.metadata, key) if archive is not None else None
+        self.view = union_view(view_name, self.table) if archive is not None else None
+        self.engines = [create_engine(uri) for uri in self.uris]
+        self.allocator = IdAllocator(name, id_block, self._max_id)
+
+    def __len__(self) -> int:
+        return len(self.engines)
+
+    def create_all(self) -> None:
+        for engine in self.engines:
+            self.metadata.create_all(engine)
+            if self.view is not None:
+                with engine.begin() as conn:
+                    create_view(conn, self.view, self.table, self.archive_table)
+
+    def index_for(self, key_value: int) -> int:
+        return shard_index(key_value, len(self.engines))
+
+    @contextmanager
+    def begin(self, index: int):
+        """
+        З'єднання для запису в шард. Усередині запиту транзакція шарду приєднується до unit of work
+        і комітиться разом з основною; поза запитом комітиться одразу після блоку
+        """
+        if unit_of_work.active():
+            connections = g.setdefault("shard_connections", {})
+            conn = connections.get((self.name, index))
+            if conn is None:
+                conn = connections[(self.name, index)] = self.engines[index].connect()
+                conn.begin()
+                unit_of_work.enlist(conn)
+            yield conn
+        else:
+            with self.engines[index].begin() as conn:
+                yield conn
+
+    def stream(self, index: int, stmt, chunk_size: int = 1000) -> Iterator:
+        """
+        Потоково читає результат запиту з одного шарду (серверний курсор, шматки по chunk_size)
+        """
+        with self.engines[index].connect() as conn:
+            result = conn.execution_options(yield_per=chunk_size).execute(stmt)
+            try:
+                yield from result
+            finally:
+                result.close()
+
+    def scatter(self, stmt, indexes: Optional[Iterable[int]] = None, key: Optional[Callable] = None,
+                chunk_size: int = 1000) -> Iterator:
+        """
+        Виконує запит у кожному шарді та зливає відсортовані потоки (heapq.merge) без повного
+        завантаження в пам'ять. key — ключ порядку, у якому запит сортує рядки в кожному шарді
+        """
+        indexes = range(len(self.engines)) if indexes is None else sorted(set(indexes))
+        streams = [self.stream(index, stmt, chunk_size) for index in indexes]
+        if len(streams) == 1:
+            return streams[0]
+        return heapq.merge(*streams, key=key)
+
+    def _max_id(self, main_conn) -> int:
+        # Перший блок ID має бути більшим і за ID, що лишилися в основній БД до шардування
+        main_tables = [table for table in (self.source, self.archive_source) if table is not None]
+        shard_tables = [table for table in (self.table, self.archive_table) if table is not None]
+        current = 0
+        for table in main_tables:
+            current = max(current, main_conn.execute(select(func.max(table.primary_key.columns[0]))).scalar() or 0)
+        for engine in self.engines:
+            with engine.connect() as conn:
+                for table in shard_tables:
+                    current = max(current, conn.execute(select(func.max(table.primary_key.columns[0]))).scalar() or 0)
+        return current + 1
+
+    def dispose(self) -> None:
+        for engine in self.engines:
+            engine.dispose()
+
+
+def sort_key(order: Sequence[tuple]) -> Callable:
+    """
+    Ключ для heapq.merge за кількома колонками з різним напрямком. order — (індекс у рядку, desc).
+    NULL вважається найменшим значенням, як у SQLite та MySQL
+    """
+    def compare(left, right) -> int:
+        for position, descending in order:
+            a, b = left[position], right[position]
+            if a == b:
+                continue
+            if a is None or (b is not None and a < b):
+                result = -1
+            else:
+                result = 1
+            return -result if descending else result
+        return 0
+
+    return functools.cmp_to_key(compare)
+
+
+def init_sharding(app: Flask) -> None:
+    """
+    Горизонтальне шардування UserGameOwnership за UserID. Без OWNERSHIP_SHARDS таблиця
+    лишається в основній БД, як і раніше
+    """
+    uris: List[str] = app.config.get(OWNERSHIP_SHARDS) or []
+    if not uris:
+        return
+
+    from .dao.user_game_ownership_dao import UserGameOwnershipDAO
+    from .domain.user_game_ownership import UserGameOwnership, UserGameOwnershipArchive
+
+    shards = ShardSet(OWNERSHIP_SEQUENCE, uris, UserGameOwnership.__table__, "UserID",
+                      app.config.get(OWNERSHIP_ID_BLOCK, DEFAULT_ID_BLOCK),
+                      UserGameOwnershipArchive.__table__, UserGameOwnershipDAO.ALL.name)
+    shards.create_all()
+    app.extensions["ownership_shards"] = shards
+
+
+def get_ownership_shards() -> Optional[ShardSet]:
+    return current_app.extensions.get("ownership_shards")
+
+
+def shard_engines(app: Flask) -> list:
+    shards: Optional[ShardSet] = app.extensions.get("ownership_shards")
+    return list(shards.engines) if shards is not None else []
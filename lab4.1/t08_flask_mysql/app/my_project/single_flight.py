@@ -0,0 +1,129 @@
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from flask import Flask, current_app, has_request_context, jsonify, request
+
+from . import batch_state
+
+# Ключі конфігурації
+SINGLE_FLIGHT_ENABLED = "SINGLE_FLIGHT_ENABLED"
+SINGLE_FLIGHT_TIMEOUT = "SINGLE_FLIGHT_TIMEOUT"
+
+DEFAULT_TIMEOUT = 5.0
+COALESCED_METHODS = {"GET", "HEAD"}
+
+
+class SingleFlightTimeout(Exception):
+    """
+    Спільний виклик не завершився за відведений час
+    """
+
+    def __init__(self, key: Hashable, timeout: float):
+        super().__init__(f"Shared call {key!r} did not finish in {timeout}s")
+        self.key = key
+        self.timeout = timeout
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Однакові одночасні виклики (той самий ключ) виконуються один раз: перший потік робить
+    запит до БД, решта чекають на його результат або виняток
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._calls: Dict[Hashable, _Call] = {}
+        self._lock = threading.Lock()
+        self.executed_total = 0
+        self.coalesced_total = 0
+        self.timeouts_total = 0
+
+    def do(self, key: Hashable, fn: Callable[[], Any], timeout: Optional[float] = None) -> Any:
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executed_total += 1
+            else:
+                self.coalesced_total += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as e:
+                call.error = e
+                raise
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+            return call.result
+
+        timeout = self.timeout if timeout is None else min(self.timeout, max(0.0, timeout))
+        if not call.done.wait(timeout):
+            self.timeouts_total += 1
+            raise SingleFlightTimeout(key, timeout)
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+def init_single_flight(app: Flask) -> None:
+    """
+    Об'єднує однакові одночасні читання (single-flight) у сервісному шарі
+    """
+    if not app.config.get(SINGLE_FLIGHT_ENABLED, True):
+        return
+
+    group = SingleFlight(app.config.get(SINGLE_FLIGHT_TIMEOUT, DEFAULT_TIMEOUT))
+    app.extensions["single_flight"] = group
+
+    from .metrics import register_counter
+
+    register_counter(app, "single_flight_executed_total", "Read calls that went to the database",
+                     lambda: group.executed_total)
+    register_counter(app, "single_flight_coalesced_total", "Read calls that reused a concurrent identical call",
+                     lambda: group.coalesced_total)
+    register_counter(app, "single_flight_timeouts_total",
+                     "Coalesced calls that timed out waiting for the shared result", lambda: group.timeouts_total)
+
+    app.register_error_handler(SingleFlightTimeout, _timeout_response)
+
+
+def _timeout_response(error: SingleFlightTimeout):
+    return jsonify({"error": "Timed out waiting for the database"}), 504
+
+
+def coalesce(fn: Callable) -> Callable:
+    """
+    Декоратор методів сервісу, що лише читають дані. Об'єднуються виклики з тими самими
+    аргументами під час GET-запитів; поза запитом (CLI) та для записів виклик іде напряму.
+    Результат ділять кілька запитів, тому повертати слід лише завантажені дані (без lazy-зв'язків)
+    """
+    name = f"{fn.__module__}.{fn.__qualname__}"
+
+    @functools.wraps(fn)
+    def wrapper(*args):
+        group: Optional[SingleFlight] = None
+        # Читання всередині batch бачать незакомічені зміни batch — ділитися ними не можна
+        if has_request_context() and request.method in COALESCED_METHODS and not batch_state.active():
+            group = current_app.extensions.get("single_flight")
+        if group is None:
+            return fn(*args)
+        # Чекати на чужий результат довше, ніж дозволяє дедлайн запиту, немає сенсу
+        from .deadlines import remaining
+
+        return group.do((name,) + args, lambda: fn(*args), remaining())
+
+    return wrapper
@@ -0,0 +1,239 @@
+import re
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from flask import Flask, current_app, has_request_context
+from sqlalchemy import event
+
+# Ключі конфігурації
+SLOW_QUERY_LOG_ENABLED = "SLOW_QUERY_LOG_ENABLED"
+SLOW_QUERY_THRESHOLD_MS = "SLOW_QUERY_THRESHOLD_MS"
+SLOW_QUERY_EXPLAIN = "SLOW_QUERY_EXPLAIN"
+SLOW_QUERY_MAX_SHAPES = "SLOW_QUERY_MAX_SHAPES"
+SLOW_QUERY_RECENT = "SLOW_QUERY_RECENT"
+
+DEFAULT_THRESHOLD_MS = 200
+DEFAULT_MAX_SHAPES = 500
+DEFAULT_RECENT = 100
+MAX_SHAPE_PARAMS = 20
+
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|%s|%\(\w+\)s|:\w+))+\s*\)")
+_NAMED_PLACEHOLDER = re.compile(r"%\(\w+\)s|(?<!:):\w+")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Форма запиту: літерали та плейсхолдери замінені на ?, списки IN (...) згорнуті
+    """
+    sql = _STRING_LITERAL.sub("?", statement)
+    sql = _NUMBER_LITERAL.sub("?", sql)
+    sql = _NAMED_PLACEHOLDER.sub("?", sql.replace("%s", "?"))
+    sql = _PLACEHOLDER_LIST.sub("(?, ...)", sql)
+    return _WHITESPACE.sub(" ", sql).strip()
+
+
+def params_shape(parameters: Any, executemany: bool) -> str:
+    """
+    Лише типи параметрів (без значень), щоб у журнал не потрапляли дані користувачів
+    """
+    if executemany:
+        rows = list(parameters or ())
+        return f"{len(rows)} x {params_shape(rows[0], False) if rows else '()'}"
+    if isinstance(parameters, dict):
+        items = [f"{key}: {type(value).__name__}" for key, value in list(parameters.items())[:MAX_SHAPE_PARAMS]]
+        return "{" + ", ".join(items) + ("" if len(parameters) <= MAX_SHAPE_PARAMS else ", ...") + "}"
+    values = list(parameters or ())
+    names = [type(value).__name__ for value in values[:MAX_SHAPE_PARAMS]]
+    return f"({', '.join(names)}{', ...' if len(values) > MAX_SHAPE_PARAMS else ''}) [{len(values)}]"
+
+
+def _calling_dao() -> Optional[str]:
+    # Перший кадр стеку з шару DAO (або сервісу, якщо запит зроблено там) — "модуль:Клас.метод"
+    frame = sys._getframe(2)
+    fallback = None
+    while frame is not None:
+        path = frame.f_code.co_filename.replace("\\", "/")
+        name = getattr(frame.f_code, "co_qualname", frame.f_code.co_name)
+        if "/my_project/dao/" in path:
+            return f"{path.rsplit('/', 1)[-1][:-3]}:{name}"
+        if fallback is None and "/my_project/service/" in path:
+            fallback = f"{path.rsplit('/', 1)[-1][:-3]}:{name}"
+        frame = frame.f_back
+    return fallback
+
+
+class SlowQueryLog:
+    def __init__(self, threshold_ms: float, explain: bool, max_shapes: int, recent: int):
+        self.threshold = threshold_ms / 1000.0
+        self.explain = explain
+        self.max_shapes = max_shapes
+        self.shapes: Dict[str, Dict] = {}
+        self.recent: Deque[Dict] = deque(maxlen=recent)
+        self.total = 0
+        self._pending: Deque[tuple] = deque()
+        self._lock = threading.Lock()
+
+    def record(self, engine, statement: str, parameters: Any, executemany: bool, seconds: float) -> Dict:
+        shape = normalize_sql(statement)
+        entry = {
+            "sql": shape,
+            "params": params_shape(parameters, executemany),
+            "duration_ms": round(seconds * 1000, 2),
+            "caller": _calling_dao(),
+            "at": time.time(),
+        }
+        with self._lock:
+            self.total += 1
+            self.recent.append(entry)
+            stats = self.shapes.get(shape)
+            if stats is None:
+                if len(self.shapes) >= self.max_shapes:
+                    # Витісняємо форму, яка найменше навантажує БД
+                    del self.shapes[min(self.shapes, key=lambda key: self.shapes[key]["total_ms"])]
+                stats = self.shapes[shape] = {"sql": shape, "count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                              "callers": [], "explain": None, "flags": []}
+                if self.explain and not executemany and shape.upper().startswith("SELECT"):
+                    # EXPLAIN має йти в ту саму БД (шард), де виконався запит
+                    self._pending.append((engine, shape, statement, parameters))
+            stats["count"] += 1
+            stats["total_ms"] = round(stats["total_ms"] + entry["duration_ms"], 2)
+            stats["max_ms"] = max(stats["max_ms"], entry["duration_ms"])
+            stats["last_params"] = entry["params"]
+            if entry["caller"] and entry["caller"] not in stats["callers"]:
+                stats["callers"].append(entry["caller"])
+        return entry
+
+    def explain_pending(self) -> None:
+        """
+        EXPLAIN виконується один раз на форму, окремим з'єднанням і вже після відповіді клієнту
+        """
+        while True:
+            with self._lock:
+                if not self._pending:
+                    return
+                engine, shape, statement, parameters = self._pending.popleft()
+            try:
+                plan, flags = _explain(engine, statement, parameters)
+            except Exception as e:
+                plan, flags = None, [f"explain failed: {e}"]
+            with self._lock:
+                stats = self.shapes.get(shape)
+                if stats is not None:
+                    stats["explain"], stats["flags"] = plan, flags
+
+    def report(self) -> Dict:
+        with self._lock:
+            shapes = sorted((dict(stats) for stats in self.shapes.values()), key=lambda s: -s["total_ms"])
+            return {"threshold_ms": self.threshold * 1000, "total": self.total,
+                    "shapes": shapes, "recent": list(reversed(self.recent))}
+
+
+def _explain(engine, statement: str, parameters: Any):
+    with engine.connect() as conn:
+        # Сирий курсор DBAPI: ті самі плейсхолдери й параметри, що й у вихідного запиту
+        cursor = conn.connection.dbapi_connection.cursor()
+        try:
+            if engine.dialect.name == "sqlite":
+                cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+                plan = [{"detail": row[-1]} for row in cursor.fetchall()]
+            else:
+                cursor.execute("EXPLAIN " + statement, parameters)
+                columns = [column[0] for column in cursor.description]
+                plan = [dict(zip(columns, row)) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+    return plan, _plan_flags(plan)
+
+
+def _plan_flags(plan: List[Dict]) -> List[str]:
+    flags = []
+    for step in plan:
+        if "detail" in step:
+            # SQLite: "SCAN <таблиця>" без індексу — повне сканування
+            detail = step["detail"]
+            if detail.startswith("SCAN") and "USING" not in detail:
+                flags.append(f"full scan: {detail}")
+            if "TEMP B-TREE" in detail:
+                flags.append(f"temporary sort: {detail}")
+            continue
+        table = step.get("table")
+        if step.get("type") == "ALL":
+            flags.append(f"full scan of {table} (~{step.get('rows')} rows)")
+        elif step.get("key") is None and table is not None and step.get("type") not in ("const", "system", None):
+            flags.append(f"no index used on {table}")
+        extra = step.get("Extra") or ""
+        for marker in ("Using filesort", "Using temporary"):
+            if marker in extra:
+                flags.append(f"{marker.lower()} on {table}")
+    return flags
+
+
+def init_slow_query_log(app: Flask) -> None:
+    """
+    Журнал повільних запитів: нормалізований SQL, форма параметрів, тривалість, метод DAO
+    та (для SELECT) результат EXPLAIN з позначками повних сканувань
+    """
+    if not app.config.get(SLOW_QUERY_LOG_ENABLED, True):
+        return
+
+    log = SlowQueryLog(
+        app.config.get(SLOW_QUERY_THRESHOLD_MS, DEFAULT_THRESHOLD_MS),
+        app.config.get(SLOW_QUERY_EXPLAIN, True),
+        app.config.get(SLOW_QUERY_MAX_SHAPES, DEFAULT_MAX_SHAPES),
+        app.config.get(SLOW_QUERY_RECENT, DEFAULT_RECENT),
+    )
+    app.extensions["slow_queries"] = log
+
+    from .db import db
+    from .sharding import shard_engines
+
+    with app.app_context():
+        engines = list(db.engines.values()) + shard_engines(app)
+    for engine in engines:
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _make_after_cursor_execute(app, log))
+
+    from .metrics import register_counter
+
+    register_counter(app, "slow_queries_total", "Statements slower than SLOW_QUERY_THRESHOLD_MS", lambda: log.total)
+
+    def explain_pending(exc) -> None:
+        if log._pending:
+            log.explain_pending()
+
+    app.teardown_request(explain_pending)
+
+
+def get_slow_query_log() -> Optional[SlowQueryLog]:
+    return current_app.extensions.get("slow_queries")
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Час старту живе в контексті виконання, а не в conn.info: запит, що впав, нічого не лишає
+    # на з'єднанні з пулу
+    if context is not None:
+        context.slow_query_started = time.perf_counter()
+
+
+def _make_after_cursor_execute(app: Flask, log: SlowQueryLog):
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, "slow_query_started", None)
+        if started is None:
+            return
+        seconds = time.perf_counter() - started
+        if seconds < log.threshold:
+            return
+        entry = log.record(conn.engine, statement, parameters, executemany, seconds)
+        app.logger.warning("Slow query (%.1f ms) from %s: %s %s", entry["duration_ms"], entry["caller"],
+                           entry["sql"], entry["params"])
+        if not has_request_context() and log._pending:
+            # Поза запитом (CLI) немає teardown — EXPLAIN одразу, але окремим з'єднанням
+            log.explain_pending()
+
+    return after_cursor_execute
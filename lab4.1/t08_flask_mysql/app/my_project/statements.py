@@ -0,0 +1,116 @@
+import threading
+from collections import Counter
+from typing import Dict, Optional
+
+from flask import Flask, current_app
+from sqlalchemy import event, inspect
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS
+from sqlalchemy.orm.util import identity_key
+
+from .db import db
+from .sharding import shard_engines
+
+# Ключі конфігурації
+STATEMENT_STATS_ENABLED = "STATEMENT_STATS_ENABLED"
+
+STATEMENT_OPTION = "prepared_statement"
+ADHOC = "adhoc"
+
+# Назва -> готовий параметризований statement (будується один раз під час імпорту DAO)
+_registry: Dict[str, object] = {}
+
+
+def prepared(name: str, statement):
+    """
+    Реєструє statement, зібраний один раз із bindparam замість значень. DAO виконують його
+    з параметрами, тож на кожен запит не будується новий Query/select, а скомпільований SQL
+    береться з кешу SQLAlchemy. Назва потрапляє в execution_options для статистики кешу
+    """
+    if name in _registry:
+        raise ValueError(f"Statement '{name}' is already registered")
+    statement = statement.execution_options(**{STATEMENT_OPTION: name})
+    _registry[name] = statement
+    return statement
+
+
+def registered() -> Dict[str, object]:
+    return dict(_registry)
+
+
+def get_by_pk(model, statement, entity_id):
+    """
+    Як session.get(): спершу identity map, і лише потім заздалегідь підготовлений SELECT за ключем
+    """
+    obj = db.session.identity_map.get(identity_key(model, entity_id))
+    if obj is not None and not inspect(obj).expired_attributes:
+        return obj
+    return db.session.execute(statement, {"id": entity_id}).scalar_one_or_none()
+
+
+class StatementStats:
+    """
+    Влучання в кеш скомпільованих запитів SQLAlchemy окремо для кожного зареєстрованого statement
+    """
+
+    def __init__(self):
+        self.hits: Counter = Counter()
+        self.misses: Counter = Counter()
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, cache_hit) -> None:
+        if cache_hit is CACHE_HIT:
+            counter = self.hits
+        elif cache_hit is CACHE_MISS:
+            counter = self.misses
+        else:
+            return
+        with self._lock:
+            counter[name] += 1
+
+    def report(self) -> Dict[str, Dict]:
+        with self._lock:
+            names = set(self.hits) | set(self.misses)
+            report = {}
+            for name in sorted(names):
+                hits, misses = self.hits[name], self.misses[name]
+                report[name] = {"hits": hits, "misses": misses, "hit_ratio": round(hits / (hits + misses), 4)}
+            return report
+
+    def hit_ratio(self, name: Optional[str] = None) -> float:
+        with self._lock:
+            hits = self.hits[name] if name else sum(self.hits.values())
+            misses = self.misses[name] if name else sum(self.misses.values())
+        return hits / (hits + misses) if hits + misses else 0.0
+
+
+def init_statement_stats(app: Flask) -> None:
+    """
+    Рахує влучання в кеш скомпільованих запитів (зареєстровані statement-и та всі інші разом як adhoc)
+    """
+    if not app.config.get(STATEMENT_STATS_ENABLED, True):
+        return
+
+    stats = StatementStats()
+    app.extensions["statement_stats"] = stats
+
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if context is not None and context.compiled is not None:
+            stats.observe(context.execution_options.get(STATEMENT_OPTION, ADHOC), context.cache_hit)
+
+    with app.app_context():
+        engines = list(db.engines.values()) + shard_engines(app)
+    for engine in engines:
+        event.listen(engine, "after_cursor_execute", after_cursor_execute)
+
+    from .metrics import register_counter, register_gauge
+
+    register_counter(app, "sqlalchemy_compiled_cache_hits_total", "Executions that reused a compiled statement",
+                     lambda: {(("statement", name),): value for name, value in stats.hits.items()})
+    register_counter(app, "sqlalchemy_compiled_cache_misses_total", "Executions that had to compile the statement",
+                     lambda: {(("statement", name),): value for name, value in stats.misses.items()})
+    register_gauge(app, "sqlalchemy_compiled_cache_hit_ratio", "Share of executions served from the compiled cache",
+                   lambda: round(stats.hit_ratio(), 4))
+
+
+def get_statement_stats() -> Optional[StatementStats]:
+    return current_app.extensions.get("statement_stats")
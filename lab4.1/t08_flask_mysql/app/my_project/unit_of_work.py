@@ -0,0 +1,122 @@
+from typing import Callable
+
+from flask import Flask, Response, current_app, g, has_request_context
+
+from . import batch_state
+from .db import db
+
+# Ключі конфігурації
+UNIT_OF_WORK_ENABLED = "UNIT_OF_WORK_ENABLED"
+
+
+def init_unit_of_work(app: Flask) -> None:
+    """
+    Одна транзакція на запит: DAO лише виконують flush, а commit відбувається один раз
+    наприкінці запиту (або rollback, якщо відповідь — помилка)
+    """
+    if not app.config.get(UNIT_OF_WORK_ENABLED, True):
+        return
+    app.before_request(_begin)
+    app.after_request(_finish)
+    app.teardown_request(_teardown)
+
+
+def active() -> bool:
+    return has_request_context() and g.get("uow_active", False)
+
+
+def complete() -> None:
+    """
+    Викликається DAO замість db.session.commit(). Усередині запиту лише надсилає зміни в БД (flush),
+    поза запитом (CLI, фонові задачі) — одразу комітить
+    """
+    if active():
+        db.session.flush()
+        g.uow_dirty = True
+    else:
+        db.session.commit()
+
+
+def on_commit(callback: Callable[[], None]) -> None:
+    """
+    Відкладає дію (інвалідація кешів тощо) до успішного коміту поточної транзакції
+    """
+    if active():
+        g.uow_callbacks.append(callback)
+    else:
+        callback()
+
+
+def enlist(connection) -> None:
+    """
+    Приєднує до транзакції запиту з'єднання з іншою БД (шард): воно комітиться перед основною
+    сесією й відкочується разом з нею. Це не двофазний коміт — лише спільна межа транзакції
+    """
+    g.uow_participants.append(connection)
+    g.uow_dirty = True
+
+
+def _begin() -> None:
+    # Операції batch-запиту виконуються в транзакції самого batch (див. batch.py)
+    if batch_state.active():
+        return
+    g.uow_active = True
+    g.uow_dirty = False
+    g.uow_callbacks = []
+    g.uow_participants = []
+
+
+def _finish(response: Response) -> Response:
+    if batch_state.active():
+        return response
+    if not g.pop("uow_active", False):
+        return response
+    if not g.pop("uow_dirty", False):
+        # Запит лише читав дані — коміт не потрібен, транзакцію закриє teardown сесії
+        g.pop("uow_callbacks", None)
+        return response
+    if response.status_code >= 400:
+        _rollback()
+        return response
+    try:
+        for connection in g.uow_participants:
+            connection.commit()
+        db.session.commit()
+    except Exception:
+        _rollback()
+        raise
+    _close_participants()
+    _run_callbacks()
+    return response
+
+
+def _run_callbacks() -> None:
+    for callback in g.pop("uow_callbacks", None) or ():
+        try:
+            callback()
+        except Exception:
+            current_app.logger.exception("Post-commit callback failed")
+
+
+def _rollback() -> None:
+    db.session.rollback()
+    g.pop("uow_callbacks", None)
+    for connection in g.get("uow_participants") or ():
+        connection.rollback()
+    _close_participants()
+
+
+def _close_participants() -> None:
+    for connection in g.pop("uow_participants", None) or ():
+        connection.close()
+    g.pop("shard_connections", None)
+
+
+def _teardown(exc) -> None:
+    if batch_state.active():
+        return
+    # Запит завершився винятком до after_request — нічого не комітимо
+    if g.pop("uow_active", False):
+        _rollback()
+    else:
+        _close_participants()